@@ -13,10 +13,23 @@ __license__     = "MIT"
 __date__        = "2019-12-12"
 
 __all__ = [
-	"SessionApi", "TTSApi", "SPBaseError", "APIRequestError", "APIResponseError", 
+	"SessionApi", "TTSApi", "RecognizeApi", "PackageManager", "SyncClient", "HttpClient", "MetricsSink", "InMemoryMetrics", "SessionPool", "SynthesStreamPool", "RateLimiter", "RetryPolicy", "CircuitBreaker", "CatalogCache", "SynthesDiskCache", "SynthesMemoryCache", 
+	"TextSegmenter", "PromptBundle", "build_bundle", 
+	"IdleTimeout", "AdaptiveTimeout", "SPBaseError", "APIRequestError", "CircuitOpenError", "APIResponseError", 
 	"base64_to_bin"
 ]
 
 # import modules and packages
-from .api import SessionApi, TTSApi, base64_to_bin
-from .exceptions import SPBaseError, APIRequestError, APIResponseError
\ No newline at end of file
+from .api import SessionApi, TTSApi, RecognizeApi, base64_to_bin
+from .asr import PackageManager
+from .bundle import PromptBundle, build_bundle
+from .cache import CatalogCache, SynthesDiskCache, SynthesMemoryCache
+from .client import HttpClient
+from .metrics import MetricsSink, InMemoryMetrics
+from .pool import SessionPool, SynthesStreamPool
+from .ratelimit import RateLimiter
+from .retry import RetryPolicy, CircuitBreaker
+from .stream import IdleTimeout, AdaptiveTimeout
+from .sync import SyncClient
+from .text import TextSegmenter
+from .exceptions import SPBaseError, APIRequestError, CircuitOpenError, APIResponseError
\ No newline at end of file
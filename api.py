@@ -5,20 +5,40 @@ Do it.
 """
 
 # import modules and packages
-import json
+import io
+import os
+import re
 import asyncio
 import aiohttp
+import binascii
+import speechapi.asr
+import speechapi.audio
+import speechapi.cache
+import speechapi.client
+import speechapi.jsonlib
+import speechapi.metrics
+import speechapi.ratelimit
+import speechapi.retry
 import speechapi.session
+import speechapi.stream
+import speechapi.text
 import speechapi.tts
+import speechapi.wav
 
 from binascii import a2b_base64
 from threading import Timer
+from urllib.parse import urlsplit
+from collections import OrderedDict
 from speechapi.exceptions import *
 
-async def _get_api_response(url, http_method, req=None, headers=None, json_serialize=None, ok_statuses=None):
+async def _get_api_response(url, http_method, req=None, headers=None, json_serialize=None, ok_statuses=None, client=None, read=None, body=None, idempotent=None, session=None, domain_id=None):
 	"""
 	Return response from url.
 	
+	Failed requests are repeated according to retry policy of client,
+	requests to host are failed fast while circuit breaker of client is open
+	and every attempt waits for permission of rate limiter of client.
+	
 	:param str url:
 	    Url.
 		
@@ -33,52 +53,137 @@ async def _get_api_response(url, http_method, req=None, headers=None, json_seria
 		
 	:keyword function json_serialize:
 	    Function that serialize json for requests with this data.
-	    If it is None that means no serialize.
+	    If it is None then current JSON backend used.
 		
 	:keyword list or tuple ok_statuses:
 	    List of response statuses that must be detected as ok.
 		If it is None then status 200 used as default.
 		
-	:return str:
+	:keyword HttpClient client:
+	    Pooled HTTP client. If it is None then default shared client used.
+		
+	:keyword function read:
+	    Coroutine function that takes ok response and returns result.
+	    If it is None then response body returned.
+	    Errors of reading are not retried, because result may be partially written.
+		
+	:keyword bytes or function body:
+	    Raw request body or function that returns async iterable of body chunks.
+	    It is used if ``req`` is None. Function is called for every attempt.
+		
+	:keyword bool idempotent:
+	    True if request may be repeated safely.
+	    If it is None then HTTP method decides.
+		
+	:keyword _Session session:
+	    SpeechPro session that request is sent for. It is used by rate limiter of client.
+		
+	:keyword int domain_id:
+	    Domain ID that request is sent for. If it is None, domain of session used.
+		
+	:return bytes:
+	
+	:except APIRequestError:
+	    If has some problems with request. Error has ``attempts`` field.
 	
-	:except TypeError:
-	    If has some problems with request.
+	:except CircuitOpenError:
+	    If circuit breaker of api host is open.
 	"""
-	async with aiohttp.ClientSession(json_serialize=json_serialize) as requests:
-		async with getattr(requests, http_method.lower())(url, json=req, headers=headers) as resp:
-			if not isinstance(ok_statuses, (list, tuple)): ok_statuses = [200]
+	if client is None: client = speechapi.client._get_default_client()
+	if not isinstance(ok_statuses, (list, tuple)): ok_statuses = [200]
+	
+	data = None
+	if req is not None:
+		data = (json_serialize or speechapi.jsonlib.dumps)(req)
+		headers = dict(headers or {})
+		if not any(key.lower() == "content-type" for key in headers):
+			headers["content-type"] = "application/json"
+	
+	http_method = http_method.upper()
+	host = urlsplit(url).netloc
+	policy, breaker, limiter = client.retry, client.breaker, client.limiter
+	requests = await client.get_session()
+	attempt = 0
+	while True:
+		attempt += 1
+		probe = False
+		if breaker is not None:
+			try:
+				probe = breaker.check(host)
+			except CircuitOpenError as ex:
+				ex.attempts = attempt - 1
+				raise
+		
+		connect_error = False
+		try:
+			try:
+				async with speechapi.ratelimit._acquire(limiter, session, domain_id), requests.request(http_method, url, data=data if req is not None else (body() if callable(body) else body), headers=headers) as resp:
+					if resp.status in ok_statuses:
+						if read is None:
+							result = await resp.read()
+						else:
+							try:
+								result = await read(resp)
+							except (aiohttp.ClientError, asyncio.TimeoutError) as ex:
+								if breaker is not None: breaker.failure(host)
+								raise _connection_error(ex, attempts=attempt) from ex
+						if breaker is not None: breaker.success(host)
+						return result
+					error = await _api_error(resp)
+			except (aiohttp.ClientError, asyncio.TimeoutError) as ex:
+				connect_error = isinstance(ex, aiohttp.ClientConnectorError)
+				error = _connection_error(ex)
+				error.__cause__ = ex
 			
-			if resp.status in ok_statuses:
-				return await resp.text()
-			else:
-				await _raise_for_api(resp)
+			if breaker is not None:
+				if error.status is None or error.status >= 500: breaker.failure(host)
+				else: breaker.success(host)
+		finally:
+			# probe may be cancelled or fail with other error, so next request must probe again
+			if probe: breaker.release(host)
+		
+		delay = policy.delay(attempt, error, http_method, idempotent=idempotent, connect_error=connect_error)
+		if delay is None:
+			error.attempts = attempt
+			raise error
+		if client.metrics is not None:
+			client.metrics.increment("http.retries", tags={"endpoint": speechapi.metrics._endpoint(http_method, url)})
+		await asyncio.sleep(delay)
 
-async def _raise_for_api(resp):
+def _connection_error(ex, **kwargs):
 	"""
-	Raise exception for SpeechPro API.
+	Return API exception for connection error.
+	
+	:param Exception ex:
+	    Connection error or timeout.
+		
+	:return APIRequestError:
+	"""
+	return APIRequestError("Some problems with connection to api: %s" % (str(ex) or ex.__class__.__name__), **kwargs)
+
+async def _api_error(resp):
+	"""
+	Return exception for SpeechPro API error response.
 	
 	:param aiohttp.ClientResponse resp:
 		API response.
 	
-	:return None:
-	
-	:except APIRequestError:
-		If some problems with request to api.
+	:return APIRequestError:
 	"""
 	reason = message = ""
 	try:
-		json_resp = await resp.json()
+		json_resp = speechapi.jsonlib.loads(await resp.read())
 		reason, message = json_resp["reason"], json_resp["message"]
 	except Exception as ex:
 		pass
-	finally:
-		raise APIRequestError(
-			"Some problems with request to api. Server status: %d %s. Error description: %s (reason code: %s)" % (resp.status, resp.reason, message, reason), 
-			status=resp.status, 
-			status_text=resp.reason, 
-			api_reason=reason, 
-			api_reason_desc=message
-		)
+	return APIRequestError(
+		"Some problems with request to api. Server status: %d %s. Error description: %s (reason code: %s)" % (resp.status, resp.reason, message, reason), 
+		status=resp.status, 
+		status_text=resp.reason, 
+		api_reason=reason, 
+		api_reason_desc=message, 
+		retry_after=speechapi.retry._parse_retry_after(resp.headers.get("Retry-After"))
+	)
 
 def base64_to_bin(data):
 	"""
@@ -90,6 +195,169 @@ def base64_to_bin(data):
 	:return bytes:
 	"""
 	return a2b_base64(data)
+	
+_DATA_KEY_RE = re.compile(rb'"data"\s*:\s*"')
+_READ_CHUNK_SIZE = 256 * 1024
+
+class _BinarySink(object):
+	"""
+	Destination of binary data.
+	"""
+	
+	def __init__(self, out=None):
+		"""
+		Initialize binary sink.
+		
+		:keyword object out:
+		    Path of file, file object, bytearray or writable memoryview.
+		    If it is None, data is collected to bytes.
+		"""
+		self._out = out
+		self._size = 0
+		self._file = None
+		if out is None:
+			self._file = io.BytesIO()
+		elif isinstance(out, (str, os.PathLike)):
+			self._file = open(out, "wb")
+		elif isinstance(out, memoryview):
+			self._out = out.cast("B")
+			
+	def write(self, data):
+		"""
+		Write data.
+		
+		:param bytes data:
+		    Binary data.
+			
+		:return None:
+		"""
+		if self._file is not None:
+			self._file.write(data)
+		elif isinstance(self._out, bytearray):
+			self._out += data
+		elif isinstance(self._out, memoryview):
+			if self._size + len(data) > len(self._out):
+				raise ValueError("buffer is too small for data")
+			self._out[self._size:self._size + len(data)] = data
+		else:
+			self._out.write(data)
+		self._size += len(data)
+		
+	def close(self):
+		"""
+		Close sink and return result.
+		
+		:return bytes or int:
+		    Collected data if no destination was specified and number of bytes in other case.
+		"""
+		if self._out is None:
+			return self._file.getvalue()
+		if self._file is not None:
+			self._file.close()
+		return self._size
+		
+	def abort(self):
+		"""
+		Close opened file after error.
+		
+		:return None:
+		"""
+		if self._out is not None and self._file is not None:
+			self._file.close()
+
+def _binary_result(data, bin=False, out=None, view=False):
+	"""
+	Return binary data in form requested by caller.
+	
+	:param bytes data:
+	    Binary data.
+		
+	:keyword bool bin:
+	    If it is False, data is returned as base64 string.
+		
+	:keyword object out:
+	    Path of file, file object, bytearray or writable memoryview.
+	    If it is specified, data is written to it and its size is returned.
+		
+	:keyword bool view:
+	    If it is True, memoryview data is returned as is, otherwise as bytes.
+		
+	:return str or bytes or memoryview or int:
+	"""
+	if out is not None:
+		sink = _BinarySink(out)
+		try:
+			sink.write(data)
+		except:
+			sink.abort()
+			raise
+		return sink.close()
+	if bin:
+		return data if view or isinstance(data, bytes) else bytes(data)
+	return binascii.b2a_base64(data, newline=False).decode("ascii")
+
+async def _read_base64_data(resp, out=None):
+	"""
+	Decode base64 value of key ``data`` of JSON api response while it is being read.
+	
+	Only small undecoded tail of base64 is kept in memory.
+	
+	:param aiohttp.ClientResponse resp:
+		API response.
+		
+	:keyword object out:
+	    Path of file, file object, bytearray or writable memoryview.
+	    If it is None, decoded data is returned as bytes.
+		
+	:return bytes or int:
+	    Decoded data or number of decoded bytes if ``out`` is specified.
+		
+	:except APIResponseError:
+	    If key ``data`` is missing in api response or its value is not valid base64.
+	"""
+	sink = _BinarySink(out)
+	try:
+		head, pending, finished = b"", b"", False
+		async for chunk in resp.content.iter_chunked(_READ_CHUNK_SIZE):
+			if finished:
+				# read rest of response so connection can be reused
+				continue
+			if head is not None:
+				head += chunk
+				match = _DATA_KEY_RE.search(head)
+				if match is None:
+					head = head[-64:]
+					continue
+				chunk, head = head[match.end():], None
+			
+			end = chunk.find(b'"')
+			if end >= 0:
+				chunk, finished = chunk[:end], True
+			data = pending + chunk if pending else chunk
+			
+			tail = b""
+			if b"\\" in data:
+				# JSON escapes
+				if data.endswith(b"\\"):
+					data, tail = data[:-1], b"\\"
+				data = data.replace(b"\\/", b"/").replace(b"\\n", b"").replace(b"\\r", b"")
+				
+			size = len(data) - len(data) % 4
+			if size:
+				sink.write(a2b_base64(memoryview(data)[:size]))
+			pending = data[size:] + tail
+			
+		if head is not None:
+			raise APIResponseError("Data is missing in api response", key="data")
+		if pending:
+			sink.write(a2b_base64(pending))
+	except binascii.Error as ex:
+		sink.abort()
+		raise APIResponseError("Data in api response is not valid base64: %s" % ex, key="data")
+	except:
+		sink.abort()
+		raise
+	return sink.close()
 		
 class SessionApi(object):
 	"""
@@ -100,16 +368,33 @@ class SessionApi(object):
 	
 	_api_prefix = "https://cp.speechpro.com/vksession/rest"
 	
-	def __new__(cls):
+	def __new__(cls, *args, **kwargs):
+		if args or kwargs:
+			# configured API doesn't change shared instance
+			return super(SessionApi, cls).__new__(cls)
 		if not hasattr(cls, "_instance"):
 			cls._instance = super(SessionApi, cls).__new__(cls)
 		return cls._instance
 		
-	def __init__(self):
+	def __init__(self, client=None, lazy_status=None):
 		"""
 		Initialize SpeechPro session API.
+		
+		Call without arguments returns instance shared by process, call with
+		arguments creates separate instance.
+		
+		:keyword HttpClient client:
+		    Pooled HTTP client. If it is None then default shared client used.
+			
+		:keyword bool lazy_status:
+		    If it is True, session status is derived from responses of session
+		    creating and deleting without extra status request. Default is False.
 		"""
-		pass
+		if hasattr(self, "_client"):
+			# shared instance is initialized once
+			return
+		self._client      = client if client is not None else speechapi.client._get_default_client()
+		self._lazy_status = bool(lazy_status)
 		
 	def __str__(self):
 		"""
@@ -123,6 +408,45 @@ class SessionApi(object):
 		"""
 		return "%s()" % self.__class__.__name__
 		
+	client = property()
+	lazy_status = property()
+	
+	@client.getter
+	def client(self):
+		"""
+		Return pooled HTTP client.
+		
+		:return HttpClient:
+		"""
+		return self._client
+		
+	@lazy_status.getter
+	def lazy_status(self):
+		"""
+		Return True if session status is not requested after session creating and deleting.
+		
+		:return bool:
+		"""
+		return self._lazy_status
+		
+	@lazy_status.setter
+	def lazy_status(self, value):
+		"""
+		Set lazy session status mode.
+		
+		:param bool value:
+		    Lazy session status mode.
+		"""
+		self._lazy_status = bool(value)
+		
+	async def aclose(self):
+		"""
+		Close pooled HTTP client.
+		
+		:return None:
+		"""
+		await self._client.aclose()
+		
 	async def session_create(self, domain_id, login, password):
 		"""
 		Create SpeechPro session.
@@ -150,11 +474,15 @@ class SessionApi(object):
 				"password": password, 
 			}, 
 			headers={"content-type": "application/json"}, 
-			json_serialize=json.dumps, 
+			client=self._client, 
+			domain_id=domain_id
 		)
 		
-		session = speechapi.session._Session(json.loads(resp))
-		session._is_active = await self.session_status(session)
+		session = speechapi.session._Session(speechapi.jsonlib.loads(resp), domain_id=domain_id)
+		if self._lazy_status:
+			session._set_active(session.session_id != "")
+		else:
+			await self.session_status(session)
 		return session
 			
 	async def session_delete(self, session):
@@ -173,17 +501,26 @@ class SessionApi(object):
 			self._api_prefix + "/session", 
 			"DELETE", 
 			headers={"x-session-id": session.session_id}, 
-			ok_statuses=[200, 204]
+			ok_statuses=[200, 204], 
+			client=self._client, 
+			session=session
 		)
-		session._is_active = await self.session_status(session)
+		if self._lazy_status:
+			session._set_active(False)
+		else:
+			await self.session_status(session)
 		
-	async def session_status(self, session):
+	async def session_status(self, session, ttl=None):
 		"""
 		Check SpeechPro session status.
 		
 		:param _Session session:
 		    SpeechPro session.
 			
+		:keyword float ttl:
+		    If it is not None and session status was checked less than ``ttl``
+		    seconds ago, cached status returned without request to api.
+			
 		:return bool:
 		
 		:except APIRequestError:
@@ -192,15 +529,20 @@ class SessionApi(object):
 		:except APIResponseError:
 		    If key ``is_active`` is missing in api response.
 		"""
+		if ttl is not None and session.status_age is not None and session.status_age < ttl:
+			return session.is_active
+		
 		resp = await _get_api_response(
 			self._api_prefix + "/session", 
 			"GET", 
 			headers={"x-session-id": session.session_id}, 
+			client=self._client, 
+			session=session
 		)
 		
-		json_resp = json.loads(resp)
+		json_resp = speechapi.jsonlib.loads(resp)
 		if "is_active" in json_resp:
-			session._is_active = json_resp["is_active"]
+			session._set_active(json_resp["is_active"])
 			return session.is_active
 		else:
 			raise APIResponseError("Data about session active is missing in api response", key="is_active")
@@ -215,16 +557,49 @@ class TTSApi(object):
 	
 	_api_prefix = "https://cp.speechpro.com/vktts/rest"
 	
-	def __new__(cls):
+	def __new__(cls, *args, **kwargs):
+		if args or kwargs:
+			# configured API doesn't change shared instance
+			return super(TTSApi, cls).__new__(cls)
 		if not hasattr(cls, "_instance"):
 			cls._instance = super(TTSApi, cls).__new__(cls)
 		return cls._instance
 		
-	def __init__(self):
+	def __init__(self, client=None, catalog_cache=None, synthes_cache=None, memory_cache=None):
 		"""
 		Initialize SpeechPro TTS API.
+		
+		Call without arguments returns instance shared by process, call with
+		arguments creates separate instance.
+		
+		:keyword HttpClient client:
+		    Pooled HTTP client. If it is None then default shared client used.
+			
+		:keyword CatalogCache or bool catalog_cache:
+		    Cache of languages and voices. If it is True, CatalogCache that keeps
+		    catalogs for an hour used. If it is False, catalogs are not cached.
+		    By default catalogs are not cached.
+			
+		:keyword SynthesDiskCache or bool synthes_cache:
+		    Persistent cache of synthes results. If it is False, results are
+		    not cached. By default results are not cached.
+			
+		:keyword SynthesMemoryCache or bool memory_cache:
+		    In-memory cache of hot synthes results in front of ``synthes_cache``.
+		    If it is False, results are not cached in memory. By default results
+		    are not cached in memory.
 		"""
-		pass
+		if hasattr(self, "_client"):
+			# shared instance is initialized once
+			return
+		if catalog_cache is True:
+			catalog_cache = speechapi.cache.CatalogCache()
+		self._client        = client if client is not None else speechapi.client._get_default_client()
+		self._catalog_cache = catalog_cache if catalog_cache is not False else None
+		self._synthes_cache = synthes_cache if synthes_cache is not False else None
+		self._memory_cache  = memory_cache if memory_cache is not False else None
+		# futures of stream syntheses being written to cache by key
+		self._streaming     = {}
 		
 	def __str__(self):
 		"""
@@ -237,14 +612,81 @@ class TTSApi(object):
 		Return repr(self).
 		"""
 		return "%s()" % self.__class__.__name__
+		
+	client = property()
+	catalog_cache = property()
+	synthes_cache = property()
+	memory_cache = property()
 	
+	@client.getter
+	def client(self):
+		"""
+		Return pooled HTTP client.
+		
+		:return HttpClient:
+		"""
+		return self._client
+		
+	@catalog_cache.getter
+	def catalog_cache(self):
+		"""
+		Return cache of languages and voices or None if catalogs are not cached.
+		
+		:return CatalogCache or None:
+		"""
+		return self._catalog_cache
+		
+	@synthes_cache.getter
+	def synthes_cache(self):
+		"""
+		Return cache of synthes results or None if results are not cached.
+		
+		:return SynthesDiskCache or None:
+		"""
+		return self._synthes_cache
+		
+	@memory_cache.getter
+	def memory_cache(self):
+		"""
+		Return in-memory cache of synthes results or None if results are not cached in memory.
+		
+		:return SynthesMemoryCache or None:
+		"""
+		return self._memory_cache
+		
+	async def aclose(self):
+		"""
+		Close pooled HTTP client.
+		
+		:return None:
+		"""
+		await self._client.aclose()
+		
+	def invalidate_catalog(self, lang=None):
+		"""
+		Remove cached languages and voices.
+		
+		:keyword str or _Language lang:
+		    SpeechPro language. If it is not None, only voices of this language
+		    are removed, in other case whole catalog is removed.
+			
+		:return None:
+		"""
+		if self._catalog_cache is None:
+			return
+		if lang is None:
+			self._catalog_cache.invalidate()
+		else:
+			lang = lang.name if isinstance(lang, speechapi.tts._Language) else str(lang)
+			self._catalog_cache.invalidate(lambda key: key[0] == "voices" and key[2] == lang)
+		
 	@staticmethod
 	def _getdata(text_response, bin=False):
 		"""
 		Return data from api response by key ``data``.
 		
-		:param str text_response:
-		    API text response.
+		:param bytes or str text_response:
+		    API response.
 			
 		:keyword bool bin:
 		    If it is True, result of synthes will be returns as binary data.
@@ -255,13 +697,13 @@ class TTSApi(object):
 		:except APIResponseError:
 		    If key ``data`` is missing in api response.
 		"""
-		json_resp = json.loads(text_response)
+		json_resp = speechapi.jsonlib.loads(text_response)
 		if "data" in json_resp:
 			return json_resp["data"] if not bin else base64_to_bin(json_resp["data"])
 		else:
 			raise APIResponseError("Data is missing in api response", key="data")
 	
-	async def get_languages(self, session, skip_invalid_langs=False):
+	async def get_languages(self, session, skip_invalid_langs=False, use_cache=True):
 		"""
 		Return SpeechPro available languages.
 		
@@ -271,18 +713,33 @@ class TTSApi(object):
 		:keyword bool skip_invalid_langs:
 		    If it is True, invalid languages will be skipped.
 			
+		:keyword bool use_cache:
+		    If it is True, languages are taken from catalog cache. Every caller
+		    gets its own copy of cached set. Catalogs are cached by domain, so
+		    sessions with unknown domain are not cached.
+			
 		:return _Languages:
 		
 		:except TypeError:
 		    If some problems with request to api.
 		"""
+		if use_cache and self._catalog_cache is not None and session.domain_id is not None:
+			langs = await self._catalog_cache.get(
+				("languages", session.domain_id, skip_invalid_langs), 
+				lambda : self.get_languages(session, skip_invalid_langs=skip_invalid_langs, use_cache=False), 
+				ttl=self._catalog_cache.get_ttl()
+			)
+			return langs.copy()
+		
 		resp = await _get_api_response(
 			self._api_prefix + "/v1/languages", 
 			"GET", 
-			headers={"x-session-id": session.session_id}
+			headers={"x-session-id": session.session_id}, 
+			client=self._client, 
+			session=session
 		)
 		
-		langs = json.loads(resp)
+		langs = speechapi.jsonlib.loads(resp)
 		speechpro_langs = speechapi.tts._LanguagesSet()
 		
 		for idx,lang in enumerate(langs):
@@ -293,7 +750,7 @@ class TTSApi(object):
 					else: raise ex
 		return speechpro_langs
 			
-	async def get_voices(self, session, lang, skip_invalid_voices=False):
+	async def get_voices(self, session, lang, skip_invalid_voices=False, use_cache=True):
 		"""
 		Return SpeechPro available voices for language.
 		
@@ -306,29 +763,45 @@ class TTSApi(object):
 		:keyword bool skip_invalid_voices:
 		    If it is True, invalid voices will be skipped.
 			
+		:keyword bool use_cache:
+		    If it is True, voices are taken from catalog cache. Every caller
+		    gets its own copy of cached set. Catalogs are cached by domain, so
+		    sessions with unknown domain are not cached.
+			
 		:return _Voices:
 		
 		:except TypeError:
 		    If some problems with request to api.
 		"""
+		lang = lang.name if isinstance(lang, speechapi.tts._Language) else str(lang)
+		if use_cache and self._catalog_cache is not None and session.domain_id is not None:
+			voices = await self._catalog_cache.get(
+				("voices", session.domain_id, lang, skip_invalid_voices), 
+				lambda : self.get_voices(session, lang, skip_invalid_voices=skip_invalid_voices, use_cache=False), 
+				ttl=self._catalog_cache.get_ttl(lang)
+			)
+			return voices.copy()
+		
 		resp = await _get_api_response(
-			self._api_prefix + ("/v1/languages/%s/voices" % (lang.name if isinstance(lang, speechapi.tts._Language) else str(lang))), 
+			self._api_prefix + ("/v1/languages/%s/voices" % lang), 
 			"GET", 
-			headers={"x-session-id": session.session_id}
+			headers={"x-session-id": session.session_id}, 
+			client=self._client, 
+			session=session
 		)
 		
-		voices = json.loads(resp)
+		voices = speechapi.jsonlib.loads(resp)
 		speechpro_voices = speechapi.tts._VoicesSet()
 		
 		for idx,voice in enumerate(voices):
 			try:
-				speechpro_voices._add(speechapi.tts._Voice(voice))
+				speechpro_voices._add(speechapi.tts._Voice(voice, language=lang))
 			except Exception as ex:
 					if skip_invalid_voices: print(ex)
 					else: raise ex
 		return speechpro_voices
 			
-	async def package_synthes(self, text, session, voice, bin=False):
+	async def package_synthes(self, text, session, voice, bin=False, out=None, use_cache=True, view=False):
 		"""
 		Package text-to-speech synthes.
 		
@@ -343,9 +816,23 @@ class TTSApi(object):
 			
 		:keyword bool bin:
 		    If it is True, result of synthes will be returns as binary data.
+		    Binary data is decoded while response is being read.
+		    Default is False.
+			
+		:keyword object out:
+		    Path of file, file object, bytearray or writable memoryview where
+		    binary result of synthes is written. If it is specified,
+		    number of written bytes is returned.
+			
+		:keyword bool use_cache:
+		    If it is True and synthes cache is set, result is taken from cache.
+			
+		:keyword bool view:
+		    If it is True and binary result is taken from memory cache,
+		    it is returned as read-only memoryview without copying.
 		    Default is False.
 			
-		:return str or bytes:
+		:return str or bytes or memoryview or int:
 		
 		:except TypeError:
 		    If some problems with request to api.
@@ -353,6 +840,9 @@ class TTSApi(object):
 		:except ValueError:
 		    If key ``data`` is missing in api response.
 		"""
+		if use_cache and (self._memory_cache is not None or self._synthes_cache is not None):
+			return _binary_result(await self._cached_package_synthes(text, session, voice), bin, out, view)
+		
 		resp = await _get_api_response(
 			self._api_prefix + "/v1/synthesize", 
 			"POST", 
@@ -364,10 +854,130 @@ class TTSApi(object):
 				},
 				"audio": "audio/wav", 
 			}, 
-			json_serialize=json.dumps, 
-			headers={"content-type": "application/json", "x-session-id": session.session_id}
+			headers={"content-type": "application/json", "x-session-id": session.session_id}, 
+			client=self._client, 
+			session=session, 
+			idempotent=True, 
+			read=(lambda resp: _read_base64_data(resp, out)) if bin or out is not None else None
 		)
-		return self._getdata(resp, bin=bin)
+		return resp if bin or out is not None else self._getdata(resp)
+	
+	async def _cached_package_synthes(self, text, session, voice):
+		"""
+		Return binary result of package synthes from memory cache, synthes cache or api.
+		
+		:param str text:
+		    Synthesized text.
+			
+		:param _Session session:
+		    SpeechPro session.
+			
+		:param str or _Voice voice:
+		    SpeechPro voice.
+			
+		:return bytes or memoryview:
+		"""
+		voice_name = voice.name if isinstance(voice, speechapi.tts._Voice) else str(voice)
+		if self._memory_cache is not None:
+			memory_key = self._memory_cache.key(voice_name, text, "audio/wav")
+			data = self._memory_cache.get(memory_key)
+			if data is not None:
+				return data
+		
+		data = None
+		if self._synthes_cache is not None:
+			loop = asyncio.get_running_loop()
+			key = self._synthes_cache.key(voice_name, text, "audio/wav")
+			data = await loop.run_in_executor(None, self._synthes_cache.get, key)
+		if data is None:
+			data = await self.package_synthes(text, session, voice, bin=True, use_cache=False)
+			if self._synthes_cache is not None:
+				await loop.run_in_executor(None, self._synthes_cache.put, key, data)
+		
+		if self._memory_cache is not None:
+			data = self._memory_cache.put(memory_key, data)
+		return data
+		
+	async def synthesize_many(self, texts, session, voice, concurrency=8, bin=False, window=256):
+		"""
+		Package text-to-speech synthes of many texts.
+		
+		Results are yielded as soon as they are ready, not in order of texts.
+		Identical texts are synthesized once while they are in progress or
+		among last ``window`` finished texts. Failed synthes does not stop
+		batch, its error is reported in result.
+		
+		:param iterable texts:
+		    Synthesized texts.
+			
+		:param _Session session:
+		    SpeechPro session.
+			
+		:param str or _Voice voice:
+		    SpeechPro voice.
+			
+		:keyword int concurrency:
+		    Max number of simultaneous requests to api.
+		    Texts are taken from iterable only when request may be sent.
+			
+		:keyword bool bin:
+		    If it is True, result of synthes will be returns as binary data.
+		    Default is False.
+			
+		:keyword int window:
+		    Number of last finished results kept for identical texts.
+		    0 means only texts in progress are deduplicated.
+			
+		:return generator of _SynthesResult:
+			
+		:except ValueError:
+		    If concurrency is less than 1.
+		"""
+		if concurrency < 1:
+			raise ValueError("concurrency must be positive, not %r" % concurrency)
+			
+		items = enumerate(texts)
+		# indexes of texts which synthes is in progress and results of last finished texts
+		indexes, done = {}, OrderedDict()
+		results = asyncio.Queue()
+		
+		async def worker():
+			try:
+				for index, text in items:
+					if text in done:
+						done.move_to_end(text)
+						results.put_nowait(speechapi.tts._SynthesResult(index, text, *done[text]))
+					elif text in indexes:
+						indexes[text].append(index)
+					else:
+						indexes[text] = [index]
+						try:
+							result = await self.package_synthes(text, session, voice, bin=bin), None
+						except Exception as ex:
+							result = None, ex
+						if window > 0:
+							done[text] = result
+							if len(done) > window:
+								done.popitem(last=False)
+						for index in indexes.pop(text):
+							results.put_nowait(speechapi.tts._SynthesResult(index, text, *result))
+			finally:
+				results.put_nowait(None)
+				
+		workers = [asyncio.ensure_future(worker()) for _ in range(concurrency)]
+		try:
+			running = len(workers)
+			while running:
+				result = await results.get()
+				if result is None:
+					running -= 1
+				else:
+					yield result
+			# error of texts iterable
+			await asyncio.gather(*workers)
+		finally:
+			for task in workers:
+				task.cancel()
 	
 	async def open_synthes_stream(self, session, voice):
 		"""
@@ -395,9 +1005,10 @@ class TTSApi(object):
 				"audio": "audio/wav"
 			}, 
 			headers={"content-type": "application/json", "x-session-id": session.session_id}, 
-			json_serialize=json.dumps
+			client=self._client, 
+			session=session
 		)
-		return speechapi.session._WsConfiguration(json.loads(resp), session)
+		return speechapi.session._WsConfiguration(speechapi.jsonlib.loads(resp), session, voice=voice)
 		
 	async def close_synthes_stream(self, wsconfig):
 		"""
@@ -411,18 +1022,22 @@ class TTSApi(object):
 		:except TypeError:
 		    If some problems with request to api.
 		"""
+		await wsconfig._close_ws()
 		resp = await _get_api_response(
 			self._api_prefix + "/v1/synthesize/stream", 
 			"DELETE", 
-			headers={"x-session-id": wsconfig.session.session_id, "x-transaction-id": wsconfig.transaction_id}
+			headers={"x-session-id": wsconfig.session.session_id, "x-transaction-id": wsconfig.transaction_id}, 
+			client=self._client, 
+			session=wsconfig.session
 		)
-		json_resp = json.loads(resp)
+		wsconfig._closed = True
+		json_resp = speechapi.jsonlib.loads(resp)
 		if "synthesize_text_size" in json_resp:
 			return json_resp["synthesize_text_size"]
 		else:
 			return None
 	
-	async def stream_synthes(self, text, wsconfig):
+	async def stream_synthes(self, text, wsconfig, segmenter=None, idle_timeout=2, use_cache=True):
 		"""
 		Stream text-to-speech synthes.
 		
@@ -432,64 +1047,545 @@ class TTSApi(object):
 		:param _WsConfiguration wsconfig:
 		    SpeechPro web socket configuration.
 			
+		:keyword function segmenter:
+		    Function that takes text and returns iterable of text chunks that
+		    are sent to api one by one. If it is None, TextSegmenter with
+		    500 characters chunks used.
+			
+		:keyword float or IdleTimeout idle_timeout:
+		    Seconds of silence after all text is sent after which stream is
+		    considered finished, or IdleTimeout (e.g. AdaptiveTimeout) that
+		    computes it. If it is None, stream ends only when server closes it.
+			
+		:keyword bool use_cache:
+		    If it is True and synthes cache is set, result is taken from cache.
+		    Voice of web socket configuration must be known for caching.
+		    Only streams closed by server normally are cached, streams ended
+		    by idle timeout may be truncated.
+			
 		:return generator:
 		
 		:except TypeError:
 		    If some problems with request to api.
-		"""		
-		async with aiohttp.ClientSession() as websockets:
-			async with websockets.ws_connect(wsconfig.url) as ws:
-				# if len(text):
-					# while len(text):
-						# await ws.send_str(text[:3000])
-						# text = text[3000:]
-				# else:
-					# await ws.send_str(text)
-				
-				# loop = asyncio.get_running_loop()
-				
-				# # There are some problems with ending of read data wrom websocket.
-				# # Timer is needed for resolve this problems.
-				# handle = loop.call_later(2, lambda : loop.create_task(ws.close()))
-				
-				# async for msg in ws:
-					# # cancel timer if read data successfully
-					# handle.cancel()
-					# if msg.type == aiohttp.WSMsgType.CLOSING:
-						# break
-					# else:
-						# yield msg.data
-						# # set new timer
-						# handle = loop.call_later(2, lambda : loop.create_task(ws.close()))
-						
-				while len(text):
-					await ws.send_str(text[:500])
-					
-					msg = None
-					try: msg = await ws.receive(timeout=2)
-					except asyncio.exceptions.TimeoutError: pass
-					
-					while msg != None and msg.type not in [aiohttp.WSMsgType.CLOSE, aiohttp.WSMsgType.CLOSING]:
-						yield msg.data
-						try: msg = await ws.receive(timeout=2)
-						except asyncio.exceptions.TimeoutError: break
-					
-					text = text[500:]
-					
-				# while len(text):
-					# await ws.send_str(text[:500])
-					# text = text[500:]
-					
-				# msg = None
-				# try: msg = await ws.receive(timeout=2)
-				# except asyncio.exceptions.TimeoutError: pass
-				
-				# while msg != None and msg.type not in [aiohttp.WSMsgType.CLOSE, aiohttp.WSMsgType.CLOSING]:
-					# yield msg.data
-					# try: msg = await ws.receive(timeout=2)
-					# except asyncio.exceptions.TimeoutError: break
+		"""
+		if not use_cache or self._synthes_cache is None or wsconfig.voice is None:
+			async for chunk in self._stream_synthes(text, wsconfig, segmenter, idle_timeout):
+				yield chunk
+			return
+		
+		loop = asyncio.get_running_loop()
+		key = self._synthes_cache.key(
+			wsconfig.voice.name if isinstance(wsconfig.voice, speechapi.tts._Voice) else str(wsconfig.voice), 
+			text, 
+			"audio/wav;stream"
+		)
+		waited = False
+		while True:
+			cached = await loop.run_in_executor(None, self._synthes_cache.open, key)
+			if cached is not None:
+				try:
+					while True:
+						chunk = await loop.run_in_executor(None, cached.read, _READ_CHUNK_SIZE)
+						if not chunk: break
+						yield chunk
+				finally:
+					cached.close()
+				return
+			
+			# the same text is being streamed by other caller, wait for it once
+			pending = self._streaming.get(key)
+			if pending is None or waited: break
+			await asyncio.shield(pending)
+			waited = True
+		
+		if pending is not None:
+			# result of other caller wasn't cached, don't write it again
+			async for chunk in self._stream_synthes(text, wsconfig, segmenter, idle_timeout):
+				yield chunk
+			return
+		
+		self._streaming[key] = done = loop.create_future()
+		try:
+			writer = await loop.run_in_executor(None, self._synthes_cache.writer, key)
+			ended, buffer = {}, bytearray()
+			try:
+				async for chunk in self._stream_synthes(text, wsconfig, segmenter, idle_timeout, ended):
+					yield chunk
+					# chunks are written in batches, so event loop doesn't wait for disk
+					buffer += chunk
+					if len(buffer) >= _READ_CHUNK_SIZE:
+						await loop.run_in_executor(None, writer.write, bytes(buffer))
+						buffer.clear()
+			except BaseException:
+				writer.abort()
+				raise
+			# stream ended by timeout may be truncated, so it is not cached
+			if ended.get("closed"):
+				if buffer:
+					await loop.run_in_executor(None, writer.write, bytes(buffer))
+				await loop.run_in_executor(None, writer.commit)
+			else:
+				await loop.run_in_executor(None, writer.abort)
+		finally:
+			if self._streaming.get(key) is done: del self._streaming[key]
+			done.set_result(None)
+		
+	async def _stream_synthes(self, text, wsconfig, segmenter, idle_timeout, ended=None):
+		"""
+		Stream text-to-speech synthes through web socket.
+		
+		:param str text:
+		    Synthesized text.
+			
+		:param _WsConfiguration wsconfig:
+		    SpeechPro web socket configuration.
+			
+		:param function segmenter:
+		    Function that splits text into chunks.
+			
+		:param float or IdleTimeout idle_timeout:
+		    End of stream detection.
+			
+		:keyword dict ended:
+		    Dict that gets key ``closed`` set to True if server closed stream normally.
+			
+		:return generator:
+		"""
+		if segmenter is None: segmenter = speechapi.text.TextSegmenter()
+		
+		timer = speechapi.metrics._StreamTimer(self._client.metrics, "synthes")
+		# connection may be pre-opened by stream pool
+		ws = wsconfig._take_ws()
+		preopened = ws is not None
+		if ws is None: ws = await self._client.ws_connect(wsconfig.url, session=wsconfig.session)
+		timer.connected(preopened)
+		async with ws:
+			async def send():
+				for chunk in segmenter(text):
+					await ws.send_str(chunk)
+			
+			# text is sent in separate task, so audio is received while text is sending
+			async for msg in speechapi.stream._duplex(ws, send, speechapi.stream._idle_timeout(idle_timeout), ended):
+				timer.chunk(msg.data)
+				yield msg.data
+			timer.finish()
+			
+			# always close web socket connection
+			if not ws.closed:
+				await ws.close()
 				
-				# always close web socket connection
-				if not ws.closed:
-					await ws.close()
+	async def stream_synthes_to(self, text, wsconfig, out, voice_format=None, **kwargs):
+		"""
+		Stream text-to-speech synthes to WAV file.
+		
+		PCM data is written as soon as it is received, so memory usage
+		doesn't depend on text length. WAV header is patched on completion
+		if destination is seekable.
+		
+		:param str text:
+		    Synthesized text.
+			
+		:param _WsConfiguration wsconfig:
+		    SpeechPro web socket configuration.
+			
+		:param object out:
+		    Path of file, binary file object or bytearray.
+			
+		:keyword int or tuple voice_format:
+		    Sample rate or tuple ``(rate, channels, sampwidth)`` of voice PCM.
+		    If it is None, it is detected by voice of web socket configuration.
+			
+		:keyword kwargs:
+		    Other arguments of ``stream_synthes``.
+			
+		:return int:
+		    Size of PCM data in bytes.
+			
+		:except TypeError:
+		    If some problems with request to api.
+		"""
+		writer = speechapi.wav._WavWriter(out, *speechapi.wav._voice_format(wsconfig.voice, voice_format))
+		try:
+			async for chunk in self.stream_synthes(text, wsconfig, **kwargs):
+				writer.write(chunk)
+		except:
+			writer.abort()
+			raise
+		return writer.close()
 
+class RecognizeApi(object):
+	"""
+	SpeechPro ASR API.
+	
+	API ASR prefix: <https://cp.speechpro.com/vkasr/rest/>
+	"""
+	
+	_api_prefix = "https://cp.speechpro.com/vkasr/rest"
+	
+	def __new__(cls, *args, **kwargs):
+		if args or kwargs:
+			# configured API doesn't change shared instance
+			return super(RecognizeApi, cls).__new__(cls)
+		if not hasattr(cls, "_instance"):
+			cls._instance = super(RecognizeApi, cls).__new__(cls)
+		return cls._instance
+		
+	def __init__(self, client=None):
+		"""
+		Initialize SpeechPro ASR API.
+		
+		Call without arguments returns instance shared by process, call with
+		arguments creates separate instance.
+		
+		:keyword HttpClient client:
+		    Pooled HTTP client. If it is None then default shared client used.
+		"""
+		if hasattr(self, "_client"):
+			# shared instance is initialized once
+			return
+		self._client = client if client is not None else speechapi.client._get_default_client()
+		
+	def __str__(self):
+		"""
+		Return str(self).
+		"""
+		return '<%s api="%s">' % (self.__class__.__name__, self._api_prefix)
+		
+	def __repr__(self):
+		"""
+		Return repr(self).
+		"""
+		return "%s()" % self.__class__.__name__
+		
+	client = property()
+	
+	@client.getter
+	def client(self):
+		"""
+		Return pooled HTTP client.
+		
+		:return HttpClient:
+		"""
+		return self._client
+		
+	async def aclose(self):
+		"""
+		Close pooled HTTP client.
+		
+		:return None:
+		"""
+		await self._client.aclose()
+		
+	async def get_available_packages(self, session):
+		"""
+		Return ASR packages available for session.
+		
+		:param _Session session:
+		    SpeechPro session.
+			
+		:return list:
+		    API JSON response with packages.
+			
+		:except APIRequestError:
+		    If some problems with request to api.
+		"""
+		resp = await _get_api_response(
+			self._api_prefix + "/v1/packages/available", 
+			"GET", 
+			headers={"x-session-id": session.session_id}, 
+			client=self._client, 
+			session=session
+		)
+		return speechapi.jsonlib.loads(resp)
+		
+	async def load_package(self, session, package_id):
+		"""
+		Load ASR package for session.
+		
+		:param _Session session:
+		    SpeechPro session.
+			
+		:param str package_id:
+		    ASR package id.
+			
+		:return bytes:
+		    API response.
+			
+		:except APIRequestError:
+		    If some problems with request to api.
+		"""
+		return await _get_api_response(
+			self._api_prefix + "/v1/packages/%s/load" % package_id, 
+			"GET", 
+			headers={"x-session-id": session.session_id}, 
+			client=self._client, 
+			session=session
+		)
+		
+	async def unload_package(self, session, package_id):
+		"""
+		Unload ASR package for session.
+		
+		:param _Session session:
+		    SpeechPro session.
+			
+		:param str package_id:
+		    ASR package id.
+			
+		:return bytes:
+		    API response.
+			
+		:except APIRequestError:
+		    If some problems with request to api.
+		"""
+		return await _get_api_response(
+			self._api_prefix + "/v1/packages/%s/unload" % package_id, 
+			"GET", 
+			headers={"x-session-id": session.session_id}, 
+			client=self._client, 
+			session=session
+		)
+		
+	async def _recognize(self, path, req, audio, session):
+		"""
+		Send recognition request with audio data encoded to base64 while request is sent.
+		
+		:param str path:
+		    API path.
+			
+		:param dict req:
+		    Request data with ``speechapi.audio._DATA_PLACEHOLDER`` in place of audio data.
+			
+		:param object audio:
+		    Path of audio file, binary file object or bytes-like object.
+			
+		:param _Session session:
+		    SpeechPro session.
+			
+		:return dict or list:
+		"""
+		body = speechapi.audio._Base64JsonBody(speechapi.jsonlib.dumps(req), audio)
+		resp = await _get_api_response(
+			self._api_prefix + path, 
+			"POST", 
+			headers={
+				"content-type": "application/json", 
+				"content-length": str(body.size()), 
+				"x-session-id": session.session_id
+			}, 
+			client=self._client, 
+			session=session, 
+			idempotent=True, 
+			body=body
+		)
+		return speechapi.jsonlib.loads(resp)
+		
+	async def recognize(self, audio, session, package_id, audio_mime="audio/wav"):
+		"""
+		Offline speech recognition.
+		
+		Audio files are memory-mapped and encoded to base64 by chunks while
+		request is sent, so audio is never held in memory as a whole.
+		
+		:param object audio:
+		    Path of audio file, binary file object or bytes-like object.
+			
+		:param _Session session:
+		    SpeechPro session.
+			
+		:param str package_id:
+		    ASR package id.
+			
+		:keyword str audio_mime:
+		    Audio mime.
+			
+		:return dict:
+		    API JSON response with recognized text.
+			
+		:except APIRequestError:
+		    If some problems with request to api.
+		"""
+		return await self._recognize(
+			"/v1/recognize", 
+			{
+				"audio": {
+					"data": speechapi.audio._DATA_PLACEHOLDER, 
+					"mime": audio_mime, 
+				}, 
+				"package_id": package_id
+			}, 
+			audio, 
+			session
+		)
+		
+	async def recognize_words(self, audio, session, package_id, audio_mime="audio/wav"):
+		"""
+		Offline speech recognition with words timings.
+		
+		:param object audio:
+		    Path of audio file, binary file object or bytes-like object.
+			
+		:param _Session session:
+		    SpeechPro session.
+			
+		:param str package_id:
+		    ASR package id.
+			
+		:keyword str audio_mime:
+		    Audio mime.
+			
+		:return list:
+		    API JSON response with recognized words.
+			
+		:except APIRequestError:
+		    If some problems with request to api.
+		"""
+		return await self._recognize(
+			"/v1/recognize/words", 
+			{
+				"audio": {
+					"data": speechapi.audio._DATA_PLACEHOLDER, 
+					"mime": audio_mime, 
+				}, 
+				"package_id": package_id
+			}, 
+			audio, 
+			session
+		)
+		
+	async def recognize_advanced(self, audio, session, package_id, channels=(0,)):
+		"""
+		Offline speech recognition of multichannel audio.
+		
+		:param object audio:
+		    Path of audio file, binary file object or bytes-like object.
+			
+		:param _Session session:
+		    SpeechPro session.
+			
+		:param str package_id:
+		    ASR package id.
+			
+		:keyword list or tuple channels:
+		    Recognized channels.
+			
+		:return dict or list:
+		    API JSON response with recognition results by channels.
+			
+		:except APIRequestError:
+		    If some problems with request to api.
+		"""
+		return await self._recognize(
+			"/v1/recognize/advanced", 
+			{
+				"channels": list(channels), 
+				"data": speechapi.audio._DATA_PLACEHOLDER, 
+				"package_id": package_id
+			}, 
+			audio, 
+			session
+		)
+		
+	async def open_recognize_stream(self, session, package_id, audio_mime="audio/pcm16"):
+		"""
+		Open streaming speech recognition.
+		
+		:param _Session session:
+		    SpeechPro session.
+			
+		:param str package_id:
+		    ASR package id.
+			
+		:keyword str audio_mime:
+		    Mime of streamed audio.
+			
+		:return _WsConfiguration:
+		
+		:except APIRequestError:
+		    If some problems with request to api.
+		"""
+		resp = await _get_api_response(
+			self._api_prefix + "/v1/recognize/stream", 
+			"POST", 
+			req={
+				"mime": audio_mime, 
+				"package_id": package_id
+			}, 
+			headers={"content-type": "application/json", "x-session-id": session.session_id}, 
+			client=self._client, 
+			session=session
+		)
+		return speechapi.session._WsConfiguration(speechapi.jsonlib.loads(resp), session, closer=self.close_recognize_stream)
+		
+	async def close_recognize_stream(self, wsconfig):
+		"""
+		Close streaming speech recognition.
+		
+		:param _WsConfiguration wsconfig:
+		    SpeechPro web socket configuration.
+			
+		:return dict:
+		    API JSON response with final recognized text.
+			
+		:except APIRequestError:
+		    If some problems with request to api.
+		"""
+		resp = await _get_api_response(
+			self._api_prefix + "/v1/recognize/stream", 
+			"DELETE", 
+			headers={"x-session-id": wsconfig.session.session_id, "x-transaction-id": wsconfig.transaction_id}, 
+			client=self._client, 
+			session=wsconfig.session
+		)
+		wsconfig._closed = True
+		return speechapi.jsonlib.loads(resp)
+		
+	async def stream_recognize(self, source, wsconfig, frame_size=8192, idle_timeout=2, close=True):
+		"""
+		Streaming speech recognition.
+		
+		Audio is sent in separate task while hypotheses are received, partial
+		hypotheses are yielded as soon as they arrive.
+		
+		:param object source:
+		    Async iterable or iterable of PCM frames (e.g. microphone or RTP bridge),
+		    path of audio file, binary file object or bytes-like object.
+			
+		:param _WsConfiguration wsconfig:
+		    SpeechPro web socket configuration.
+			
+		:keyword int frame_size:
+		    Size of frames in bytes that files and bytes-like objects are sent by.
+			
+		:keyword float or IdleTimeout idle_timeout:
+		    Seconds of silence after all audio is sent after which stream is
+		    considered finished, or IdleTimeout that computes it.
+		    If it is None, stream ends only when server closes it.
+			
+		:keyword bool close:
+		    If it is True, recognition transaction is closed after streaming and
+		    final hypothesis is yielded last.
+			
+		:return generator of _Hypothesis:
+		
+		:except APIRequestError:
+		    If some problems with request to api.
+		"""
+		timer = speechapi.metrics._StreamTimer(self._client.metrics, "recognize")
+		async with await self._client.ws_connect(wsconfig.url, session=wsconfig.session) as ws:
+			timer.connected()
+			async def send():
+				async for frame in speechapi.audio._iter_frames(source, frame_size):
+					await ws.send_bytes(frame)
+			
+			async for msg in speechapi.stream._duplex(ws, send, speechapi.stream._idle_timeout(idle_timeout)):
+				timer.chunk(msg.data)
+				yield speechapi.asr._Hypothesis._from_message(msg.data)
+			timer.finish()
+			
+			# always close web socket connection
+			if not ws.closed:
+				await ws.close()
+		
+		if close:
+			yield speechapi.asr._Hypothesis._from_message(await self.close_recognize_stream(wsconfig), final=True)
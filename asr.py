@@ -0,0 +1,357 @@
+#!/usr/bin/env python
+
+"""
+Do it.
+"""
+
+# define metadata
+__all__ = ["PackageManager"]
+
+# import modules and packages
+import asyncio
+import aiohttp
+import speechapi
+import speechapi.cache
+import speechapi.jsonlib
+
+from contextlib import asynccontextmanager
+from speechapi.exceptions import *
+
+class _Hypothesis(object):
+	"""
+	Hypothesis of streaming speech recognition.
+	"""
+
+	__slots__ = ("_text", "_final", "_raw")
+
+	def __init__(self, text, final=False, raw=None):
+		"""
+		Initialize hypothesis.
+
+		:param str text:
+		    Recognized text.
+
+		:keyword bool final:
+		    True for final result of recognition, False for partial result.
+
+		:keyword object raw:
+		    API message that hypothesis was made from.
+		"""
+		self._text  = text
+		self._final = final
+		self._raw   = raw
+
+	@classmethod
+	def _from_message(cls, message, final=False):
+		"""
+		Return hypothesis made from api message.
+
+		:param str or bytes or dict message:
+		    Web socket message or API JSON response.
+
+		:keyword bool final:
+		    True for final result of recognition.
+
+		:return _Hypothesis:
+		"""
+		data = message
+		if isinstance(data, (str, bytes)):
+			try:
+				data = speechapi.jsonlib.loads(data)
+			except ValueError:
+				text = data if isinstance(data, str) else data.decode("utf-8", "replace")
+				return cls(text, final, message)
+		if isinstance(data, dict):
+			return cls(data.get("text", ""), final, data)
+		return cls(message if isinstance(message, str) else str(data), final, data)
+
+	def __str__(self):
+		"""
+		Return str(self).
+		"""
+		return self._text
+
+	def __repr__(self):
+		"""
+		Return repr(self).
+		"""
+		return "%s(%r, final=%r)" % (self.__class__.__name__, self._text, self._final)
+
+	text = property()
+	final = property()
+	raw = property()
+
+	@text.getter
+	def text(self):
+		"""
+		Return recognized text.
+
+		:return str:
+		"""
+		return self._text
+
+	@final.getter
+	def final(self):
+		"""
+		Return True if it is final result of recognition.
+
+		:return bool:
+		"""
+		return self._final
+
+	@raw.getter
+	def raw(self):
+		"""
+		Return API message that hypothesis was made from.
+
+		:return object:
+		"""
+		return self._raw
+
+class _PackageState(object):
+	"""
+	State of ASR package loaded for session.
+	"""
+
+	__slots__ = ("session", "refs", "task", "timer")
+
+	def __init__(self, session):
+		self.session = session
+		self.refs    = 0
+		self.task    = None
+		self.timer   = None
+
+class PackageManager(object):
+	"""
+	Reference-counted manager of ASR packages.
+
+	Package is loaded once per session on first use and shared by concurrent
+	users. When last user releases it, package stays loaded for
+	``idle_timeout`` seconds, so following requests don't pay load latency.
+	"""
+
+	def __init__(self, recapi=None, idle_timeout=60, catalog_cache=None):
+		"""
+		Initialize package manager.
+
+		:keyword RecognizeApi recapi:
+		    ASR API. If it is None, default RecognizeApi used.
+
+		:keyword float idle_timeout:
+		    Seconds after last release after which package is unloaded.
+		    If it is None, packages are unloaded only on closing.
+
+		:keyword CatalogCache catalog_cache:
+		    Cache of available packages. If it is None, new CatalogCache used.
+		"""
+		self._recapi        = recapi if recapi is not None else speechapi.RecognizeApi()
+		self._idle_timeout  = idle_timeout
+		self._catalog_cache = catalog_cache if catalog_cache is not None else speechapi.cache.CatalogCache()
+		self._packages      = {}
+		self._unloading     = {}
+
+	def __str__(self):
+		"""
+		Return str(self).
+		"""
+		return '<%s packages=%d idle_timeout=%r>' % (self.__class__.__name__, len(self), self._idle_timeout)
+
+	def __repr__(self):
+		"""
+		Return repr(self).
+		"""
+		return "%s(idle_timeout=%r)" % (self.__class__.__name__, self._idle_timeout)
+
+	def __len__(self):
+		"""
+		Return number of loaded or loading packages.
+		"""
+		return len(self._packages)
+
+	async def __aenter__(self):
+		"""
+		Return self.
+		"""
+		return self
+
+	async def __aexit__(self, ex_type, ex_val, ex_traceback):
+		"""
+		Close self.
+		"""
+		await self.close()
+
+	async def get_available_packages(self, session, use_cache=True):
+		"""
+		Return ASR packages available for session.
+
+		:param _Session session:
+		    SpeechPro session.
+
+		:keyword bool use_cache:
+		    If it is True, packages are taken from catalog cache.
+		    Packages of session without domain are never cached.
+
+		:return list:
+
+		:except APIRequestError:
+		    If some problems with request to api.
+		"""
+		if not use_cache or session.domain_id is None:
+			# sessions of unknown domain may see different packages
+			return await self._recapi.get_available_packages(session)
+		return await self._catalog_cache.get(
+			("packages", session.domain_id), 
+			lambda : self._recapi.get_available_packages(session)
+		)
+
+	def refs(self, session, package_id):
+		"""
+		Return number of current users of package.
+
+		:param _Session session:
+		    SpeechPro session.
+
+		:param str package_id:
+		    ASR package id.
+
+		:return int:
+		"""
+		state = self._packages.get((session.session_id, package_id))
+		return state.refs if state is not None else 0
+
+	@asynccontextmanager
+	async def acquire(self, session, package_id):
+		"""
+		Return context manager that loads package if needed and releases it on exit.
+
+		:param _Session session:
+		    SpeechPro session.
+
+		:param str package_id:
+		    ASR package id.
+
+		:return str:
+		    Package id.
+
+		:except APIRequestError:
+		    If package can't be loaded.
+		"""
+		key = (session.session_id, package_id)
+		await self._retain(key, session)
+		try:
+			yield package_id
+		finally:
+			self._release(key)
+
+	async def close(self):
+		"""
+		Unload all packages.
+
+		:return None:
+		"""
+		for key, state in list(self._packages.items()):
+			if state.timer is not None:
+				state.timer.cancel()
+			self._expire(key, force=True)
+		if self._unloading:
+			await asyncio.gather(*self._unloading.values(), return_exceptions=True)
+
+	async def _retain(self, key, session):
+		"""
+		Add user of package and wait while package is loaded.
+
+		:param tuple key:
+		    Session id and package id.
+
+		:param _Session session:
+		    SpeechPro session.
+
+		:return None:
+		"""
+		unloading = self._unloading.get(key)
+		if unloading is not None:
+			# package can't be loaded again before it's unloaded
+			await asyncio.wait([unloading])
+
+		state = self._packages.get(key)
+		if state is None:
+			state = self._packages[key] = _PackageState(session)
+		state.refs += 1
+		if state.timer is not None:
+			state.timer.cancel()
+			state.timer = None
+
+		try:
+			if state.task is None:
+				state.task = asyncio.ensure_future(self._recapi.load_package(session, key[1]))
+			await asyncio.shield(state.task)
+		except BaseException:
+			task = state.task
+			if task is not None and task.done() and (task.cancelled() or task.exception() is not None):
+				# next user tries to load package again
+				state.task = None
+			self._release(key)
+			raise
+
+	def _release(self, key):
+		"""
+		Remove user of package and schedule unloading if it was last one.
+
+		:param tuple key:
+		    Session id and package id.
+
+		:return None:
+		"""
+		state = self._packages.get(key)
+		if state is None:
+			return
+		state.refs -= 1
+		if state.refs > 0:
+			return
+		if state.task is None:
+			del self._packages[key]
+		elif self._idle_timeout is not None:
+			loop = asyncio.get_event_loop()
+			state.timer = loop.call_later(self._idle_timeout, self._expire, key)
+
+	def _expire(self, key, force=False):
+		"""
+		Start unloading of package that is not used.
+
+		:param tuple key:
+		    Session id and package id.
+
+		:keyword bool force:
+		    If it is True, package is unloaded even if it's used.
+
+		:return None:
+		"""
+		state = self._packages.get(key)
+		if state is None or (state.refs and not force):
+			return
+		del self._packages[key]
+		if state.task is None:
+			return
+		self._unloading[key] = asyncio.ensure_future(self._unload(state, key))
+
+	async def _unload(self, state, key):
+		"""
+		Unload package after its loading is finished.
+
+		:param _PackageState state:
+		    State of package.
+
+		:param tuple key:
+		    Session id and package id.
+
+		:return None:
+		"""
+		try:
+			await state.task
+			await self._recapi.unload_package(state.session, key[1])
+		except (SPBaseError, aiohttp.ClientError, OSError, asyncio.TimeoutError):
+			# package was not loaded, session is already expired or server is unavailable
+			pass
+		finally:
+			if self._unloading.get(key) is asyncio.current_task():
+				del self._unloading[key]
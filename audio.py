@@ -0,0 +1,205 @@
+#!/usr/bin/env python
+
+"""
+Do it.
+"""
+
+# import modules and packages
+import io
+import os
+import mmap
+import stat
+
+from binascii import b2a_base64
+
+# multiple of 3, so base64 of chunks may be concatenated
+_BASE64_CHUNK_SIZE = 3 * 64 * 1024
+# placeholder of audio data in serialized JSON request
+_DATA_PLACEHOLDER = "@@speechapi-audio-data@@"
+
+def _regular_file(audio):
+	"""
+	Return True if audio is file object of regular file, so it may be memory-mapped.
+
+	:param object audio:
+	    File object.
+
+	:return bool:
+	"""
+	try:
+		return stat.S_ISREG(os.fstat(audio.fileno()).st_mode)
+	except (AttributeError, OSError, ValueError, io.UnsupportedOperation):
+		return False
+
+def _replayable(audio):
+	"""
+	Return audio that may be read many times with the same result.
+
+	Paths, bytes-like objects and regular files are returned as is, because
+	they are read without moving file position. Other file objects (pipes,
+	sockets, file-like objects) are read once.
+
+	:param object audio:
+	    Path of audio file, binary file object or bytes-like object.
+
+	:return object:
+	"""
+	if isinstance(audio, (str, os.PathLike, bytes, bytearray, memoryview, mmap.mmap, io.BytesIO)) or _regular_file(audio):
+		return audio
+	return audio.read()
+
+class _AudioSource(object):
+	"""
+	Read-only buffer of audio data from path, file object or bytes.
+
+	Files are memory-mapped, so audio isn't read into memory as a whole.
+	"""
+
+	def __init__(self, audio):
+		"""
+		Initialize audio source.
+
+		:param object audio:
+		    Path of audio file, binary file object or bytes-like object.
+		"""
+		self._audio = audio
+		self._file  = None
+		self._mmap  = None
+		self._view  = None
+
+	def __enter__(self):
+		"""
+		Return memoryview of audio data.
+		"""
+		audio = self._audio
+		if isinstance(audio, (str, os.PathLike)):
+			audio = self._file = open(audio, "rb")
+
+		if isinstance(audio, (bytes, bytearray, memoryview, mmap.mmap)):
+			self._view = memoryview(audio).cast("B")
+		elif isinstance(audio, io.BytesIO):
+			self._view = memoryview(audio.getvalue())[audio.tell():]
+		elif _regular_file(audio):
+			fileno = audio.fileno()
+			position = audio.tell()
+			if os.fstat(fileno).st_size > position:
+				self._mmap = mmap.mmap(fileno, 0, access=mmap.ACCESS_READ)
+				self._view = memoryview(self._mmap)[position:]
+			else:
+				self._view = memoryview(b"")
+		else:
+			# pipes, sockets and file-like objects can't be mapped
+			self._view = memoryview(audio.read())
+		return self._view
+
+	def __exit__(self, ex_type, ex_val, ex_traceback):
+		"""
+		Release buffer and close file if it was opened by source.
+		"""
+		try:
+			if self._view is not None:
+				self._view.release()
+				self._view = None
+			if self._mmap is not None:
+				self._mmap.close()
+				self._mmap = None
+		finally:
+			if self._file is not None:
+				self._file.close()
+				self._file = None
+
+def _base64_size(size):
+	"""
+	Return size of base64 of data.
+
+	:param int size:
+	    Size of data in bytes.
+
+	:return int:
+	"""
+	return (size + 2) // 3 * 4
+
+def _iter_base64(view):
+	"""
+	Return generator of base64 chunks of data.
+
+	:param memoryview view:
+	    Data.
+
+	:return generator of bytes:
+	"""
+	for offset in range(0, len(view), _BASE64_CHUNK_SIZE):
+		yield b2a_base64(view[offset:offset + _BASE64_CHUNK_SIZE], newline=False)
+
+class _Base64JsonBody(object):
+	"""
+	JSON request body with audio data encoded to base64 while body is sent.
+
+	Body is created from JSON serialized with ``_DATA_PLACEHOLDER`` string
+	in place of audio data. Every call of object returns new body stream,
+	so request can be repeated. Streams that can't be re-read are read once
+	on creation, so size and every body stream see the same data.
+	"""
+
+	def __init__(self, json_data, audio):
+		"""
+		Initialize request body.
+
+		:param bytes json_data:
+		    Serialized JSON with placeholder of audio data.
+
+		:param object audio:
+		    Path of audio file, binary file object or bytes-like object.
+		"""
+		self._prefix, self._suffix = json_data.split(_DATA_PLACEHOLDER.encode("ascii"), 1)
+		self._audio = _replayable(audio)
+
+	async def __call__(self):
+		"""
+		Return async generator of body chunks.
+		"""
+		yield self._prefix
+		with _AudioSource(self._audio) as view:
+			for chunk in _iter_base64(view):
+				yield chunk
+		yield self._suffix
+
+	def size(self):
+		"""
+		Return size of body in bytes.
+
+		:return int:
+		"""
+		with _AudioSource(self._audio) as view:
+			return len(self._prefix) + _base64_size(len(view)) + len(self._suffix)
+
+async def _iter_frames(source, frame_size):
+	"""
+	Return async generator of audio frames.
+
+	:param object source:
+	    Async iterable or iterable of frames, path of audio file,
+	    binary file object or bytes-like object.
+
+	:param int frame_size:
+	    Size of frames in bytes for files and bytes-like objects.
+
+	:return generator of bytes-like:
+	"""
+	if hasattr(source, "__aiter__"):
+		async for frame in source:
+			yield frame
+	elif hasattr(source, "read") and not isinstance(source, io.BytesIO) and not _regular_file(source):
+		# pipes and sockets are sent as soon as frames are read
+		while True:
+			frame = source.read(frame_size)
+			if not frame: break
+			yield frame
+	elif isinstance(source, (str, os.PathLike, bytes, bytearray, memoryview, mmap.mmap)) or hasattr(source, "read"):
+		with _AudioSource(source) as view:
+			for offset in range(0, len(view), frame_size):
+				# copy, so no frame keeps mapped file exported after source is closed
+				yield bytes(view[offset:offset + frame_size])
+	else:
+		for frame in source:
+			yield frame
@@ -0,0 +1,230 @@
+#!/usr/bin/env python
+
+"""
+Do it.
+"""
+
+# define metadata
+__all__ = ["build_bundle", "PromptBundle"]
+
+# import modules and packages
+import os
+import mmap
+import struct
+import tempfile
+import speechapi
+import speechapi.jsonlib
+import speechapi.tts
+
+from speechapi.exceptions import *
+
+_MAGIC = b"SPBUNDL1"
+# magic, index offset, index size
+_HEADER = struct.Struct("<8sQQ")
+
+def _prompt_key(voice, text):
+	"""
+	Return default key of prompt.
+
+	:param str voice:
+	    Voice name.
+
+	:param str text:
+	    Prompt text.
+
+	:return str:
+	"""
+	return "%s:%s" % (voice, text)
+
+async def build_bundle(path, prompts, session, ttsapi=None, concurrency=8):
+	"""
+	Pre-render prompts with package synthes into one indexed bundle file.
+
+	:param str path:
+	    Path of bundle file. File is replaced atomically when bundle is ready.
+
+	:param iterable prompts:
+	    Tuples ``(key, voice, text)`` or ``(voice, text)``. In second case
+	    key is ``"voice:text"``.
+
+	:param _Session session:
+	    SpeechPro session.
+
+	:keyword TTSApi ttsapi:
+	    TTS API. If it is None, default TTSApi used.
+
+	:keyword int concurrency:
+	    Max number of simultaneous requests to api.
+
+	:return int:
+	    Number of prompts in bundle.
+
+	:except SPBaseError:
+	    If some prompt can't be synthesized.
+	"""
+	if ttsapi is None: ttsapi = speechapi.TTSApi()
+
+	# keys of every text by voice
+	voices = {}
+	for prompt in prompts:
+		if len(prompt) == 2:
+			voice, text = prompt
+			voice = voice.name if isinstance(voice, speechapi.tts._Voice) else str(voice)
+			key = _prompt_key(voice, text)
+		else:
+			key, voice, text = prompt
+			voice = voice.name if isinstance(voice, speechapi.tts._Voice) else str(voice)
+		voices.setdefault(voice, {}).setdefault(text, []).append(key)
+
+	path = os.fspath(path)
+	fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(os.path.abspath(path)), suffix=".tmp")
+	try:
+		index = {}
+		with os.fdopen(fd, "wb") as f:
+			f.write(_HEADER.pack(_MAGIC, 0, 0))
+			offset = _HEADER.size
+			for voice, texts in voices.items():
+				async for result in ttsapi.synthesize_many(list(texts), session, voice, concurrency=concurrency, bin=True):
+					if not result.ok:
+						raise result.error
+					f.write(result.data)
+					for key in texts[result.text]:
+						index[key] = [offset, len(result.data), voice, result.text]
+					offset += len(result.data)
+
+			index_data = speechapi.jsonlib.dumps(index)
+			f.write(index_data)
+			f.seek(0)
+			f.write(_HEADER.pack(_MAGIC, offset, len(index_data)))
+		os.replace(tmp_path, path)
+	except:
+		try:
+			os.remove(tmp_path)
+		except OSError:
+			pass
+		raise
+	return len(index)
+
+class PromptBundle(object):
+	"""
+	Memory-mapped bundle of pre-rendered prompts.
+
+	Prompts are returned as memoryviews of mapped file, so processes that
+	open the same bundle share one page-cached copy of audio.
+	"""
+
+	def __init__(self, path):
+		"""
+		Open bundle.
+
+		:param str path:
+		    Path of bundle file.
+
+		:except APIResponseError:
+		    If file is not prompt bundle.
+		"""
+		self._path = os.fspath(path)
+		with open(self._path, "rb") as f:
+			self._mmap = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+		self._view = memoryview(self._mmap)
+		try:
+			magic, offset, size = _HEADER.unpack_from(self._mmap, 0)
+			if magic != _MAGIC:
+				raise ValueError("bad magic")
+			self._index = speechapi.jsonlib.loads(self._mmap[offset:offset + size])
+		except (ValueError, struct.error) as ex:
+			self.close()
+			raise APIResponseError("%s is not prompt bundle: %s" % (self._path, ex))
+
+	def __str__(self):
+		"""
+		Return str(self).
+		"""
+		return '<%s path="%s" prompts=%d>' % (self.__class__.__name__, self._path, len(self))
+
+	def __repr__(self):
+		"""
+		Return repr(self).
+		"""
+		return "%s(%r)" % (self.__class__.__name__, self._path)
+
+	def __len__(self):
+		"""
+		Return len(self).
+		"""
+		return len(self._index)
+
+	def __contains__(self, key):
+		"""
+		Return true if key in self.
+		"""
+		return key in self._index
+
+	def __iter__(self):
+		"""
+		Return iterator over prompt keys.
+		"""
+		return iter(self._index)
+
+	def __getitem__(self, key):
+		"""
+		Return prompt audio by key.
+		"""
+		offset, size = self._index[key][:2]
+		return self._view[offset:offset + size]
+
+	def __enter__(self):
+		"""
+		Return self.
+		"""
+		return self
+
+	def __exit__(self, ex_type, ex_val, ex_traceback):
+		"""
+		Close self.
+		"""
+		self.close()
+
+	def get(self, key, default=None):
+		"""
+		Return prompt audio by key without copying.
+
+		:param str key:
+		    Prompt key.
+
+		:keyword object default:
+		    Value returned if prompt is missing.
+
+		:return memoryview:
+		"""
+		try:
+			return self[key]
+		except KeyError:
+			return default
+
+	def get_prompt(self, voice, text, default=None):
+		"""
+		Return prompt audio by voice and text without copying.
+
+		:param str or _Voice voice:
+		    SpeechPro voice.
+
+		:param str text:
+		    Prompt text.
+
+		:keyword object default:
+		    Value returned if prompt is missing.
+
+		:return memoryview:
+		"""
+		voice = voice.name if isinstance(voice, speechapi.tts._Voice) else str(voice)
+		return self.get(_prompt_key(voice, text), default)
+
+	def close(self):
+		"""
+		Unmap bundle. All memoryviews of prompts must be released before.
+
+		:return None:
+		"""
+		self._view.release()
+		self._mmap.close()
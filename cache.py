@@ -0,0 +1,630 @@
+#!/usr/bin/env python
+
+"""
+Do it.
+"""
+
+# define metadata
+__all__ = ["CatalogCache", "SynthesDiskCache", "SynthesMemoryCache"]
+
+# import modules and packages
+import os
+import time
+import asyncio
+import hashlib
+import tempfile
+
+from collections import OrderedDict
+
+try:
+	import fcntl
+except ImportError:
+	fcntl = None
+	import msvcrt
+
+class CatalogCache(object):
+	"""
+	Bounded TTL cache of SpeechPro catalogs such as languages and voices.
+
+	Concurrent requests of the same missing entry are coalesced, so only one
+	of them goes to api and others await its result.
+	"""
+
+	def __init__(self, ttl=3600, maxsize=128, ttls=None):
+		"""
+		Initialize catalog cache.
+
+		:keyword float ttl:
+		    Default time in seconds while entry is valid.
+
+		:keyword int maxsize:
+		    Max number of entries. Least recently used entries are evicted first.
+
+		:keyword dict ttls:
+		    Time in seconds while voices of language are valid by language name.
+		    Languages missing here use ``ttl``.
+		"""
+		self._ttl      = ttl
+		self._maxsize  = maxsize
+		self._ttls     = dict(ttls or {})
+		self._entries  = OrderedDict()
+		self._inflight = {}
+
+	def __str__(self):
+		"""
+		Return str(self).
+		"""
+		return '<%s entries=%d maxsize=%d ttl=%r>' % (self.__class__.__name__, len(self), self._maxsize, self._ttl)
+
+	def __repr__(self):
+		"""
+		Return repr(self).
+		"""
+		return "%s(ttl=%r, maxsize=%r, ttls=%r)" % (self.__class__.__name__, self._ttl, self._maxsize, self._ttls)
+
+	def __len__(self):
+		"""
+		Return len(self).
+		"""
+		return len(self._entries)
+
+	def get_ttl(self, lang=None):
+		"""
+		Return time in seconds while catalog entry is valid.
+
+		:keyword str lang:
+		    Language name. If it is None, default ttl returned.
+
+		:return float:
+		"""
+		return self._ttls.get(lang, self._ttl) if lang is not None else self._ttl
+
+	async def get(self, key, fetch, ttl=None):
+		"""
+		Return cached value by key or fetch it.
+
+		:param tuple key:
+		    Entry key.
+
+		:param function fetch:
+		    Coroutine function without arguments that returns value.
+
+		:keyword float ttl:
+		    Time in seconds while fetched value is valid.
+		    If it is None, default ttl used.
+
+		:return object:
+		"""
+		entry = self._entries.get(key)
+		if entry is not None:
+			expires, value = entry
+			if expires > time.monotonic():
+				self._entries.move_to_end(key)
+				return value
+			del self._entries[key]
+
+		task = self._inflight.get(key)
+		if task is None:
+			task = asyncio.ensure_future(fetch())
+			self._inflight[key] = task
+			task.add_done_callback(lambda task: self._store(key, task, self._ttl if ttl is None else ttl))
+		return await asyncio.shield(task)
+
+	def _store(self, key, task, ttl):
+		"""
+		Store result of finished fetch task.
+
+		:param tuple key:
+		    Entry key.
+
+		:param asyncio.Task task:
+		    Finished fetch task.
+
+		:param float ttl:
+		    Time in seconds while value is valid.
+
+		:return None:
+		"""
+		if self._inflight.get(key) is not task:
+			# cache was invalidated while fetching
+			return
+		del self._inflight[key]
+		if task.cancelled() or task.exception() is not None:
+			return
+		self._entries[key] = (time.monotonic() + ttl, task.result())
+		self._entries.move_to_end(key)
+		while len(self._entries) > self._maxsize:
+			self._entries.popitem(last=False)
+
+	def invalidate(self, predicate=None):
+		"""
+		Remove entries from cache.
+
+		:keyword function predicate:
+		    Function that takes entry key and returns True if entry must be removed.
+		    If it is None, all entries are removed.
+
+		:return None:
+		"""
+		if predicate is None:
+			self._entries.clear()
+			self._inflight.clear()
+		else:
+			for key in [key for key in self._entries if predicate(key)]:
+				del self._entries[key]
+			for key in [key for key in self._inflight if predicate(key)]:
+				del self._inflight[key]
+
+class _FileLock(object):
+	"""
+	Exclusive lock between processes based on lock file.
+	"""
+
+	def __init__(self, path):
+		"""
+		Initialize file lock.
+
+		:param str path:
+		    Path of lock file.
+		"""
+		self._path = path
+		self._file = None
+
+	def __enter__(self):
+		"""
+		Acquire lock.
+		"""
+		self._file = open(self._path, "a+b")
+		if fcntl is not None:
+			fcntl.flock(self._file.fileno(), fcntl.LOCK_EX)
+		else:
+			self._file.seek(0)
+			msvcrt.locking(self._file.fileno(), msvcrt.LK_LOCK, 1)
+		return self
+
+	def __exit__(self, ex_type, ex_val, ex_traceback):
+		"""
+		Release lock.
+		"""
+		try:
+			if fcntl is not None:
+				fcntl.flock(self._file.fileno(), fcntl.LOCK_UN)
+			else:
+				self._file.seek(0)
+				msvcrt.locking(self._file.fileno(), msvcrt.LK_UNLCK, 1)
+		finally:
+			self._file.close()
+			self._file = None
+
+class _DiskCacheWriter(object):
+	"""
+	Writer of cache entry that becomes visible only after commit.
+	"""
+
+	def __init__(self, cache, key):
+		"""
+		Initialize cache entry writer.
+
+		:param SynthesDiskCache cache:
+		    Disk cache.
+
+		:param str key:
+		    Entry key.
+		"""
+		self._cache = cache
+		self._key   = key
+		self._size  = 0
+		fd, self._tmp_path = tempfile.mkstemp(dir=cache._dir(key), suffix=".tmp")
+		self._file  = os.fdopen(fd, "wb")
+
+	def write(self, data):
+		"""
+		Write data to entry.
+
+		:param bytes data:
+		    Data.
+
+		:return None:
+		"""
+		self._file.write(data)
+		self._size += len(data)
+
+	def commit(self):
+		"""
+		Atomically publish entry.
+
+		:return None:
+		"""
+		self._file.close()
+		os.replace(self._tmp_path, self._cache._path(self._key))
+		self._cache._added(self._size)
+
+	def abort(self):
+		"""
+		Drop entry.
+
+		:return None:
+		"""
+		self._file.close()
+		try:
+			os.remove(self._tmp_path)
+		except OSError:
+			pass
+
+class SynthesDiskCache(object):
+	"""
+	Persistent content-addressed cache of synthes results.
+
+	Entries are files named by hash of voice, text and audio mime. Files are
+	written atomically, so cache may be shared by several processes. When
+	total size exceeds budget, least recently used entries are deleted.
+	"""
+
+	def __init__(self, path, max_size=1024 ** 3, rescan_every=100):
+		"""
+		Initialize disk cache.
+
+		:param str path:
+		    Cache directory. It is created if it doesn't exist.
+
+		:keyword int max_size:
+		    Size budget in bytes.
+
+		:keyword int rescan_every:
+		    Number of added entries after which real directory size is
+		    recounted, because other processes may add entries too.
+		"""
+		self._root         = os.fspath(path)
+		self._max_size     = max_size
+		self._rescan_every = rescan_every
+		self._added_count  = 0
+		self._lock         = _FileLock(os.path.join(self._root, ".lock"))
+		os.makedirs(self._root, exist_ok=True)
+		self._size         = self._scan()[0]
+
+	def __str__(self):
+		"""
+		Return str(self).
+		"""
+		return '<%s path="%s" size=%d max_size=%d>' % (self.__class__.__name__, self._root, self._size, self._max_size)
+
+	def __repr__(self):
+		"""
+		Return repr(self).
+		"""
+		return "%s(%r, max_size=%r)" % (self.__class__.__name__, self._root, self._max_size)
+
+	@staticmethod
+	def key(voice, text, mime="audio/wav"):
+		"""
+		Return entry key.
+
+		:param str voice:
+		    Voice name.
+
+		:param str text:
+		    Synthesized text.
+
+		:keyword str mime:
+		    Audio mime.
+
+		:return str:
+		"""
+		return hashlib.sha256("\0".join((voice, mime, text)).encode("utf-8")).hexdigest()
+
+	def _dir(self, key):
+		"""
+		Return directory of entry, creating it if needed.
+
+		:param str key:
+		    Entry key.
+
+		:return str:
+		"""
+		path = os.path.join(self._root, key[:2])
+		os.makedirs(path, exist_ok=True)
+		return path
+
+	def _path(self, key):
+		"""
+		Return path of entry file.
+
+		:param str key:
+		    Entry key.
+
+		:return str:
+		"""
+		return os.path.join(self._root, key[:2], key)
+
+	def get(self, key):
+		"""
+		Return entry data or None if entry is missing.
+
+		:param str key:
+		    Entry key.
+
+		:return bytes or None:
+		"""
+		path = self._path(key)
+		try:
+			with open(path, "rb") as f:
+				data = f.read()
+		except OSError:
+			return None
+		self._touch(path)
+		return data
+
+	def open(self, key):
+		"""
+		Return opened entry file or None if entry is missing.
+
+		:param str key:
+		    Entry key.
+
+		:return file or None:
+		"""
+		path = self._path(key)
+		try:
+			f = open(path, "rb")
+		except OSError:
+			return None
+		self._touch(path)
+		return f
+
+	def put(self, key, data):
+		"""
+		Store entry.
+
+		:param str key:
+		    Entry key.
+
+		:param bytes data:
+		    Data.
+
+		:return None:
+		"""
+		writer = self.writer(key)
+		try:
+			writer.write(data)
+		except:
+			writer.abort()
+			raise
+		writer.commit()
+
+	def writer(self, key):
+		"""
+		Return writer of entry. Entry is stored when writer is committed.
+
+		:param str key:
+		    Entry key.
+
+		:return _DiskCacheWriter:
+		"""
+		return _DiskCacheWriter(self, key)
+
+	def clear(self):
+		"""
+		Remove all entries.
+
+		:return None:
+		"""
+		with self._lock:
+			for path, size, mtime in self._scan()[1]:
+				self._remove(path)
+			self._size = 0
+
+	def _touch(self, path):
+		"""
+		Mark entry as recently used.
+
+		:param str path:
+		    Path of entry file.
+
+		:return None:
+		"""
+		try:
+			os.utime(path)
+		except OSError:
+			pass
+
+	def _remove(self, path):
+		"""
+		Remove entry file ignoring errors.
+
+		:param str path:
+		    Path of entry file.
+
+		:return None:
+		"""
+		try:
+			os.remove(path)
+		except OSError:
+			pass
+
+	def _scan(self):
+		"""
+		Return total size and list of ``(path, size, mtime)`` of entries.
+
+		:return tuple:
+		"""
+		total, entries = 0, []
+		for subdir in os.scandir(self._root):
+			if not subdir.is_dir():
+				continue
+			for entry in os.scandir(subdir.path):
+				if entry.name.endswith(".tmp"):
+					continue
+				try:
+					stat = entry.stat()
+				except OSError:
+					continue
+				total += stat.st_size
+				entries.append((entry.path, stat.st_size, stat.st_mtime))
+		return total, entries
+
+	def _added(self, size):
+		"""
+		Account added entry and evict old entries if budget is exceeded.
+
+		:param int size:
+		    Size of added entry.
+
+		:return None:
+		"""
+		self._size += size
+		self._added_count += 1
+		if self._size > self._max_size or self._added_count % self._rescan_every == 0:
+			self._evict()
+
+	def _evict(self):
+		"""
+		Delete least recently used entries until size fits budget.
+
+		:return None:
+		"""
+		with self._lock:
+			total, entries = self._scan()
+			if total > self._max_size:
+				# free some space below budget, so next entries don't cause eviction
+				target = self._max_size * 0.9
+				entries.sort(key=lambda entry: entry[2])
+				for path, size, mtime in entries:
+					if total <= target:
+						break
+					self._remove(path)
+					total -= size
+			self._size = total
+
+class SynthesMemoryCache(object):
+	"""
+	In-process LRU cache of synthes results bounded by total size in bytes.
+
+	Data is stored once and returned as read-only memoryview without copying.
+	"""
+
+	def __init__(self, max_bytes=64 * 1024 ** 2):
+		"""
+		Initialize memory cache.
+
+		:keyword int max_bytes:
+		    Max total size of cached data in bytes. Larger entries are not cached.
+		"""
+		self._max_bytes = max_bytes
+		self._entries   = OrderedDict()
+		self._size      = 0
+		self._hits      = 0
+		self._misses    = 0
+		self._evictions = 0
+
+	def __str__(self):
+		"""
+		Return str(self).
+		"""
+		return '<%s entries=%d size=%d max_bytes=%d>' % (self.__class__.__name__, len(self), self._size, self._max_bytes)
+
+	def __repr__(self):
+		"""
+		Return repr(self).
+		"""
+		return "%s(max_bytes=%r)" % (self.__class__.__name__, self._max_bytes)
+
+	def __len__(self):
+		"""
+		Return len(self).
+		"""
+		return len(self._entries)
+
+	@staticmethod
+	def key(voice, text, mime="audio/wav"):
+		"""
+		Return entry key.
+
+		:param str voice:
+		    Voice name.
+
+		:param str text:
+		    Synthesized text.
+
+		:keyword str mime:
+		    Audio mime.
+
+		:return tuple:
+		"""
+		return (voice, mime, text)
+
+	def get(self, key):
+		"""
+		Return entry data or None if entry is missing.
+
+		:param tuple key:
+		    Entry key.
+
+		:return memoryview or None:
+		"""
+		data = self._entries.get(key)
+		if data is None:
+			self._misses += 1
+			return None
+		self._hits += 1
+		self._entries.move_to_end(key)
+		return memoryview(data).toreadonly()
+
+	def put(self, key, data):
+		"""
+		Store entry and return it as read-only memoryview.
+
+		:param tuple key:
+		    Entry key.
+
+		:param bytes data:
+		    Data.
+
+		:return memoryview:
+		"""
+		if not isinstance(data, bytes):
+			data = bytes(data)
+		if len(data) > self._max_bytes:
+			return memoryview(data).toreadonly()
+		old = self._entries.pop(key, None)
+		if old is not None:
+			self._size -= len(old)
+		self._entries[key] = data
+		self._size += len(data)
+		while self._size > self._max_bytes:
+			evicted_key, evicted = self._entries.popitem(last=False)
+			self._size -= len(evicted)
+			self._evictions += 1
+		return memoryview(data).toreadonly()
+
+	def invalidate(self, key=None):
+		"""
+		Remove entry or all entries.
+
+		:keyword tuple key:
+		    Entry key. If it is None, all entries are removed.
+
+		:return None:
+		"""
+		if key is None:
+			self._entries.clear()
+			self._size = 0
+		else:
+			data = self._entries.pop(key, None)
+			if data is not None:
+				self._size -= len(data)
+
+	def stats(self):
+		"""
+		Return cache counters.
+
+		:return dict:
+		    Keys are ``hits``, ``misses``, ``evictions``, ``entries``, ``size`` and ``max_bytes``.
+		"""
+		return {
+			"hits": self._hits,
+			"misses": self._misses,
+			"evictions": self._evictions,
+			"entries": len(self._entries),
+			"size": self._size,
+			"max_bytes": self._max_bytes,
+		}
@@ -0,0 +1,261 @@
+#!/usr/bin/env python
+
+"""
+Do it.
+"""
+
+# define metadata
+__all__ = ["HttpClient"]
+
+# import modules and packages
+import asyncio
+import aiohttp
+import speechapi.retry
+import speechapi.metrics
+import speechapi.ratelimit
+
+async def _closing(session):
+	"""
+	Return async generator that closes session when it's finalized.
+
+	``asyncio.run`` and ``loop.shutdown_asyncgens`` finalize suspended async
+	generators before event loop is closed, so session is closed while its
+	event loop is still running.
+
+	:param aiohttp.ClientSession session:
+	    Client session.
+
+	:return async_generator:
+	"""
+	try:
+		yield
+	finally:
+		await session.close()
+
+class HttpClient(object):
+	"""
+	Long-lived connection-pooled HTTP client for SpeechPro API.
+
+	One ``aiohttp.ClientSession`` is kept for every event loop that uses client,
+	so TCP and TLS connections are reused between API calls. Session is closed
+	by ``aclose`` or when ``asyncio.run`` finishes its event loop.
+	"""
+
+	def __init__(self, limit=100, limit_per_host=0, keepalive_timeout=30, ttl_dns_cache=300, timeout=None, retry=None, breaker=None, limiter=None, metrics=None):
+		"""
+		Initialize HTTP client.
+
+		:keyword int limit:
+		    Total number of simultaneous connections. 0 means no limit.
+
+		:keyword int limit_per_host:
+		    Number of simultaneous connections to one host. 0 means no limit.
+
+		:keyword float keepalive_timeout:
+		    Timeout for connection reusing after releasing.
+
+		:keyword int ttl_dns_cache:
+		    Time in seconds while resolved DNS entries are cached.
+		    If it is None, resolved DNS entries are cached forever.
+
+		:keyword float timeout:
+		    Total timeout of one request in seconds.
+		    If it is None, aiohttp default timeout used.
+
+		:keyword RetryPolicy retry:
+		    Policy of repeating failed requests. If it is None, default RetryPolicy
+		    used. ``RetryPolicy(attempts=1)`` disables retries.
+
+		:keyword CircuitBreaker breaker:
+		    Per-host circuit breaker. If it is None, requests are never failed fast.
+
+		:keyword RateLimiter limiter:
+		    Limiter of request rate applied to every REST request and web socket
+		    opening. If it is None, requests are not limited.
+
+		:keyword MetricsSink metrics:
+		    Sink of request and stream metrics, e.g. InMemoryMetrics.
+		    If it is None, nothing is measured.
+		"""
+		self._limit             = limit
+		self._limit_per_host    = limit_per_host
+		self._keepalive_timeout = keepalive_timeout
+		self._ttl_dns_cache     = ttl_dns_cache
+		self._timeout           = timeout
+		self._retry             = retry if retry is not None else speechapi.retry.RetryPolicy()
+		self._breaker           = breaker
+		self._limiter           = limiter
+		self._metrics           = metrics
+		self._sessions          = {}
+
+	def __str__(self):
+		"""
+		Return str(self).
+		"""
+		return '<%s limit=%d limit_per_host=%d closed=%r>' % (self.__class__.__name__, self._limit, self._limit_per_host, self.closed)
+
+	def __repr__(self):
+		"""
+		Return repr(self).
+		"""
+		return "%s(limit=%r, limit_per_host=%r, keepalive_timeout=%r, ttl_dns_cache=%r, timeout=%r)" % (
+			self.__class__.__name__, self._limit, self._limit_per_host, self._keepalive_timeout, self._ttl_dns_cache, self._timeout
+		)
+
+	async def __aenter__(self):
+		"""
+		Return self.
+		"""
+		return self
+
+	async def __aexit__(self, ex_type, ex_val, ex_traceback):
+		"""
+		Close self.
+		"""
+		await self.aclose()
+
+	def _make_session(self):
+		"""
+		Return new aiohttp client session with pooled connector.
+
+		:return aiohttp.ClientSession:
+		"""
+		connector = aiohttp.TCPConnector(
+			limit=self._limit,
+			limit_per_host=self._limit_per_host,
+			keepalive_timeout=self._keepalive_timeout,
+			use_dns_cache=True,
+			ttl_dns_cache=self._ttl_dns_cache,
+		)
+		kwargs = {}
+		if self._metrics is not None:
+			kwargs["trace_configs"] = [speechapi.metrics._trace_config(self._metrics)]
+		if self._timeout is not None:
+			kwargs["timeout"] = aiohttp.ClientTimeout(total=self._timeout)
+		return aiohttp.ClientSession(connector=connector, **kwargs)
+
+	async def get_session(self):
+		"""
+		Return aiohttp client session for running event loop.
+
+		Session is created on first use and reused by all next calls
+		from the same event loop.
+
+		:return aiohttp.ClientSession:
+		"""
+		loop = asyncio.get_running_loop()
+		self._drop_closed_loops()
+		session, closing = self._sessions.get(loop, (None, None))
+		if session is None or session.closed:
+			session = self._make_session()
+			closing = _closing(session)
+			await closing.__anext__()
+			self._sessions[loop] = session, closing
+		return session
+
+	def _drop_closed_loops(self):
+		"""
+		Forget sessions of closed event loops.
+
+		Sessions of loops closed by ``asyncio.run`` are closed already.
+		Session of loop closed without finalizing async generators can't be
+		closed anymore, its connections are closed when they are collected.
+
+		:return None:
+		"""
+		for loop in [loop for loop in self._sessions if loop.is_closed()]:
+			session, closing = self._sessions.pop(loop)
+			session.detach()
+
+	async def ws_connect(self, url, session=None, **kwargs):
+		"""
+		Open web socket connection after permission of rate limiter.
+
+		:param str url:
+		    Web socket url.
+
+		:keyword _Session session:
+		    SpeechPro session that connection is opened for.
+
+		:return aiohttp.ClientWebSocketResponse:
+		"""
+		http = await self.get_session()
+		async with speechapi.ratelimit._acquire(self._limiter, session):
+			return await http.ws_connect(url, **kwargs)
+
+	async def aclose(self):
+		"""
+		Close client session of running event loop.
+
+		Client may be used after closing, new session will be created on demand.
+
+		:return None:
+		"""
+		self._drop_closed_loops()
+		session, closing = self._sessions.pop(asyncio.get_running_loop(), (None, None))
+		if closing is not None:
+			await closing.aclose()
+
+	closed = property()
+	retry = property()
+	breaker = property()
+	limiter = property()
+	metrics = property()
+
+	@retry.getter
+	def retry(self):
+		"""
+		Return policy of repeating failed requests.
+
+		:return RetryPolicy:
+		"""
+		return self._retry
+
+	@breaker.getter
+	def breaker(self):
+		"""
+		Return per-host circuit breaker.
+
+		:return CircuitBreaker or None:
+		"""
+		return self._breaker
+
+	@limiter.getter
+	def limiter(self):
+		"""
+		Return limiter of request rate.
+
+		:return RateLimiter or None:
+		"""
+		return self._limiter
+
+	@metrics.getter
+	def metrics(self):
+		"""
+		Return metrics sink.
+
+		:return MetricsSink or None:
+		"""
+		return self._metrics
+
+	@closed.getter
+	def closed(self):
+		"""
+		Return True if client has no open sessions.
+
+		:return bool:
+		"""
+		return all(session.closed for session, closing in list(self._sessions.values()))
+
+_default_client = None
+
+def _get_default_client():
+	"""
+	Return HTTP client shared by all SpeechPro APIs by default.
+
+	:return HttpClient:
+	"""
+	global _default_client
+	if _default_client is None:
+		_default_client = HttpClient()
+	return _default_client
@@ -5,7 +5,7 @@ Do it.
 """
 
 # define metadata
-__all__ = ["SPBaseError", "APIRequestError", "APIResponseError"]
+__all__ = ["SPBaseError", "APIRequestError", "CircuitOpenError", "APIResponseError"]
 
 # import modules and packages
 # import here
@@ -14,12 +14,20 @@ class SPBaseError(Exception):
 	pass
 	
 class APIRequestError(SPBaseError):
-	def __init__(self, *args, status=None, status_text=None, api_reason=None, api_reason_desc=None, **kwargs):
+	def __init__(self, *args, status=None, status_text=None, api_reason=None, api_reason_desc=None, attempts=None, retry_after=None, circuit_open=False, **kwargs):
 		super().__init__(*args, **kwargs)
 		self.status          = status
 		self.status_text     = status_text
 		self.api_reason      = api_reason
 		self.api_reason_desc = api_reason_desc
+		self.attempts        = attempts
+		self.retry_after     = retry_after
+		self.circuit_open    = circuit_open
+		
+class CircuitOpenError(APIRequestError):
+	def __init__(self, *args, **kwargs):
+		kwargs.setdefault("circuit_open", True)
+		super().__init__(*args, **kwargs)
 		
 class APIResponseError(SPBaseError):
 	def __init__(self, *args, key=None, **kwargs):
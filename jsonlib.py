@@ -0,0 +1,96 @@
+#!/usr/bin/env python
+
+"""
+Do it.
+"""
+
+# define metadata
+__all__ = ["dumps", "loads", "get_backend", "set_backend"]
+
+# import modules and packages
+import json
+
+try:
+	import orjson
+except ImportError:
+	orjson = None
+
+try:
+	import ujson
+except ImportError:
+	ujson = None
+
+def _json_dumps(obj):
+	"""
+	Serialize object to JSON bytes with standard json module.
+	"""
+	return json.dumps(obj).encode("utf-8")
+
+def _ujson_dumps(obj):
+	"""
+	Serialize object to JSON bytes with ujson.
+	"""
+	return ujson.dumps(obj).encode("utf-8")
+
+# backend name: (dumps to bytes, loads from bytes or str)
+_BACKENDS = {"json": (_json_dumps, json.loads)}
+if ujson is not None:
+	_BACKENDS["ujson"] = (_ujson_dumps, ujson.loads)
+if orjson is not None:
+	_BACKENDS["orjson"] = (orjson.dumps, orjson.loads)
+
+_backend = None
+_dumps = _loads = None
+
+def set_backend(name=None):
+	"""
+	Set JSON backend used for api requests and responses.
+
+	:keyword str name:
+	    Backend name: ``orjson``, ``ujson`` or ``json``.
+	    If it is None, the fastest installed backend used.
+
+	:return None:
+
+	:except ValueError:
+	    If backend is unknown or not installed.
+	"""
+	global _backend, _dumps, _loads
+	if name is None:
+		name = next(name for name in ("orjson", "ujson", "json") if name in _BACKENDS)
+	if name not in _BACKENDS:
+		raise ValueError("JSON backend '%s' is unknown or not installed" % name)
+	_backend = name
+	_dumps, _loads = _BACKENDS[name]
+
+def get_backend():
+	"""
+	Return name of current JSON backend.
+
+	:return str:
+	"""
+	return _backend
+
+def dumps(obj):
+	"""
+	Serialize object to JSON.
+
+	:param object obj:
+	    Object.
+
+	:return bytes:
+	"""
+	return _dumps(obj)
+
+def loads(data):
+	"""
+	Deserialize JSON.
+
+	:param bytes or str data:
+	    JSON data.
+
+	:return object:
+	"""
+	return _loads(data)
+
+set_backend()
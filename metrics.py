@@ -0,0 +1,405 @@
+#!/usr/bin/env python
+
+"""
+Do it.
+"""
+
+# define metadata
+__all__ = ["MetricsSink", "InMemoryMetrics"]
+
+# import modules and packages
+import re
+import time
+import aiohttp
+
+from collections import deque
+from urllib.parse import urlsplit
+
+# path parameters replaced in endpoint names, so names don't depend on ids
+_ENDPOINT_PATTERNS = [
+	(re.compile(r"/languages/[^/]+/voices$"), "/languages/{lang}/voices"),
+	(re.compile(r"/packages/[^/]+/(load|unload)$"), r"/packages/{id}/\1"),
+	(re.compile(r"/[0-9a-fA-F-]{16,}$"), "/{id}"),
+]
+
+def _endpoint(method, url):
+	"""
+	Return name of api endpoint.
+
+	:param str method:
+	    HTTP method.
+
+	:param str or yarl.URL url:
+	    Request url.
+
+	:return str:
+	"""
+	path = urlsplit(str(url)).path
+	for pattern, repl in _ENDPOINT_PATTERNS:
+		path = pattern.sub(repl, path)
+	return "%s %s" % (method.upper(), path)
+
+class MetricsSink(object):
+	"""
+	Receiver of client metrics.
+
+	Base sink drops everything. Subclasses send metrics to monitoring
+	system (statsd, Prometheus, logs).
+	"""
+
+	def observe(self, name, value, tags=None):
+		"""
+		Register value of histogram.
+
+		:param str name:
+		    Metric name.
+
+		:param float value:
+		    Value, e.g. seconds or bytes.
+
+		:keyword dict tags:
+		    Metric tags, e.g. endpoint.
+
+		:return None:
+		"""
+		pass
+
+	def increment(self, name, value=1, tags=None):
+		"""
+		Increase counter.
+
+		:param str name:
+		    Metric name.
+
+		:keyword int value:
+		    Increment.
+
+		:keyword dict tags:
+		    Metric tags, e.g. endpoint.
+
+		:return None:
+		"""
+		pass
+
+class _Histogram(object):
+	"""
+	Histogram with totals and window of recent values for percentiles.
+	"""
+
+	__slots__ = ("count", "sum", "min", "max", "values")
+
+	def __init__(self, window):
+		self.count  = 0
+		self.sum    = 0.0
+		self.min    = None
+		self.max    = None
+		self.values = deque(maxlen=window)
+
+	def add(self, value):
+		self.count += 1
+		self.sum   += value
+		self.min    = value if self.min is None else min(self.min, value)
+		self.max    = value if self.max is None else max(self.max, value)
+		self.values.append(value)
+
+	def summary(self):
+		values = sorted(self.values)
+		def percentile(p):
+			return values[min(int(p * len(values)), len(values) - 1)] if values else None
+		return {
+			"count": self.count,
+			"sum": self.sum,
+			"min": self.min,
+			"max": self.max,
+			"avg": self.sum / self.count if self.count else None,
+			"p50": percentile(0.5),
+			"p90": percentile(0.9),
+			"p99": percentile(0.99),
+		}
+
+class InMemoryMetrics(MetricsSink):
+	"""
+	Sink that keeps metrics in memory.
+
+	Histograms keep totals and ``window`` recent values that percentiles
+	are computed from.
+	"""
+
+	def __init__(self, window=1024):
+		"""
+		Initialize in-memory sink.
+
+		:keyword int window:
+		    Number of recent values of every histogram used for percentiles.
+		"""
+		self._window     = window
+		self._histograms = {}
+		self._counters   = {}
+
+	def __repr__(self):
+		"""
+		Return repr(self).
+		"""
+		return "%s(window=%r)" % (self.__class__.__name__, self._window)
+
+	@staticmethod
+	def _key(name, tags):
+		"""
+		Return hashable key of metric.
+
+		:return tuple:
+		"""
+		return (name, tuple(sorted(tags.items()))) if tags else (name, ())
+
+	def observe(self, name, value, tags=None):
+		"""
+		Register value of histogram.
+
+		:param str name:
+		    Metric name.
+
+		:param float value:
+		    Value, e.g. seconds or bytes.
+
+		:keyword dict tags:
+		    Metric tags, e.g. endpoint.
+
+		:return None:
+		"""
+		key = self._key(name, tags)
+		histogram = self._histograms.get(key)
+		if histogram is None:
+			histogram = self._histograms[key] = _Histogram(self._window)
+		histogram.add(value)
+
+	def increment(self, name, value=1, tags=None):
+		"""
+		Increase counter.
+
+		:param str name:
+		    Metric name.
+
+		:keyword int value:
+		    Increment.
+
+		:keyword dict tags:
+		    Metric tags, e.g. endpoint.
+
+		:return None:
+		"""
+		key = self._key(name, tags)
+		self._counters[key] = self._counters.get(key, 0) + value
+
+	def counter(self, name, **tags):
+		"""
+		Return value of counter.
+
+		:param str name:
+		    Metric name.
+
+		:keyword tags:
+		    Metric tags.
+
+		:return int:
+		"""
+		return self._counters.get(self._key(name, tags), 0)
+
+	def histogram(self, name, **tags):
+		"""
+		Return summary of histogram.
+
+		:param str name:
+		    Metric name.
+
+		:keyword tags:
+		    Metric tags.
+
+		:return dict or None:
+		    Keys are ``count``, ``sum``, ``min``, ``max``, ``avg``, ``p50``, ``p90`` and ``p99``.
+		"""
+		histogram = self._histograms.get(self._key(name, tags))
+		return histogram.summary() if histogram is not None else None
+
+	def snapshot(self):
+		"""
+		Return all metrics.
+
+		:return dict:
+		    Keys are ``counters`` and ``histograms``, values are lists of
+		    ``(name, tags, value)`` where value of histogram is its summary.
+		"""
+		return {
+			"counters": [(name, dict(tags), value) for (name, tags), value in sorted(self._counters.items())],
+			"histograms": [(name, dict(tags), histogram.summary()) for (name, tags), histogram in sorted(self._histograms.items(), key=lambda item: item[0])],
+		}
+
+	def reset(self):
+		"""
+		Remove all metrics.
+
+		:return None:
+		"""
+		self._histograms.clear()
+		self._counters.clear()
+
+def _trace_config(sink):
+	"""
+	Return aiohttp trace config that reports requests to metrics sink.
+
+	Metrics:
+
+	* ``http.request.time`` -- seconds until response headers by endpoint and status;
+	* ``http.requests`` and ``http.errors`` -- counters by endpoint;
+	* ``http.request.bytes`` and ``http.response.bytes`` -- counters of body bytes by endpoint;
+	* ``http.connection.wait`` -- seconds waiting for free connection of pool;
+	* ``http.connection.create`` -- seconds of TCP and TLS handshakes of new connection;
+	* ``http.connections.created`` and ``http.connections.reused`` -- counters;
+	* ``http.dns.time`` -- seconds of DNS resolving, cache hits are counted by ``http.dns.cache_hits``.
+
+	:param MetricsSink sink:
+	    Metrics sink.
+
+	:return aiohttp.TraceConfig:
+	"""
+	config = aiohttp.TraceConfig()
+
+	async def on_request_start(session, ctx, params):
+		ctx.start = time.monotonic()
+		ctx.endpoint = _endpoint(params.method, params.url)
+
+	async def on_request_chunk_sent(session, ctx, params):
+		sink.increment("http.request.bytes", len(params.chunk), {"endpoint": ctx.endpoint})
+
+	async def on_response_chunk_received(session, ctx, params):
+		sink.increment("http.response.bytes", len(params.chunk), {"endpoint": _endpoint(params.method, params.url)})
+
+	async def on_request_end(session, ctx, params):
+		tags = {"endpoint": ctx.endpoint}
+		sink.observe("http.request.time", time.monotonic() - ctx.start, dict(tags, status=params.response.status))
+		sink.increment("http.requests", tags=tags)
+		if params.response.status >= 400:
+			sink.increment("http.errors", tags=dict(tags, error=str(params.response.status)))
+
+	async def on_request_exception(session, ctx, params):
+		tags = {"endpoint": ctx.endpoint}
+		sink.increment("http.requests", tags=tags)
+		sink.increment("http.errors", tags=dict(tags, error=params.exception.__class__.__name__))
+
+	async def on_connection_queued_start(session, ctx, params):
+		ctx.queued = time.monotonic()
+
+	async def on_connection_queued_end(session, ctx, params):
+		sink.observe("http.connection.wait", time.monotonic() - ctx.queued)
+
+	async def on_connection_create_start(session, ctx, params):
+		ctx.connecting = time.monotonic()
+
+	async def on_connection_create_end(session, ctx, params):
+		sink.observe("http.connection.create", time.monotonic() - ctx.connecting)
+		sink.increment("http.connections.created")
+
+	async def on_connection_reuseconn(session, ctx, params):
+		sink.increment("http.connections.reused")
+
+	async def on_dns_resolvehost_start(session, ctx, params):
+		ctx.resolving = time.monotonic()
+
+	async def on_dns_resolvehost_end(session, ctx, params):
+		sink.observe("http.dns.time", time.monotonic() - ctx.resolving)
+
+	async def on_dns_cache_hit(session, ctx, params):
+		sink.increment("http.dns.cache_hits")
+
+	config.on_request_start.append(on_request_start)
+	config.on_request_chunk_sent.append(on_request_chunk_sent)
+	config.on_response_chunk_received.append(on_response_chunk_received)
+	config.on_request_end.append(on_request_end)
+	config.on_request_exception.append(on_request_exception)
+	config.on_connection_queued_start.append(on_connection_queued_start)
+	config.on_connection_queued_end.append(on_connection_queued_end)
+	config.on_connection_create_start.append(on_connection_create_start)
+	config.on_connection_create_end.append(on_connection_create_end)
+	config.on_connection_reuseconn.append(on_connection_reuseconn)
+	config.on_dns_resolvehost_start.append(on_dns_resolvehost_start)
+	config.on_dns_resolvehost_end.append(on_dns_resolvehost_end)
+	config.on_dns_cache_hit.append(on_dns_cache_hit)
+	return config
+
+class _StreamTimer(object):
+	"""
+	Timings of web socket stream reported to metrics sink.
+
+	Metrics by stream kind:
+
+	* ``stream.connect.time`` -- seconds of web socket handshake, 0 for pre-opened connection;
+	* ``stream.first_chunk.time`` -- seconds from connecting to first received chunk;
+	* ``stream.tail.time`` -- seconds from last chunk to end of stream, i.e. idle timeout waiting;
+	* ``stream.time`` -- seconds of whole stream;
+	* ``stream.chunks`` and ``stream.bytes`` -- number and size of received chunks of stream.
+	"""
+
+	__slots__ = ("_sink", "_tags", "_start", "_connected", "_first", "_last", "_chunks", "_bytes")
+
+	def __init__(self, sink, kind):
+		"""
+		Initialize and start stream timer.
+
+		:param MetricsSink sink:
+		    Metrics sink. If it is None, nothing is reported.
+
+		:param str kind:
+		    Stream kind, e.g. ``synthes``.
+		"""
+		self._sink      = sink
+		self._tags      = {"stream": kind}
+		self._start     = time.monotonic()
+		self._connected = None
+		self._first     = None
+		self._last      = None
+		self._chunks    = 0
+		self._bytes     = 0
+
+	def connected(self, preopened=False):
+		"""
+		Register opened web socket.
+
+		:keyword bool preopened:
+		    True if web socket was connected in advance.
+
+		:return None:
+		"""
+		self._connected = time.monotonic()
+		if self._sink is not None:
+			self._sink.observe("stream.connect.time", 0.0 if preopened else self._connected - self._start, self._tags)
+
+	def chunk(self, data):
+		"""
+		Register received chunk.
+
+		:param bytes or str data:
+		    Chunk.
+
+		:return None:
+		"""
+		self._last = time.monotonic()
+		if self._first is None:
+			self._first = self._last
+		self._chunks += 1
+		self._bytes  += len(data)
+
+	def finish(self):
+		"""
+		Report timings of finished stream.
+
+		:return None:
+		"""
+		if self._sink is None:
+			return
+		now = time.monotonic()
+		if self._first is not None:
+			self._sink.observe("stream.first_chunk.time", self._first - (self._connected or self._start), self._tags)
+			self._sink.observe("stream.tail.time", now - self._last, self._tags)
+		self._sink.observe("stream.time", now - self._start, self._tags)
+		self._sink.observe("stream.chunks", self._chunks, self._tags)
+		self._sink.observe("stream.bytes", self._bytes, self._tags)
+		self._sink.increment("stream.streams", tags=self._tags)
@@ -0,0 +1,685 @@
+#!/usr/bin/env python
+
+"""
+Do it.
+"""
+
+# define metadata
+__all__ = ["SessionPool", "SynthesStreamPool"]
+
+# import modules and packages
+import time
+import asyncio
+import logging
+import aiohttp
+import speechapi
+import speechapi.tts
+
+from contextlib import asynccontextmanager
+from speechapi.exceptions import *
+
+_log = logging.getLogger(__name__)
+
+def _is_session_error(ex):
+	"""
+	Return True if api error means that session is expired or invalid.
+
+	:param APIRequestError ex:
+	    API error.
+
+	:return bool:
+	"""
+	if ex.status in (401, 403):
+		return True
+	return "session" in ("%s %s" % (ex.api_reason or "", ex.api_reason_desc or "")).lower()
+
+class SessionPool(object):
+	"""
+	Pool of warm SpeechPro sessions.
+
+	Sessions are created on start, handed out per request and returned back
+	after it. Idle and busy sessions are pinged in background, sessions that
+	are inactive or older than ``max_age`` are replaced by new ones before
+	callers notice it.
+	"""
+
+	def __init__(self, domain_id, login, password, size=4, keepalive=60, max_age=None, sesapi=None):
+		"""
+		Initialize session pool.
+
+		:param int domain_id:
+		    Domain ID. Get it in you account.
+
+		:param str login:
+		    Login. Get it in you account.
+
+		:param str password:
+		    Password. Get it in you account.
+
+		:keyword int size:
+		    Number of warm sessions.
+
+		:keyword float keepalive:
+		    Interval in seconds between background checks of sessions.
+
+		:keyword float max_age:
+		    Age in seconds after which session is re-created in background.
+		    If it is None, sessions are re-created only when they become inactive.
+
+		:keyword SessionApi sesapi:
+		    Session API. If it is None, default SessionApi used.
+		"""
+		if size < 1:
+			raise ValueError("pool size must be positive, not %r" % size)
+		self._credentials = (domain_id, login, password)
+		self._size        = size
+		self._keepalive   = keepalive
+		self._max_age     = max_age
+		self._sesapi      = sesapi if sesapi is not None else speechapi.SessionApi()
+		self._idle        = None
+		self._created     = {}
+		self._invalid     = set()
+		self._renewing    = set()
+		self._tasks       = set()
+		self._refresher   = None
+
+	def __str__(self):
+		"""
+		Return str(self).
+		"""
+		return '<%s size=%d idle=%d closed=%r>' % (self.__class__.__name__, self._size, self.idle, self.closed)
+
+	def __repr__(self):
+		"""
+		Return repr(self).
+		"""
+		return "%s(%r, %r, '***', size=%r, keepalive=%r, max_age=%r)" % (
+			self.__class__.__name__, self._credentials[0], self._credentials[1], self._size, self._keepalive, self._max_age
+		)
+
+	async def __aenter__(self):
+		"""
+		Start pool and return self.
+		"""
+		await self.start()
+		return self
+
+	async def __aexit__(self, ex_type, ex_val, ex_traceback):
+		"""
+		Close self.
+		"""
+		await self.close()
+
+	size = property()
+	idle = property()
+	closed = property()
+
+	@size.getter
+	def size(self):
+		"""
+		Return number of warm sessions.
+
+		:return int:
+		"""
+		return self._size
+
+	@idle.getter
+	def idle(self):
+		"""
+		Return number of sessions waiting in pool.
+
+		:return int:
+		"""
+		return self._idle.qsize() if not self.closed else 0
+
+	@closed.getter
+	def closed(self):
+		"""
+		Return True if pool is not started or already closed.
+
+		:return bool:
+		"""
+		return self._refresher is None
+
+	async def start(self):
+		"""
+		Create warm sessions and start background refreshing.
+
+		:return None:
+
+		:except APIRequestError:
+		    If some problems with request to api.
+		"""
+		if not self.closed:
+			return
+		self._idle = asyncio.Queue()
+		sessions = await asyncio.gather(*[self._create() for _ in range(self._size)], return_exceptions=True)
+		errors = [session for session in sessions if isinstance(session, BaseException)]
+		if errors:
+			await asyncio.gather(*[self._discard(session) for session in sessions if not isinstance(session, BaseException)])
+			raise errors[0]
+		for session in sessions:
+			self._idle.put_nowait(session)
+		self._refresher = asyncio.ensure_future(self._refresh_loop())
+
+	async def close(self):
+		"""
+		Stop background refreshing and delete idle sessions.
+
+		Sessions that are in use are deleted when they are returned to pool.
+
+		:return None:
+		"""
+		if self.closed:
+			return
+		self._refresher.cancel()
+		self._refresher = None
+		for task in list(self._tasks):
+			task.cancel()
+		sessions = []
+		while not self._idle.empty():
+			sessions.append(self._idle.get_nowait())
+		# wake callers waiting for session, every woken caller wakes next one
+		self._idle.put_nowait(None)
+		await asyncio.gather(*[self._discard(session) for session in sessions])
+
+	@asynccontextmanager
+	async def acquire(self):
+		"""
+		Return context manager that hands out session and returns it to pool on exit.
+
+		:return _Session:
+		"""
+		if self.closed:
+			raise RuntimeError("session pool is closed")
+		while True:
+			session = await self._idle.get()
+			if session is None:
+				self._idle.put_nowait(None)
+				raise RuntimeError("session pool is closed")
+			if session in self._invalid:
+				self._spawn(self._discard(session))
+			else:
+				break
+		try:
+			yield session
+		finally:
+			if self.closed:
+				# pool was closed while session was used
+				await self._discard(session)
+			elif session in self._invalid:
+				self._spawn(self._discard(session))
+			else:
+				self._idle.put_nowait(session)
+
+	async def run(self, func, *args, **kwargs):
+		"""
+		Call ``func(session, *args, **kwargs)`` with pooled session and return its result.
+
+		If api answers that session is expired, session is replaced and call
+		is repeated with other session. Call is repeated while pool hands out
+		sessions created before call, e.g. when all sessions expired at once.
+
+		:param function func:
+		    Coroutine function that takes session as first argument.
+
+		:return object:
+
+		:except APIRequestError:
+		    If some problems with request to api.
+		"""
+		started = time.monotonic()
+		while True:
+			async with self.acquire() as session:
+				try:
+					return await func(session, *args, **kwargs)
+				except APIRequestError as ex:
+					# session created during call is fresh, so error is not about expiration
+					if not _is_session_error(ex) or self._created.get(session, started) >= started:
+						raise
+					self.invalidate(session)
+
+	def invalidate(self, session):
+		"""
+		Mark session as expired and create replacement for it in background.
+
+		:param _Session session:
+		    Pooled session.
+
+		:return None:
+		"""
+		if session in self._created and session not in self._invalid:
+			self._invalid.add(session)
+			self._spawn(self._renew())
+
+	def _spawn(self, coro):
+		"""
+		Run coroutine in background task tracked by pool.
+
+		:param coroutine coro:
+		    Coroutine.
+
+		:return None:
+		"""
+		task = asyncio.ensure_future(coro)
+		self._tasks.add(task)
+		task.add_done_callback(self._tasks.discard)
+
+	async def _create(self):
+		"""
+		Create new session.
+
+		:return _Session:
+		"""
+		domain_id, login, password = self._credentials
+		session = await self._sesapi.session_create(domain_id, login, password)
+		self._created[session] = time.monotonic()
+		return session
+
+	async def _renew(self, old=None):
+		"""
+		Create new session, put it to pool and mark old session as expired.
+
+		Creation is repeated until it succeeds.
+
+		:keyword _Session old:
+		    Session that is replaced. If it is None, session was already marked as expired.
+
+		:return None:
+		"""
+		delay = 1
+		try:
+			while True:
+				try:
+					session = await self._create()
+					break
+				except (SPBaseError, aiohttp.ClientError, OSError, asyncio.TimeoutError):
+					await asyncio.sleep(delay)
+					delay = min(delay * 2, max(self._keepalive, 1))
+			self._idle.put_nowait(session)
+			if old is not None:
+				self._invalid.add(old)
+		finally:
+			self._renewing.discard(old)
+
+	async def _discard(self, session):
+		"""
+		Forget session and delete it. Errors are ignored.
+
+		:param _Session session:
+		    Pooled session.
+
+		:return None:
+		"""
+		self._created.pop(session, None)
+		self._invalid.discard(session)
+		try:
+			await self._sesapi.session_delete(session)
+		except (SPBaseError, aiohttp.ClientError, OSError, asyncio.TimeoutError):
+			pass
+
+	async def _refresh(self, session):
+		"""
+		Check session and replace it if it is inactive or too old.
+
+		:param _Session session:
+		    Pooled session.
+
+		:return None:
+		"""
+		if session in self._invalid or session in self._renewing:
+			return
+		if self._max_age is not None and time.monotonic() - self._created.get(session, 0) >= self._max_age:
+			self._renewing.add(session)
+			await self._renew(old=session)
+			return
+		try:
+			is_active = await self._sesapi.session_status(session)
+		except APIRequestError as ex:
+			is_active = not _is_session_error(ex)
+			if is_active: _log.warning("status of session %s is unknown: %s", session.session_id, ex)
+		except (SPBaseError, aiohttp.ClientError, OSError, asyncio.TimeoutError) as ex:
+			is_active = True
+			_log.warning("status of session %s is unknown: %s", session.session_id, ex)
+		if not is_active:
+			self.invalidate(session)
+
+	async def _refresh_loop(self):
+		"""
+		Periodically check all pooled sessions.
+
+		:return None:
+		"""
+		while True:
+			await asyncio.sleep(self._keepalive)
+			for result in await asyncio.gather(*[self._refresh(session) for session in list(self._created)], return_exceptions=True):
+				if isinstance(result, Exception):
+					_log.error("session refreshing failed", exc_info=result)
+			self._purge()
+
+	def _purge(self):
+		"""
+		Delete expired sessions that are waiting in pool.
+
+		:return None:
+		"""
+		sessions = []
+		while not self._idle.empty():
+			sessions.append(self._idle.get_nowait())
+		for session in sessions:
+			if session in self._invalid:
+				self._spawn(self._discard(session))
+			else:
+				self._idle.put_nowait(session)
+
+class _PooledStream(object):
+	"""
+	Pre-opened synthes stream with usage counters.
+	"""
+
+	__slots__ = ("wsconfig", "created", "uses")
+
+	def __init__(self, wsconfig):
+		self.wsconfig = wsconfig
+		self.created  = time.monotonic()
+		self.uses     = 0
+
+class SynthesStreamPool(object):
+	"""
+	Pool of pre-opened synthes streams per session and voice.
+
+	Streams are opened and their web sockets are connected in background, so
+	``stream_synthes`` starts sending text without any round-trip. Stream is
+	reused by next callers until it's used ``max_uses`` times or becomes older
+	than ``max_age``, then it's closed and replaced.
+	"""
+
+	def __init__(self, size=2, max_uses=10, max_age=300, preconnect=True, ttsapi=None):
+		"""
+		Initialize synthes stream pool.
+
+		:keyword int size:
+		    Number of idle streams kept for every session and voice.
+
+		:keyword int max_uses:
+		    Number of syntheses after which stream is closed.
+
+		:keyword float max_age:
+		    Age in seconds after which stream is closed.
+		    If it is None, streams are closed only by ``max_uses``.
+
+		:keyword bool preconnect:
+		    If it is True, web socket of idle stream is connected in advance.
+
+		:keyword TTSApi ttsapi:
+		    TTS API. If it is None, default TTSApi used.
+		"""
+		if size < 0:
+			raise ValueError("pool size must not be negative, not %r" % size)
+		self._size       = size
+		self._max_uses   = max_uses
+		self._max_age    = max_age
+		self._preconnect = preconnect
+		self._ttsapi     = ttsapi if ttsapi is not None else speechapi.TTSApi()
+		self._idle       = {}
+		self._opening    = {}
+		self._busy       = {}
+		self._tasks      = set()
+		self._closed     = False
+
+	def __str__(self):
+		"""
+		Return str(self).
+		"""
+		return '<%s size=%d idle=%d closed=%r>' % (self.__class__.__name__, self._size, self.idle, self._closed)
+
+	def __repr__(self):
+		"""
+		Return repr(self).
+		"""
+		return "%s(size=%r, max_uses=%r, max_age=%r, preconnect=%r)" % (
+			self.__class__.__name__, self._size, self._max_uses, self._max_age, self._preconnect
+		)
+
+	async def __aenter__(self):
+		"""
+		Return self.
+		"""
+		return self
+
+	async def __aexit__(self, ex_type, ex_val, ex_traceback):
+		"""
+		Close self.
+		"""
+		await self.close()
+
+	idle = property()
+	closed = property()
+
+	@idle.getter
+	def idle(self):
+		"""
+		Return number of idle streams of all sessions and voices.
+
+		:return int:
+		"""
+		return sum(len(streams) for streams in self._idle.values())
+
+	@closed.getter
+	def closed(self):
+		"""
+		Return True if pool is closed.
+
+		:return bool:
+		"""
+		return self._closed
+
+	@staticmethod
+	def _key(session, voice):
+		"""
+		Return key of streams of session and voice.
+
+		:return tuple:
+		"""
+		return (session.session_id, voice.name if isinstance(voice, speechapi.tts._Voice) else str(voice))
+
+	async def prefill(self, session, voice):
+		"""
+		Open idle streams for session and voice and wait for them.
+
+		:param _Session session:
+		    SpeechPro session.
+
+		:param str or _Voice voice:
+		    SpeechPro voice.
+
+		:return None:
+		"""
+		self._fill(session, voice)
+		await asyncio.gather(*list(self._tasks), return_exceptions=True)
+
+	@asynccontextmanager
+	async def acquire(self, session, voice):
+		"""
+		Return context manager that hands out open stream and returns it to pool on exit.
+
+		If there is no idle stream, new one is opened for caller.
+
+		:param _Session session:
+		    SpeechPro session.
+
+		:param str or _Voice voice:
+		    SpeechPro voice.
+
+		:return _WsConfiguration:
+
+		:except APIRequestError:
+		    If some problems with request to api.
+		"""
+		if self._closed:
+			raise RuntimeError("synthes stream pool is closed")
+		key = self._key(session, voice)
+		streams = self._idle.get(key)
+		stream = None
+		while streams:
+			stream = streams.pop()
+			if not self._expired(stream):
+				break
+			self._spawn(self._retire(stream))
+			stream = None
+		if stream is None:
+			stream = _PooledStream(await self._ttsapi.open_synthes_stream(session, voice))
+		# stream that will be returned to pool doesn't need replacement
+		returning = stream.uses + 1 < self._max_uses
+		if returning:
+			self._busy[key] = self._busy.get(key, 0) + 1
+		self._fill(session, voice)
+
+		completed = False
+		try:
+			yield stream.wsconfig
+			completed = True
+		finally:
+			stream.uses += 1
+			if returning:
+				self._busy[key] -= 1
+				if not self._busy[key]:
+					del self._busy[key]
+			if completed and not self._closed and not self._expired(stream):
+				self._spawn(self._restore(key, stream))
+			else:
+				self._spawn(self._retire(stream))
+				self._fill(session, voice)
+
+	async def stream_synthes(self, text, session, voice, **kwargs):
+		"""
+		Stream text-to-speech synthes with pooled stream.
+
+		:param str text:
+		    Synthesized text.
+
+		:param _Session session:
+		    SpeechPro session.
+
+		:param str or _Voice voice:
+		    SpeechPro voice.
+
+		:keyword kwargs:
+		    Other arguments of ``TTSApi.stream_synthes``.
+
+		:return generator:
+
+		:except APIRequestError:
+		    If some problems with request to api.
+		"""
+		async with self.acquire(session, voice) as wsconfig:
+			async for chunk in self._ttsapi.stream_synthes(text, wsconfig, **kwargs):
+				yield chunk
+
+	async def close(self):
+		"""
+		Close all idle streams.
+
+		Streams that are in use are closed when they are returned.
+
+		:return None:
+		"""
+		if self._closed:
+			return
+		self._closed = True
+		streams = [stream for streams in self._idle.values() for stream in streams]
+		self._idle.clear()
+		for stream in streams:
+			self._spawn(self._retire(stream))
+		while self._tasks:
+			await asyncio.gather(*list(self._tasks), return_exceptions=True)
+
+	def _expired(self, stream):
+		"""
+		Return True if stream must not be used anymore.
+
+		:param _PooledStream stream:
+		    Pooled stream.
+
+		:return bool:
+		"""
+		if stream.wsconfig.closed or stream.uses >= self._max_uses:
+			return True
+		return self._max_age is not None and time.monotonic() - stream.created >= self._max_age
+
+	def _spawn(self, coro):
+		"""
+		Run coroutine in background task tracked by pool.
+
+		:param coroutine coro:
+		    Coroutine.
+
+		:return None:
+		"""
+		task = asyncio.ensure_future(coro)
+		self._tasks.add(task)
+		task.add_done_callback(self._tasks.discard)
+
+	def _fill(self, session, voice):
+		"""
+		Start opening of missing idle streams of session and voice.
+
+		Streams in use that will be returned to pool are not missing.
+
+		:return None:
+		"""
+		if self._closed:
+			return
+		key = self._key(session, voice)
+		missing = self._size - len(self._idle.get(key, ())) - self._opening.get(key, 0) - self._busy.get(key, 0)
+		for _ in range(missing):
+			self._opening[key] = self._opening.get(key, 0) + 1
+			self._spawn(self._open(key, session, voice))
+
+	async def _open(self, key, session, voice):
+		"""
+		Open stream and put it to pool. Errors are ignored.
+
+		:return None:
+		"""
+		try:
+			try:
+				stream = _PooledStream(await self._ttsapi.open_synthes_stream(session, voice))
+			except (SPBaseError, aiohttp.ClientError, OSError, asyncio.TimeoutError):
+				return
+		finally:
+			self._opening[key] -= 1
+			if not self._opening[key]:
+				del self._opening[key]
+		await self._restore(key, stream)
+
+	async def _restore(self, key, stream):
+		"""
+		Connect web socket of stream and return it to pool.
+
+		:return None:
+		"""
+		if self._preconnect and stream.wsconfig._ws is None:
+			try:
+				stream.wsconfig._ws = await self._ttsapi.client.ws_connect(stream.wsconfig.url, session=stream.wsconfig.session)
+			except (SPBaseError, aiohttp.ClientError, OSError, asyncio.TimeoutError):
+				# web socket is connected on use
+				pass
+		streams = self._idle.setdefault(key, [])
+		if self._closed or self._expired(stream) or len(streams) >= self._size:
+			await self._retire(stream)
+		else:
+			streams.append(stream)
+
+	async def _retire(self, stream):
+		"""
+		Close stream. Errors are ignored.
+
+		:return None:
+		"""
+		if stream.wsconfig.closed:
+			return
+		try:
+			await self._ttsapi.close_synthes_stream(stream.wsconfig)
+		except (SPBaseError, aiohttp.ClientError, OSError, asyncio.TimeoutError):
+			pass
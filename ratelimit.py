@@ -0,0 +1,223 @@
+#!/usr/bin/env python
+
+"""
+Do it.
+"""
+
+# define metadata
+__all__ = ["RateLimiter"]
+
+# import modules and packages
+import time
+import asyncio
+
+from contextlib import asynccontextmanager
+
+class _TokenBucket(object):
+	"""
+	Token bucket with reservations.
+
+	Token is taken at once even if bucket is empty, caller waits returned
+	delay. So waiting callers are served in order of arrival without polling.
+	"""
+
+	__slots__ = ("rate", "burst", "tokens", "updated")
+
+	def __init__(self, rate, burst, now):
+		self.rate    = rate
+		self.burst   = burst
+		self.tokens  = burst
+		self.updated = now
+
+	def _refill(self, now):
+		"""
+		Add tokens for time passed since last update.
+		"""
+		self.tokens  = min(self.tokens + (now - self.updated) * self.rate, self.burst)
+		self.updated = now
+
+	def reserve(self, now):
+		"""
+		Take token and return delay in seconds until it's available.
+
+		:param float now:
+		    Current monotonic time.
+
+		:return float:
+		"""
+		self._refill(now)
+		self.tokens -= 1
+		return -self.tokens / self.rate if self.tokens < 0 else 0.0
+
+	def idle(self, now):
+		"""
+		Return True if bucket is full, so it may be forgotten.
+
+		:param float now:
+		    Current monotonic time.
+
+		:return bool:
+		"""
+		self._refill(now)
+		return self.tokens >= self.burst
+
+class RateLimiter(object):
+	"""
+	Client-side limiter of request rate to api.
+
+	Rate is limited by token buckets per session and per domain, number of
+	simultaneous requests is limited by ``max_in_flight``. Time spent waiting
+	in queue is counted, so fleet may be sized by it.
+	"""
+
+	# number of buckets after which full buckets are forgotten
+	_MAX_BUCKETS = 1024
+
+	def __init__(self, session_rate=None, session_burst=None, domain_rate=None, domain_burst=None, max_in_flight=None):
+		"""
+		Initialize rate limiter.
+
+		:keyword float session_rate:
+		    Requests per second for one session. If it is None, not limited.
+
+		:keyword int session_burst:
+		    Number of requests of one session that may be sent at once.
+		    If it is None, ``max(1, session_rate)`` used.
+
+		:keyword float domain_rate:
+		    Requests per second for all sessions of one domain. If it is None, not limited.
+
+		:keyword int domain_burst:
+		    Number of requests of one domain that may be sent at once.
+		    If it is None, ``max(1, domain_rate)`` used.
+
+		:keyword int max_in_flight:
+		    Max number of simultaneous requests. If it is None, not limited.
+		"""
+		self._session_rate  = session_rate
+		self._session_burst = session_burst if session_burst is not None else max(1, session_rate or 0)
+		self._domain_rate   = domain_rate
+		self._domain_burst  = domain_burst if domain_burst is not None else max(1, domain_rate or 0)
+		self._max_in_flight = max_in_flight
+		self._sessions      = {}
+		self._domains       = {}
+		self._semaphore     = None
+		self._in_flight     = 0
+		self._requests      = 0
+		self._delayed       = 0
+		self._wait_total    = 0.0
+		self._wait_max      = 0.0
+
+	def __repr__(self):
+		"""
+		Return repr(self).
+		"""
+		return "%s(session_rate=%r, session_burst=%r, domain_rate=%r, domain_burst=%r, max_in_flight=%r)" % (
+			self.__class__.__name__, self._session_rate, self._session_burst, self._domain_rate, self._domain_burst, self._max_in_flight
+		)
+
+	def _reserve(self, buckets, key, rate, burst, now):
+		"""
+		Take token from bucket of key and return delay until it's available.
+
+		:return float:
+		"""
+		if rate is None or key is None:
+			return 0.0
+		bucket = buckets.get(key)
+		if bucket is None:
+			if len(buckets) >= self._MAX_BUCKETS:
+				for old in [old for old, bucket in buckets.items() if bucket.idle(now)]:
+					del buckets[old]
+			bucket = buckets[key] = _TokenBucket(rate, burst, now)
+		return bucket.reserve(now)
+
+	@asynccontextmanager
+	async def acquire(self, session=None, domain_id=None):
+		"""
+		Return context manager that waits for permission to send request.
+
+		:keyword _Session session:
+		    SpeechPro session. If it is None, session rate is not limited.
+
+		:keyword int domain_id:
+		    Domain ID. If it is None, domain of session used.
+
+		:return float:
+		    Seconds spent waiting.
+		"""
+		if domain_id is None:
+			domain_id = getattr(session, "domain_id", None)
+		start = time.monotonic()
+		delay = max(
+			self._reserve(self._sessions, getattr(session, "session_id", None), self._session_rate, self._session_burst, start), 
+			self._reserve(self._domains, domain_id, self._domain_rate, self._domain_burst, start)
+		)
+		if delay > 0:
+			await asyncio.sleep(delay)
+
+		if self._max_in_flight is not None:
+			if self._semaphore is None:
+				self._semaphore = asyncio.Semaphore(self._max_in_flight)
+			await self._semaphore.acquire()
+
+		waited = time.monotonic() - start
+		self._requests += 1
+		self._wait_total += waited
+		self._wait_max = max(self._wait_max, waited)
+		if waited > 0.001:
+			self._delayed += 1
+
+		self._in_flight += 1
+		try:
+			yield waited
+		finally:
+			self._in_flight -= 1
+			if self._semaphore is not None:
+				self._semaphore.release()
+
+	def stats(self):
+		"""
+		Return limiter counters.
+
+		:return dict:
+		    Keys are ``requests``, ``delayed``, ``in_flight``, ``wait_total``, ``wait_avg`` and ``wait_max``.
+		"""
+		return {
+			"requests": self._requests,
+			"delayed": self._delayed,
+			"in_flight": self._in_flight,
+			"wait_total": self._wait_total,
+			"wait_avg": self._wait_total / self._requests if self._requests else 0.0,
+			"wait_max": self._wait_max,
+		}
+
+class _NoLimit(object):
+	"""
+	Context manager used when client has no rate limiter.
+	"""
+
+	async def __aenter__(self):
+		return 0.0
+
+	async def __aexit__(self, ex_type, ex_val, ex_traceback):
+		pass
+
+_NO_LIMIT = _NoLimit()
+
+def _acquire(limiter, session=None, domain_id=None):
+	"""
+	Return context manager that waits for permission of limiter.
+
+	:param RateLimiter limiter:
+	    Rate limiter. If it is None, request is not limited.
+
+	:keyword _Session session:
+	    SpeechPro session.
+
+	:keyword int domain_id:
+	    Domain ID.
+
+	:return object:
+	"""
+	return limiter.acquire(session, domain_id) if limiter is not None else _NO_LIMIT
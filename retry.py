@@ -0,0 +1,296 @@
+#!/usr/bin/env python
+
+"""
+Do it.
+"""
+
+# define metadata
+__all__ = ["RetryPolicy", "CircuitBreaker"]
+
+# import modules and packages
+import time
+import random
+import email.utils
+
+from speechapi.exceptions import *
+
+def _parse_retry_after(value):
+	"""
+	Return seconds from Retry-After header.
+
+	:param str value:
+	    Header value: number of seconds or HTTP date.
+
+	:return float or None:
+	"""
+	if not value:
+		return None
+	try:
+		return max(float(value), 0.0)
+	except ValueError:
+		pass
+	try:
+		date = email.utils.parsedate_to_datetime(value)
+	except (TypeError, ValueError, IndexError):
+		return None
+	if date is None:
+		return None
+	return max(date.timestamp() - time.time(), 0.0)
+
+class RetryPolicy(object):
+	"""
+	Policy of repeating failed requests to api.
+
+	Delays grow exponentially with full jitter, so clients that failed at the
+	same moment don't repeat requests at the same moment. Requests that are
+	not idempotent are repeated only if server surely didn't process them:
+	connection wasn't established or server answered with 429.
+	"""
+
+	def __init__(self, attempts=3, backoff=0.5, max_backoff=30, jitter=True, statuses=(429, 500, 502, 503, 504), 
+		idempotent_methods=("GET", "HEAD", "OPTIONS", "PUT", "DELETE"), max_retry_after=60):
+		"""
+		Initialize retry policy.
+
+		:keyword int attempts:
+		    Max number of attempts including first one. 1 means no retries.
+
+		:keyword float backoff:
+		    Delay in seconds before second attempt. It's doubled for every next attempt.
+
+		:keyword float max_backoff:
+		    Max delay in seconds between attempts.
+
+		:keyword bool jitter:
+		    If it is True, delay is random value between 0 and computed delay.
+
+		:keyword tuple statuses:
+		    Response statuses that may be retried.
+
+		:keyword tuple idempotent_methods:
+		    HTTP methods that are idempotent if request doesn't say otherwise.
+
+		:keyword float max_retry_after:
+		    Max delay in seconds taken from Retry-After header. Greater delays
+		    are not awaited and error is raised at once.
+		"""
+		if attempts < 1:
+			raise ValueError("number of attempts must be positive, not %r" % attempts)
+		self._attempts           = attempts
+		self._backoff            = backoff
+		self._max_backoff        = max_backoff
+		self._jitter             = jitter
+		self._statuses           = frozenset(statuses)
+		self._idempotent_methods = frozenset(method.upper() for method in idempotent_methods)
+		self._max_retry_after    = max_retry_after
+
+	def __repr__(self):
+		"""
+		Return repr(self).
+		"""
+		return "%s(attempts=%r, backoff=%r, max_backoff=%r, jitter=%r)" % (
+			self.__class__.__name__, self._attempts, self._backoff, self._max_backoff, self._jitter
+		)
+
+	attempts = property()
+
+	@attempts.getter
+	def attempts(self):
+		"""
+		Return max number of attempts.
+
+		:return int:
+		"""
+		return self._attempts
+
+	def is_idempotent(self, method):
+		"""
+		Return True if HTTP method is idempotent.
+
+		:param str method:
+		    HTTP method.
+
+		:return bool:
+		"""
+		return method.upper() in self._idempotent_methods
+
+	def delay(self, attempt, error, method, idempotent=None, connect_error=False):
+		"""
+		Return delay in seconds before next attempt or None if request must not be repeated.
+
+		:param int attempt:
+		    Number of failed attempt starting from 1.
+
+		:param APIRequestError error:
+		    Error of failed attempt.
+
+		:param str method:
+		    HTTP method.
+
+		:keyword bool idempotent:
+		    True if request may be repeated safely. If it is None, HTTP method decides.
+
+		:keyword bool connect_error:
+		    True if connection to server wasn't established.
+
+		:return float or None:
+		"""
+		if attempt >= self._attempts:
+			return None
+		if idempotent is None:
+			idempotent = self.is_idempotent(method)
+
+		if error.status is None:
+			if not (idempotent or connect_error):
+				return None
+		elif error.status not in self._statuses or not (idempotent or error.status == 429):
+			return None
+
+		if error.retry_after is not None:
+			if error.retry_after > self._max_retry_after:
+				return None
+			return error.retry_after
+
+		delay = min(self._backoff * 2 ** (attempt - 1), self._max_backoff)
+		return random.uniform(0, delay) if self._jitter else delay
+
+class _Circuit(object):
+	"""
+	State of circuit of one host.
+	"""
+
+	__slots__ = ("failures", "opened", "probing")
+
+	def __init__(self):
+		self.failures = 0
+		self.opened   = None
+		self.probing  = False
+
+class CircuitBreaker(object):
+	"""
+	Per-host circuit breaker.
+
+	After ``failure_threshold`` consecutive failures circuit of host is open
+	and requests fail at once with CircuitOpenError. After ``recovery_timeout``
+	one probe request is let through: its success closes circuit, its failure
+	opens it again.
+	"""
+
+	def __init__(self, failure_threshold=5, recovery_timeout=30):
+		"""
+		Initialize circuit breaker.
+
+		:keyword int failure_threshold:
+		    Number of consecutive failures that opens circuit.
+
+		:keyword float recovery_timeout:
+		    Seconds while circuit stays open.
+		"""
+		self._failure_threshold = failure_threshold
+		self._recovery_timeout  = recovery_timeout
+		self._circuits          = {}
+
+	def __repr__(self):
+		"""
+		Return repr(self).
+		"""
+		return "%s(failure_threshold=%r, recovery_timeout=%r)" % (
+			self.__class__.__name__, self._failure_threshold, self._recovery_timeout
+		)
+
+	def state(self, host):
+		"""
+		Return state of host circuit: ``closed``, ``open`` or ``half-open``.
+
+		:param str host:
+		    Host.
+
+		:return str:
+		"""
+		circuit = self._circuits.get(host)
+		if circuit is None or circuit.opened is None:
+			return "closed"
+		if circuit.probing or time.monotonic() - circuit.opened >= self._recovery_timeout:
+			return "half-open"
+		return "open"
+
+	def check(self, host):
+		"""
+		Check that request to host may be sent.
+
+		:param str host:
+		    Host.
+
+		:return bool:
+		    True if request is probe of half-open circuit. Probe must be
+		    finished by ``success``, ``failure`` or ``release``.
+
+		:except CircuitOpenError:
+		    If circuit of host is open.
+		"""
+		circuit = self._circuits.get(host)
+		if circuit is None or circuit.opened is None:
+			return False
+		remaining = self._recovery_timeout - (time.monotonic() - circuit.opened)
+		if remaining <= 0 and not circuit.probing:
+			circuit.probing = True
+			return True
+		raise CircuitOpenError(
+			"Circuit of %s is open after %d failures" % (host, circuit.failures), 
+			retry_after=max(remaining, 0.0)
+		)
+
+	def success(self, host):
+		"""
+		Register successful request to host.
+
+		:param str host:
+		    Host.
+
+		:return None:
+		"""
+		self._circuits.pop(host, None)
+
+	def failure(self, host):
+		"""
+		Register failed request to host.
+
+		:param str host:
+		    Host.
+
+		:return None:
+		"""
+		circuit = self._circuits.get(host)
+		if circuit is None:
+			circuit = self._circuits[host] = _Circuit()
+		circuit.failures += 1
+		if circuit.probing or circuit.failures >= self._failure_threshold:
+			circuit.opened  = time.monotonic()
+			circuit.probing = False
+
+	def release(self, host):
+		"""
+		Finish probe of host that ended without result, so next request probes again.
+
+		:param str host:
+		    Host.
+
+		:return None:
+		"""
+		circuit = self._circuits.get(host)
+		if circuit is not None:
+			circuit.probing = False
+
+	def reset(self, host=None):
+		"""
+		Close circuit of host.
+
+		:keyword str host:
+		    Host. If it is None, all circuits are closed.
+
+		:return None:
+		"""
+		if host is None:
+			self._circuits.clear()
+		else:
+			self._circuits.pop(host, None)
@@ -5,6 +5,7 @@ Do it.
 """
 
 # import modules and packages
+import time
 import speechapi
 from urllib.parse import urlparse
 from speechapi.exceptions import *
@@ -14,13 +15,16 @@ class _Session(object):
 	SpeechPro session.
 	"""	
 	
-	def __init__(self, api_json):
+	def __init__(self, api_json, domain_id=None):
 		"""
 		Initialize SpeechPro session.
 		
 		:param dict api_json:
 		    API JSON response.
 			
+		:keyword int domain_id:
+		    Domain ID that session was created for.
+			
 		:except APIResponseError:
 		    If session id is missing.
 		"""
@@ -29,7 +33,9 @@ class _Session(object):
 		except KeyError:
 			raise APIResponseError("session id is missing", key="session_id")
 		
+		self._domain_id = domain_id
 		self._is_active = self.session_id != ""
+		self._status_time = None
 	
 	def __str__(self):
 		"""
@@ -56,12 +62,35 @@ class _Session(object):
 		sesapi = speechapi.SessionApi()
 		await sesapi.session_delete(self)
 	
-	async def update_status(self):
+	async def update_status(self, ttl=None):
+		"""
+		Update session status.
+		
+		:keyword float ttl:
+		    If it is not None and session status was checked less than ``ttl``
+		    seconds ago, status is not requested.
+			
+		:return bool:
+		"""
 		sesapi = speechapi.SessionApi()
-		self._is_active = await sesapi.session_status(self)
+		return await sesapi.session_status(self, ttl=ttl)
+		
+	def _set_active(self, is_active):
+		"""
+		Set session status and remember time of it.
+		
+		:param bool is_active:
+		    Session status.
+			
+		:return None:
+		"""
+		self._is_active = is_active
+		self._status_time = time.monotonic()
 	
 	session_id = property()
+	domain_id = property()
 	is_active = property()
+	status_age = property()
 	
 	@session_id.getter
 	def session_id(self):
@@ -72,6 +101,15 @@ class _Session(object):
 		"""
 		return self._session_id
 		
+	@domain_id.getter
+	def domain_id(self):
+		"""
+		Return domain id or None if it is unknown.
+		
+		:return int or None:
+		"""
+		return self._domain_id
+		
 	@is_active.getter
 	def is_active(self):
 		"""
@@ -81,12 +119,23 @@ class _Session(object):
 		"""
 		return self._is_active
 		
+	@status_age.getter
+	def status_age(self):
+		"""
+		Return seconds since session status was known from api or None if it was never known.
+		
+		:return float or None:
+		"""
+		if self._status_time is None:
+			return None
+		return time.monotonic() - self._status_time
+		
 class _WsConfiguration(object):
 	"""
 	Configuration of web socket connection for synthes.
 	"""
 	
-	def __init__(self, api_json, session):
+	def __init__(self, api_json, session, voice=None, closer=None):
 		"""
 		Initialize web socket configuration.
 		
@@ -96,6 +145,13 @@ class _WsConfiguration(object):
 		:param _Session sesion:
 		    SpeechPro session that was be used for open stream synthes.
 			
+		:keyword str or _Voice voice:
+		    SpeechPro voice that was be used for open stream synthes.
+			
+		:keyword function closer:
+		    Coroutine function that takes configuration and closes stream.
+		    If it is None, stream is closed as synthes stream.
+			
 		:except APIResponseError:
 		    If web socket url is missing.
 			
@@ -112,6 +168,10 @@ class _WsConfiguration(object):
 		except:
 			raise APIResponseError("transaction id is missing or invalid", key="url")
 		self._session = session
+		self._voice = voice
+		self._closer = closer
+		self._closed = False
+		self._ws = None
 	
 	async def __aenter__(self):
 		"""
@@ -123,12 +183,40 @@ class _WsConfiguration(object):
 		"""
 		Close self.
 		"""
-		ttsapi = speechapi.TTSApi()
-		await ttsapi.close_synthes_stream(self)
+		if self._closed:
+			return
+		await self._close_ws()
+		if self._closer is not None:
+			await self._closer(self)
+		else:
+			ttsapi = speechapi.TTSApi()
+			await ttsapi.close_synthes_stream(self)
+	
+	def _take_ws(self):
+		"""
+		Return pre-opened web socket connection and forget it.
+		
+		:return aiohttp.ClientWebSocketResponse or None:
+		    Open connection or None if there is no one.
+		"""
+		ws, self._ws = self._ws, None
+		if ws is not None and ws.closed:
+			return None
+		return ws
+		
+	async def _close_ws(self):
+		"""
+		Close pre-opened web socket connection if it is.
+		"""
+		ws, self._ws = self._ws, None
+		if ws is not None and not ws.closed:
+			await ws.close()
 	
 	url = property()
 	transaction_id = property()
 	session = property()
+	voice = property()
+	closed = property()
 	
 	@url.getter
 	def url(self):
@@ -150,4 +238,18 @@ class _WsConfiguration(object):
 		Return session.
 		"""
 		return self._session
+		
+	@voice.getter
+	def voice(self):
+		"""
+		Return voice or None if it is unknown.
+		"""
+		return self._voice
+		
+	@closed.getter
+	def closed(self):
+		"""
+		Return True if stream was closed.
+		"""
+		return self._closed
 	
@@ -0,0 +1,197 @@
+#!/usr/bin/env python
+
+"""
+Do it.
+"""
+
+# define metadata
+__all__ = ["IdleTimeout", "AdaptiveTimeout"]
+
+# import modules and packages
+import asyncio
+import aiohttp
+
+_END_TYPES = (aiohttp.WSMsgType.CLOSE, aiohttp.WSMsgType.CLOSING, aiohttp.WSMsgType.CLOSED, aiohttp.WSMsgType.ERROR)
+
+class IdleTimeout(object):
+	"""
+	Fixed timeout of silence after which web socket stream is considered finished.
+	"""
+
+	def __init__(self, timeout=2, first_timeout=None):
+		"""
+		Initialize idle timeout.
+
+		:keyword float timeout:
+		    Seconds of silence after last received frame.
+
+		:keyword float first_timeout:
+		    Seconds of waiting for first frame. If it is None, ``timeout`` used.
+		"""
+		self._timeout = timeout
+		self._first_timeout = first_timeout if first_timeout is not None else timeout
+
+	def __repr__(self):
+		"""
+		Return repr(self).
+		"""
+		return "%s(timeout=%r, first_timeout=%r)" % (self.__class__.__name__, self._timeout, self._first_timeout)
+
+	def get(self, frames):
+		"""
+		Return current timeout in seconds.
+
+		:param int frames:
+		    Number of frames received from stream.
+
+		:return float:
+		"""
+		return self._timeout if frames else self._first_timeout
+
+	def observe(self, gap):
+		"""
+		Register gap between two frames.
+
+		:param float gap:
+		    Seconds between two received frames.
+
+		:return None:
+		"""
+		pass
+
+class AdaptiveTimeout(IdleTimeout):
+	"""
+	Timeout of silence derived from observed gaps between frames.
+
+	Timeout is ``factor`` times the largest recent gap, clamped to
+	``[minimum, maximum]``. Largest gap decays slowly, so single slow frame
+	doesn't inflate timeout forever. Statistics are kept between streams, so
+	one instance may be shared by streams of the same voice.
+	"""
+
+	def __init__(self, factor=3, minimum=0.25, maximum=10, first_timeout=10, decay=0.9):
+		"""
+		Initialize adaptive timeout.
+
+		:keyword float factor:
+		    Multiplier of largest recent gap.
+
+		:keyword float minimum:
+		    Min timeout in seconds.
+
+		:keyword float maximum:
+		    Max timeout in seconds. It is used until first gap observed.
+
+		:keyword float first_timeout:
+		    Seconds of waiting for first frame.
+
+		:keyword float decay:
+		    Multiplier of largest gap applied on every observed gap.
+		"""
+		super().__init__(maximum, first_timeout)
+		self._factor  = factor
+		self._minimum = minimum
+		self._maximum = maximum
+		self._decay   = decay
+		self._peak    = None
+
+	def __repr__(self):
+		"""
+		Return repr(self).
+		"""
+		return "%s(factor=%r, minimum=%r, maximum=%r, first_timeout=%r, decay=%r)" % (
+			self.__class__.__name__, self._factor, self._minimum, self._maximum, self._first_timeout, self._decay
+		)
+
+	def get(self, frames):
+		"""
+		Return current timeout in seconds.
+
+		:param int frames:
+		    Number of frames received from stream.
+
+		:return float:
+		"""
+		if not frames:
+			return self._first_timeout
+		if self._peak is None:
+			return self._maximum
+		return min(max(self._factor * self._peak, self._minimum), self._maximum)
+
+	def observe(self, gap):
+		"""
+		Register gap between two frames.
+
+		:param float gap:
+		    Seconds between two received frames.
+
+		:return None:
+		"""
+		self._peak = gap if self._peak is None else max(gap, self._peak * self._decay)
+
+def _idle_timeout(idle_timeout):
+	"""
+	Return IdleTimeout for number of seconds or IdleTimeout as is.
+
+	:param float or IdleTimeout idle_timeout:
+	    Seconds or IdleTimeout. None means no timeout.
+
+	:return IdleTimeout or None:
+	"""
+	if idle_timeout is not None and not isinstance(idle_timeout, IdleTimeout):
+		idle_timeout = IdleTimeout(idle_timeout)
+	return idle_timeout
+
+async def _duplex(ws, send, idle_timeout, ended=None):
+	"""
+	Run sending to web socket in separate task and yield received messages.
+
+	Receiving stops when server closes web socket or when nothing is received
+	during idle timeout after both last frame and end of sending.
+
+	:param aiohttp.ClientWebSocketResponse ws:
+	    Web socket.
+
+	:param function send:
+	    Coroutine function without arguments that sends data to web socket.
+
+	:param IdleTimeout idle_timeout:
+	    End of stream detection. If it is None, only server closing ends stream.
+
+	:keyword dict ended:
+	    If it is dict, key ``closed`` is set to True when server closed web
+	    socket normally and to False when stream ended by timeout or error.
+
+	:return generator of aiohttp.WSMessage:
+	"""
+	sender = asyncio.ensure_future(send())
+	loop = asyncio.get_running_loop()
+	frames, last_time, sent = 0, None, []
+	sender.add_done_callback(lambda task: sent.append(loop.time()))
+	if ended is not None: ended["closed"] = False
+	try:
+		while True:
+			timeout = idle_timeout.get(frames) if idle_timeout is not None else None
+			if timeout is not None and sent:
+				# silence is counted from last frame or end of sending, whichever is later
+				timeout -= loop.time() - max(sent[0], last_time or sent[0])
+				if timeout <= 0: break
+
+			try: msg = await ws.receive(timeout=timeout)
+			except asyncio.TimeoutError: continue
+
+			if msg.type in _END_TYPES:
+				if ended is not None:
+					ended["closed"] = msg.type != aiohttp.WSMsgType.ERROR and ws.close_code == aiohttp.WSCloseCode.OK
+				break
+
+			now = loop.time()
+			if last_time is not None and idle_timeout is not None:
+				idle_timeout.observe(now - last_time)
+			frames, last_time = frames + 1, now
+			yield msg
+
+		# raise errors of sending
+		await sender
+	finally:
+		sender.cancel()
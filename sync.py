@@ -0,0 +1,326 @@
+#!/usr/bin/env python
+
+"""
+Do it.
+"""
+
+# define metadata
+__all__ = ["SyncClient"]
+
+# import modules and packages
+import asyncio
+import threading
+import speechapi
+
+async def _await(awaitable):
+	"""
+	Return result of awaitable as coroutine.
+	"""
+	return await awaitable
+
+class SyncClient(object):
+	"""
+	Thread-safe synchronous client of SpeechPro API.
+
+	All API calls run in one event loop of background thread, so connection
+	pool and caches of APIs are shared by all calling threads and calls from
+	different threads are executed concurrently.
+	"""
+
+	def __init__(self, sesapi=None, ttsapi=None, recapi=None, timeout=None):
+		"""
+		Initialize synchronous client.
+
+		:keyword SessionApi sesapi:
+		    Session API. If it is None, default SessionApi used.
+
+		:keyword TTSApi ttsapi:
+		    TTS API. If it is None, default TTSApi used.
+
+		:keyword RecognizeApi recapi:
+		    ASR API. If it is None, default RecognizeApi used.
+
+		:keyword float timeout:
+		    Max seconds of waiting for result of one call.
+		    If it is None, calls wait without limit.
+		"""
+		self._sesapi  = sesapi if sesapi is not None else speechapi.SessionApi()
+		self._ttsapi  = ttsapi if ttsapi is not None else speechapi.TTSApi()
+		self._recapi  = recapi if recapi is not None else speechapi.RecognizeApi()
+		self._timeout = timeout
+		self._lock    = threading.Lock()
+		self._loop    = None
+		self._thread  = None
+		self._closing = False
+
+	def __str__(self):
+		"""
+		Return str(self).
+		"""
+		return '<%s running=%r>' % (self.__class__.__name__, self.running)
+
+	def __repr__(self):
+		"""
+		Return repr(self).
+		"""
+		return "%s(timeout=%r)" % (self.__class__.__name__, self._timeout)
+
+	def __enter__(self):
+		"""
+		Return self.
+		"""
+		return self
+
+	def __exit__(self, ex_type, ex_val, ex_traceback):
+		"""
+		Close self.
+		"""
+		self.close()
+
+	sesapi = property()
+	ttsapi = property()
+	recapi = property()
+	running = property()
+
+	@sesapi.getter
+	def sesapi(self):
+		"""
+		Return session API.
+
+		:return SessionApi:
+		"""
+		return self._sesapi
+
+	@ttsapi.getter
+	def ttsapi(self):
+		"""
+		Return TTS API.
+
+		:return TTSApi:
+		"""
+		return self._ttsapi
+
+	@recapi.getter
+	def recapi(self):
+		"""
+		Return ASR API.
+
+		:return RecognizeApi:
+		"""
+		return self._recapi
+
+	@running.getter
+	def running(self):
+		"""
+		Return True if background event loop is running.
+
+		:return bool:
+		"""
+		return self._thread is not None and self._thread.is_alive()
+
+	def _get_loop(self):
+		"""
+		Return event loop of background thread, start it on first call.
+
+		Lock must be held by caller.
+
+		:return asyncio.AbstractEventLoop:
+		"""
+		if self._loop is None:
+			loop = asyncio.new_event_loop()
+			thread = threading.Thread(target=loop.run_forever, name="speechapi-loop", daemon=True)
+			thread.start()
+			self._loop, self._thread = loop, thread
+		return self._loop
+
+	def submit(self, coro):
+		"""
+		Run coroutine in background event loop without waiting for its result.
+
+		:param coroutine coro:
+		    Coroutine.
+
+		:return concurrent.futures.Future:
+
+		:except RuntimeError:
+		    If it's called from event loop of client or while client is closing.
+		"""
+		with self._lock:
+			if threading.current_thread() is self._thread:
+				coro.close()
+				raise RuntimeError("SyncClient can't be called from its own event loop")
+			if self._closing:
+				coro.close()
+				raise RuntimeError("SyncClient is closing")
+			# scheduled under lock, so closing sees every submitted call
+			return asyncio.run_coroutine_threadsafe(coro, self._get_loop())
+
+	def run(self, coro):
+		"""
+		Run coroutine in background event loop and return its result.
+
+		:param coroutine coro:
+		    Coroutine.
+
+		:return object:
+
+		:except concurrent.futures.TimeoutError:
+		    If result isn't ready in ``timeout`` seconds.
+
+		:except concurrent.futures.CancelledError:
+		    If client is closed before result is ready.
+		"""
+		future = self.submit(coro)
+		try:
+			return future.result(self._timeout)
+		except BaseException:
+			future.cancel()
+			raise
+
+	def _iterate(self, agen):
+		"""
+		Return generator over async generator running in background event loop.
+
+		:param async_generator agen:
+		    Async generator.
+
+		:return generator:
+		"""
+		try:
+			while True:
+				try:
+					item = self.run(_await(agen.__anext__()))
+				except StopAsyncIteration:
+					return
+				yield item
+		finally:
+			if self.running and not self._closing:
+				self.run(agen.aclose())
+
+	def close(self):
+		"""
+		Close HTTP clients of APIs and stop background event loop.
+
+		Calls that are not finished yet are cancelled. Client may be used
+		after closing, new event loop will be started on demand.
+
+		:return None:
+		"""
+		with self._lock:
+			loop, thread = self._loop, self._thread
+			if loop is None or self._closing:
+				return
+			self._closing = True
+		async def aclose():
+			# nobody waits for result of call after loop is stopped
+			tasks = [task for task in asyncio.all_tasks() if task is not asyncio.current_task()]
+			for task in tasks:
+				task.cancel()
+			await asyncio.gather(*tasks, return_exceptions=True)
+			for api in (self._sesapi, self._ttsapi, self._recapi):
+				await api.aclose()
+		try:
+			asyncio.run_coroutine_threadsafe(aclose(), loop).result(self._timeout)
+		finally:
+			loop.call_soon_threadsafe(loop.stop)
+			thread.join()
+			loop.close()
+			with self._lock:
+				self._loop = self._thread = None
+				self._closing = False
+
+	def session_create(self, domain_id, login, password):
+		"""
+		Create session. See ``SessionApi.session_create``.
+
+		:return _Session:
+		"""
+		return self.run(self._sesapi.session_create(domain_id, login, password))
+
+	def session_delete(self, session):
+		"""
+		Delete session. See ``SessionApi.session_delete``.
+
+		:return None:
+		"""
+		return self.run(self._sesapi.session_delete(session))
+
+	def session_status(self, session, ttl=None):
+		"""
+		Return session status. See ``SessionApi.session_status``.
+
+		:return bool:
+		"""
+		return self.run(self._sesapi.session_status(session, ttl=ttl))
+
+	def get_languages(self, session, **kwargs):
+		"""
+		Return available languages. See ``TTSApi.get_languages``.
+
+		:return _Languages:
+		"""
+		return self.run(self._ttsapi.get_languages(session, **kwargs))
+
+	def get_voices(self, session, lang, **kwargs):
+		"""
+		Return available voices of language. See ``TTSApi.get_voices``.
+
+		:return _Voices:
+		"""
+		return self.run(self._ttsapi.get_voices(session, lang, **kwargs))
+
+	def package_synthes(self, text, session, voice, **kwargs):
+		"""
+		Package text-to-speech synthes. See ``TTSApi.package_synthes``.
+
+		:return str or bytes or int:
+		"""
+		return self.run(self._ttsapi.package_synthes(text, session, voice, **kwargs))
+
+	def synthesize_many(self, texts, session, voice, **kwargs):
+		"""
+		Return generator of package syntheses of many texts. See ``TTSApi.synthesize_many``.
+
+		:return generator of _SynthesResult:
+		"""
+		return self._iterate(self._ttsapi.synthesize_many(texts, session, voice, **kwargs))
+
+	def open_synthes_stream(self, session, voice):
+		"""
+		Open text-to-speech stream. See ``TTSApi.open_synthes_stream``.
+
+		:return _WsConfiguration:
+		"""
+		return self.run(self._ttsapi.open_synthes_stream(session, voice))
+
+	def close_synthes_stream(self, wsconfig):
+		"""
+		Close text-to-speech stream. See ``TTSApi.close_synthes_stream``.
+
+		:return int or None:
+		"""
+		return self.run(self._ttsapi.close_synthes_stream(wsconfig))
+
+	def stream_synthes(self, text, wsconfig, **kwargs):
+		"""
+		Return generator of stream text-to-speech synthes chunks. See ``TTSApi.stream_synthes``.
+
+		:return generator:
+		"""
+		return self._iterate(self._ttsapi.stream_synthes(text, wsconfig, **kwargs))
+
+	def stream_synthes_to(self, text, wsconfig, out, **kwargs):
+		"""
+		Stream text-to-speech synthes to WAV file. See ``TTSApi.stream_synthes_to``.
+
+		:return int:
+		"""
+		return self.run(self._ttsapi.stream_synthes_to(text, wsconfig, out, **kwargs))
+
+	def recognize(self, audio, session, package_id, **kwargs):
+		"""
+		Offline speech recognition. See ``RecognizeApi.recognize``.
+
+		:return dict:
+		"""
+		return self.run(self._recapi.recognize(audio, session, package_id, **kwargs))
@@ -0,0 +1,83 @@
+import time
+import asyncio
+import argparse
+import tracemalloc
+
+import speechapi
+
+from mock_server import MockSpeechProServer
+
+def percentile(values, p):
+	values = sorted(values)
+	return values[min(int(p * len(values)), len(values) - 1)] if values else 0.0
+	
+async def measure(name, func, requests, concurrency):
+	"""
+	Call ``func()`` ``requests`` times with ``concurrency`` simultaneous calls and print report.
+	"""
+	latencies = []
+	semaphore = asyncio.Semaphore(concurrency)
+	
+	async def call():
+		async with semaphore:
+			start = time.perf_counter()
+			await func()
+			latencies.append(time.perf_counter() - start)
+			
+	tracemalloc.start()
+	tracemalloc.reset_peak()
+	start = time.perf_counter()
+	await asyncio.gather(*[call() for _ in range(requests)])
+	elapsed = time.perf_counter() - start
+	current, peak = tracemalloc.get_traced_memory()
+	tracemalloc.stop()
+	
+	print("%-28s %8.1f req/s   p50 %7.2f ms   p99 %7.2f ms   peak mem %8.1f KiB" % (
+		name, requests / elapsed, percentile(latencies, 0.5) * 1000, percentile(latencies, 0.99) * 1000, peak / 1024
+	))
+	return latencies
+	
+async def main(args):
+	async with MockSpeechProServer(latency=args.latency, audio_size=args.payload, stream_chunks=args.chunks):
+		sesapi = speechapi.SessionApi()
+		ttsapi = speechapi.TTSApi(catalog_cache=speechapi.CatalogCache(), synthes_cache=False, memory_cache=False)
+		session = await sesapi.session_create(1, "login", "password")
+		
+		async def session_status():
+			await sesapi.session_status(session)
+			
+		async def get_voices():
+			await ttsapi.get_voices(session, "Russian", use_cache=False)
+			
+		async def get_voices_cached():
+			await ttsapi.get_voices(session, "Russian")
+			
+		async def package_synthes():
+			await ttsapi.package_synthes("Benchmark text", session, "Alexander", bin=True, use_cache=False)
+			
+		async def stream_synthes():
+			async with await ttsapi.open_synthes_stream(session, "Alexander") as wsconfig:
+				async for chunk in ttsapi.stream_synthes("Benchmark text", wsconfig, idle_timeout=args.idle_timeout, use_cache=False):
+					pass
+					
+		print("requests %d, concurrency %d, latency %.1f ms, payload %d bytes, JSON backend %s" % (
+			args.requests, args.concurrency, args.latency * 1000, args.payload, speechapi.jsonlib.get_backend()
+		))
+		await measure("SessionApi.session_status", session_status, args.requests, args.concurrency)
+		await measure("TTSApi.get_voices", get_voices, args.requests, args.concurrency)
+		await measure("TTSApi.get_voices (cached)", get_voices_cached, args.requests, args.concurrency)
+		await measure("TTSApi.package_synthes", package_synthes, args.requests, args.concurrency)
+		await measure("TTSApi.stream_synthes", stream_synthes, max(args.requests // 10, 1), args.concurrency)
+		
+		await sesapi.session_delete(session)
+		await sesapi.aclose()
+		
+if __name__ == "__main__":
+	parser = argparse.ArgumentParser(description="Benchmark of speechapi client against local mock server")
+	parser.add_argument("--requests", type=int, default=1000)
+	parser.add_argument("--concurrency", type=int, default=50)
+	parser.add_argument("--latency", type=float, default=0, help="server latency in seconds")
+	parser.add_argument("--payload", type=int, default=64000, help="size of synthesized audio in bytes")
+	parser.add_argument("--chunks", type=int, default=4, help="number of audio chunks of stream")
+	parser.add_argument("--idle-timeout", type=float, default=0.2, help="idle timeout of streams in seconds")
+	asyncio.run(main(parser.parse_args()))
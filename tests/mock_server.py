@@ -0,0 +1,209 @@
+import json
+import uuid
+import base64
+import asyncio
+import argparse
+
+from aiohttp import web
+
+import speechapi
+import speechapi.wav
+
+class MockSpeechProServer(object):
+	"""
+	Local stand-in of SpeechPro session, TTS and ASR api.
+	
+	Every handler waits ``latency`` seconds, so network round-trips may be
+	simulated. Synthesized audio is silence of ``audio_size`` bytes.
+	"""
+	
+	def __init__(self, host="127.0.0.1", port=0, latency=0, audio_size=32000, stream_chunks=4, stream_chunk_delay=0, close_streams=False):
+		self.host               = host
+		self.port               = port
+		self.latency            = latency
+		self.audio_size         = audio_size
+		self.stream_chunks      = stream_chunks
+		self.stream_chunk_delay = stream_chunk_delay
+		self.close_streams      = close_streams
+		self.streams            = 0
+		self.sessions           = {}
+		self.packages           = {}
+		self.requests           = 0
+		self._runner            = None
+		self._prefixes          = None
+		
+		self.app = web.Application(client_max_size=1024 ** 3, middlewares=[self._middleware])
+		self.app.router.add_route("*", "/vksession/rest/session", self.session)
+		self.app.router.add_get("/vktts/rest/v1/languages", self.languages)
+		self.app.router.add_get("/vktts/rest/v1/languages/{lang}/voices", self.voices)
+		self.app.router.add_post("/vktts/rest/v1/synthesize", self.synthesize)
+		self.app.router.add_route("*", "/vktts/rest/v1/synthesize/stream", self.synthesize_stream)
+		self.app.router.add_get("/vktts/rest/v1/synthesize/stream/{transaction_id}", self.synthesize_ws)
+		self.app.router.add_get("/vkasr/rest/v1/packages/available", self.packages_available)
+		self.app.router.add_get("/vkasr/rest/v1/packages/{package_id}/load", self.package_load)
+		self.app.router.add_get("/vkasr/rest/v1/packages/{package_id}/unload", self.package_unload)
+		self.app.router.add_post("/vkasr/rest/v1/recognize", self.recognize)
+		self.app.router.add_post("/vkasr/rest/v1/recognize/words", self.recognize)
+		self.app.router.add_post("/vkasr/rest/v1/recognize/advanced", self.recognize)
+		self.app.router.add_route("*", "/vkasr/rest/v1/recognize/stream", self.recognize_stream)
+		self.app.router.add_get("/vkasr/rest/v1/recognize/stream/{transaction_id}", self.recognize_ws)
+		
+		self.audio = speechapi.wav._header(22050, 1, 2, audio_size) + bytes(audio_size)
+		
+	@property
+	def url(self):
+		return "http://%s:%d" % (self.host, self.port)
+		
+	async def start(self):
+		self._runner = web.AppRunner(self.app)
+		await self._runner.setup()
+		site = web.TCPSite(self._runner, self.host, self.port)
+		await site.start()
+		# real port if it was 0
+		self.port = self._runner.addresses[0][1]
+		
+	async def stop(self):
+		self.uninstall()
+		if self._runner is not None:
+			await self._runner.cleanup()
+			self._runner = None
+			
+	async def __aenter__(self):
+		await self.start()
+		self.install()
+		return self
+		
+	async def __aexit__(self, ex_type, ex_val, ex_traceback):
+		await self.stop()
+		
+	def install(self):
+		"""
+		Point SpeechPro APIs to mock server.
+		"""
+		if self._prefixes is None:
+			self._prefixes = {cls: cls._api_prefix for cls in (speechapi.SessionApi, speechapi.TTSApi, speechapi.RecognizeApi)}
+		speechapi.SessionApi._api_prefix   = self.url + "/vksession/rest"
+		speechapi.TTSApi._api_prefix       = self.url + "/vktts/rest"
+		speechapi.RecognizeApi._api_prefix = self.url + "/vkasr/rest"
+		
+	def uninstall(self):
+		"""
+		Point SpeechPro APIs back to real api.
+		"""
+		if self._prefixes is not None:
+			for cls, prefix in self._prefixes.items():
+				cls._api_prefix = prefix
+			self._prefixes = None
+			
+	@web.middleware
+	async def _middleware(self, request, handler):
+		self.requests += 1
+		if self.latency:
+			await asyncio.sleep(self.latency)
+		return await handler(request)
+		
+	def _check_session(self, request):
+		session_id = request.headers.get("x-session-id")
+		if not self.sessions.get(session_id):
+			raise web.HTTPUnauthorized(
+				text=json.dumps({"reason": "SESSION_NOT_FOUND", "message": "session is not found"}), 
+				content_type="application/json"
+			)
+		return session_id
+		
+	def _ws_url(self, path):
+		return "ws://%s:%d%s/%s" % (self.host, self.port, path, uuid.uuid4().hex)
+		
+	async def session(self, request):
+		if request.method == "POST":
+			session_id = uuid.uuid4().hex
+			self.sessions[session_id] = True
+			return web.json_response({"session_id": session_id})
+		session_id = request.headers.get("x-session-id")
+		if request.method == "DELETE":
+			self.sessions[session_id] = False
+			return web.Response(status=204)
+		return web.json_response({"is_active": bool(self.sessions.get(session_id))})
+		
+	async def languages(self, request):
+		self._check_session(request)
+		return web.json_response([{"id": 1, "name": "Russian"}, {"id": 2, "name": "English"}])
+		
+	async def voices(self, request):
+		self._check_session(request)
+		return web.json_response([
+			{"id": 1, "name": "Alexander", "gender": "male"}, 
+			{"id": 2, "name": "Alexander8000", "gender": "male"}, 
+			{"id": 3, "name": "Anna", "gender": "female"}, 
+		])
+		
+	async def synthesize(self, request):
+		self._check_session(request)
+		await request.read()
+		return web.json_response({"data": base64.b64encode(self.audio).decode("ascii")})
+		
+	async def synthesize_stream(self, request):
+		self._check_session(request)
+		if request.method == "POST":
+			return web.json_response({"url": self._ws_url("/vktts/rest/v1/synthesize/stream")})
+		return web.json_response({"synthesize_text_size": 0})
+		
+	async def synthesize_ws(self, request):
+		ws = web.WebSocketResponse()
+		await ws.prepare(request)
+		size = -(-self.audio_size // max(self.stream_chunks, 1))
+		self.streams += 1
+		async for msg in ws:
+			for offset in range(0, self.audio_size, size):
+				if self.stream_chunk_delay:
+					await asyncio.sleep(self.stream_chunk_delay)
+				await ws.send_bytes(self.audio[speechapi.wav._HEADER_SIZE + offset:speechapi.wav._HEADER_SIZE + offset + size])
+			if self.close_streams:
+				await ws.close()
+		return ws
+		
+	async def packages_available(self, request):
+		self._check_session(request)
+		return web.json_response([{"id": "IvrRus"}, {"id": "TelecomEsp"}])
+		
+	async def package_load(self, request):
+		self._check_session(request)
+		self.packages[request.match_info["package_id"]] = True
+		return web.Response()
+		
+	async def package_unload(self, request):
+		self._check_session(request)
+		self.packages[request.match_info["package_id"]] = False
+		return web.Response()
+		
+	async def recognize(self, request):
+		self._check_session(request)
+		req = json.loads(await request.read())
+		data = req["audio"]["data"] if "audio" in req else req["data"]
+		return web.json_response({"text": "mock recognized text", "score": 1.0, "audio_size": len(base64.b64decode(data))})
+		
+	async def recognize_stream(self, request):
+		self._check_session(request)
+		if request.method == "POST":
+			return web.json_response({"url": self._ws_url("/vkasr/rest/v1/recognize/stream")})
+		return web.json_response({"text": "mock recognized text"})
+		
+	async def recognize_ws(self, request):
+		ws = web.WebSocketResponse()
+		await ws.prepare(request)
+		received = 0
+		async for msg in ws:
+			received += len(msg.data)
+			await ws.send_str(json.dumps({"text": "mock %d bytes" % received}))
+		return ws
+		
+if __name__ == "__main__":
+	parser = argparse.ArgumentParser(description="Local stand-in of SpeechPro api")
+	parser.add_argument("--host", default="127.0.0.1")
+	parser.add_argument("--port", type=int, default=8765)
+	parser.add_argument("--latency", type=float, default=0)
+	parser.add_argument("--audio-size", type=int, default=32000)
+	args = parser.parse_args()
+	
+	server = MockSpeechProServer(args.host, args.port, latency=args.latency, audio_size=args.audio_size)
+	web.run_app(server.app, host=args.host, port=args.port)
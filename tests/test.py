@@ -2,7 +2,6 @@ import os
 import asyncio
 
 from speechapi import *
-import wave
 
 if __name__ == "__main__":
 	loop = asyncio.get_event_loop()
@@ -63,17 +62,8 @@ if __name__ == "__main__":
 		async with session:
 			wsconfig = await ttsapi.open_synthes_stream(session, "Alexander")
 			
-			fulldata = b""
 			async with wsconfig:
-				async for bin_data in ttsapi.stream_synthes("""Для потокового распознавания требуется создать подключение по протоколу Websocket. Для этого направить POST-запрос на URL v1/synthesize/stream, передав в запросе формат синтезированного аудио и информацию о голосе. Результатом выполнения запроса является ссылка для подключения по протоколу Websocket. После установления подключения, можно отправлять текстовые данные на сервер, а в ответ получать PCM в бинарном виде.""", wsconfig):
-					fulldata += bin_data
-					
-			with wave.open(os.path.join(os.path.dirname(__file__), "stream_synthes.wav"), "wb") as f:
-				# f.setparams((1, 2, 22050, 0, 'NONE', 'not compressed'))
-				f.setnchannels(1)
-				f.setsampwidth(2)
-				f.setframerate(22050)
-				f.writeframes(fulldata)
+				await ttsapi.stream_synthes_to("""Для потокового распознавания требуется создать подключение по протоколу Websocket. Для этого направить POST-запрос на URL v1/synthesize/stream, передав в запросе формат синтезированного аудио и информацию о голосе. Результатом выполнения запроса является ссылка для подключения по протоколу Websocket. После установления подключения, можно отправлять текстовые данные на сервер, а в ответ получать PCM в бинарном виде.""", wsconfig, os.path.join(os.path.dirname(__file__), "stream_synthes.wav"))
 					
 		print("auto delete session with id %s" % session.session_id)
 		session_status = await sesapi.session_status(session)
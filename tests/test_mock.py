@@ -0,0 +1,640 @@
+import io
+import os
+import base64
+import time
+import wave
+import asyncio
+import aiohttp
+import tempfile
+import threading
+import tracemalloc
+import concurrent.futures
+
+import speechapi
+
+from mock_server import MockSpeechProServer
+
+def run(coro):
+	return asyncio.run(coro)
+	
+async def _session(sesapi):
+	return await sesapi.session_create(1, "login", "password")
+	
+def test_stream_recognize_from_path():
+	async def main():
+		async with MockSpeechProServer():
+			sesapi = speechapi.SessionApi()
+			recapi = speechapi.RecognizeApi()
+			session = await _session(sesapi)
+			
+			with tempfile.TemporaryDirectory() as tmp:
+				path = os.path.join(tmp, "audio.pcm")
+				with open(path, "wb") as f:
+					f.write(os.urandom(20000))
+					
+				wsconfig = await recapi.open_recognize_stream(session, "IvrRus")
+				hypotheses = [hyp async for hyp in recapi.stream_recognize(path, wsconfig, frame_size=8192, idle_timeout=0.2)]
+				
+				with open(path, "rb") as f:
+					wsconfig = await recapi.open_recognize_stream(session, "IvrRus")
+					async for hyp in recapi.stream_recognize(f, wsconfig, frame_size=8192, idle_timeout=0.2):
+						pass
+					assert not f.closed
+					
+			await sesapi.aclose()
+			return hypotheses
+			
+	hypotheses = run(main())
+	assert hypotheses[-1].final
+	assert hypotheses[-2].text == "mock 20000 bytes"
+	
+def test_abandoned_probe_closes_circuit_again():
+	async def main():
+		async with MockSpeechProServer() as server:
+			breaker = speechapi.CircuitBreaker(failure_threshold=1, recovery_timeout=0.1)
+			client = speechapi.HttpClient(retry=speechapi.RetryPolicy(attempts=1), breaker=breaker)
+			host = "%s:%d" % (server.host, server.port)
+			breaker.failure(host)
+			await asyncio.sleep(0.15)
+			
+			async def read(resp):
+				raise speechapi.APIResponseError("broken response")
+				
+			try:
+				await speechapi.api._get_api_response(server.url + "/vksession/rest/session", "POST", req={}, client=client, read=read)
+			except speechapi.APIResponseError:
+				pass
+			# abandoned probe doesn't keep circuit open forever
+			assert breaker.state(host) == "half-open"
+			await speechapi.api._get_api_response(server.url + "/vksession/rest/session", "POST", req={}, client=client)
+			assert breaker.state(host) == "closed"
+			await client.aclose()
+			
+	run(main())
+	
+def test_recognize_from_stream():
+	class Stream(object):
+		def __init__(self, data):
+			self._data = data
+			
+		def read(self, size=-1):
+			data, self._data = self._data, b""
+			return data
+			
+	async def main():
+		async with MockSpeechProServer():
+			sesapi = speechapi.SessionApi()
+			recapi = speechapi.RecognizeApi()
+			session = await _session(sesapi)
+			
+			read_fd, write_fd = os.pipe()
+			os.write(write_fd, b"\x01" * 3000)
+			os.close(write_fd)
+			with open(read_fd, "rb") as pipe:
+				from_pipe = await recapi.recognize(pipe, session, "IvrRus")
+			from_stream = await recapi.recognize(Stream(b"\x02" * 5000), session, "IvrRus")
+			await sesapi.aclose()
+			return from_pipe, from_stream
+			
+	from_pipe, from_stream = run(main())
+	assert from_pipe["audio_size"] == 3000
+	assert from_stream["audio_size"] == 5000
+	
+def test_session_pool_survives_mass_expiration():
+	async def main():
+		async with MockSpeechProServer() as server:
+			ttsapi = speechapi.TTSApi()
+			async with speechapi.SessionPool(1, "login", "password", size=3, keepalive=3600) as pool:
+				# server restart forgets all sessions
+				server.sessions.clear()
+				languages = await pool.run(ttsapi.get_languages, use_cache=False)
+				
+				waiter = asyncio.ensure_future(asyncio.gather(*[pool.run(lambda session: asyncio.sleep(0.5)) for _ in range(5)]))
+				await asyncio.sleep(0.1)
+			try:
+				await waiter
+			except RuntimeError:
+				pass
+			await ttsapi.aclose()
+			return languages
+			
+	assert len(run(main())) == 2
+	
+def test_stream_synthes_caches_only_closed_streams():
+	async def main(close_streams):
+		async with MockSpeechProServer(audio_size=8000, close_streams=close_streams) as server:
+			with tempfile.TemporaryDirectory() as tmp:
+				ttsapi = speechapi.TTSApi(synthes_cache=speechapi.SynthesDiskCache(tmp))
+				sesapi = speechapi.SessionApi()
+				session = await _session(sesapi)
+				
+				async def synthes():
+					async with await ttsapi.open_synthes_stream(session, "Anna") as wsconfig:
+						return b"".join([chunk async for chunk in ttsapi.stream_synthes("text", wsconfig, idle_timeout=0.2)])
+						
+				results = await asyncio.gather(*[synthes() for _ in range(4)])
+				results.append(await synthes())
+				await sesapi.aclose()
+				return server.streams, results
+				
+	streams, results = run(main(True))
+	assert streams == 1 and all(len(result) == 8000 for result in results)
+	streams, results = run(main(False))
+	assert streams == 5 and all(len(result) == 8000 for result in results)
+	
+def test_cached_catalog_is_not_shared():
+	async def main():
+		async with MockSpeechProServer() as server:
+			ttsapi = speechapi.TTSApi(catalog_cache=True)
+			sesapi = speechapi.SessionApi()
+			session = await _session(sesapi)
+			
+			voices = await ttsapi.get_voices(session, "Russian")
+			voices.remove(voices.get_by_name("Anna"))
+			requests = server.requests
+			assert "Anna" in [voice.name for voice in await ttsapi.get_voices(session, "Russian")]
+			assert server.requests == requests
+			
+			# session without domain is not cached
+			other = speechapi.session._Session({"session_id": session.session_id})
+			await ttsapi.get_voices(other, "Russian")
+			assert server.requests == requests + 1
+			
+			await sesapi.aclose()
+			
+	run(main())
+	
+def test_session_create_waits_for_domain_limiter():
+	async def main():
+		async with MockSpeechProServer():
+			limiter = speechapi.RateLimiter(domain_rate=1, domain_burst=1)
+			client = speechapi.HttpClient(limiter=limiter)
+			sesapi = speechapi.SessionApi(client=client, lazy_status=True)
+			
+			await _session(sesapi)
+			await _session(sesapi)
+			stats = limiter.stats()
+			assert stats["requests"] == 2 and stats["delayed"] == 1
+			
+			await client.aclose()
+			
+	run(main())
+	
+def test_synthesize_many_pulls_texts_lazily():
+	async def main():
+		async with MockSpeechProServer(latency=0.02) as server:
+			ttsapi = speechapi.TTSApi(synthes_cache=False)
+			sesapi = speechapi.SessionApi()
+			session = await _session(sesapi)
+			pulled = []
+			
+			def texts():
+				for i in range(20):
+					pulled.append(i)
+					yield "text %d" % (i % 10)
+					
+			requests = server.requests
+			results = []
+			async for result in ttsapi.synthesize_many(texts(), session, "Anna", concurrency=2):
+				# texts are taken from iterable only when workers are free
+				assert results or len(pulled) <= 4
+				results.append(result)
+			assert sorted(result.index for result in results) == list(range(20))
+			assert all(result.text == "text %d" % (result.index % 10) and result.error is None for result in results)
+			assert server.requests - requests == 10
+			
+			try:
+				async for result in ttsapi.synthesize_many(["text"], session, "Anna", concurrency=0):
+					pass
+			except ValueError:
+				pass
+			else:
+				assert False
+			await sesapi.aclose()
+			
+	run(main())
+	
+def test_memory_cached_synthes_returns_bytes():
+	async def main():
+		async with MockSpeechProServer(audio_size=8000):
+			ttsapi = speechapi.TTSApi(memory_cache=speechapi.SynthesMemoryCache(1 << 20))
+			sesapi = speechapi.SessionApi()
+			session = await _session(sesapi)
+			
+			for _ in range(2):
+				data = await ttsapi.package_synthes("text", session, "Anna", bin=True)
+				assert type(data) is bytes and len(data) == 8044
+			view = await ttsapi.package_synthes("text", session, "Anna", bin=True, view=True)
+			assert isinstance(view, memoryview) and view.readonly and view == data
+			
+			await sesapi.aclose()
+			
+	run(main())
+	
+def test_duplex_waits_idle_timeout_after_sending():
+	class WebSocket(object):
+		close_code = None
+		
+		def __init__(self):
+			self.messages = asyncio.Queue()
+			
+		async def receive(self, timeout=None):
+			return await asyncio.wait_for(self.messages.get(), timeout)
+			
+	async def main():
+		ws = WebSocket()
+		loop = asyncio.get_running_loop()
+		
+		async def send():
+			await asyncio.sleep(0.15)
+			# answer comes within idle timeout after sending, but later than idle timeout after start
+			loop.call_later(0.1, ws.messages.put_nowait, aiohttp.WSMessage(aiohttp.WSMsgType.BINARY, b"frame", None))
+			
+		ended = {}
+		msgs = [msg async for msg in speechapi.stream._duplex(ws, send, speechapi.IdleTimeout(0.2), ended)]
+		assert [msg.data for msg in msgs] == [b"frame"] and not ended["closed"]
+		
+	run(main())
+	
+def test_package_unload_error_is_suppressed():
+	class RecognizeApi(object):
+		def __init__(self):
+			self.unloading = asyncio.Event()
+			
+		async def load_package(self, session, package_id):
+			pass
+			
+		async def unload_package(self, session, package_id):
+			self.unloading.set()
+			await asyncio.sleep(0.01)
+			raise aiohttp.ClientConnectionError("server is unavailable")
+			
+	async def main():
+		recapi = RecognizeApi()
+		session = speechapi.session._Session({"session_id": "session"})
+		manager = speechapi.PackageManager(recapi, idle_timeout=0)
+		async with manager.acquire(session, "package"):
+			pass
+		await recapi.unloading.wait()
+		# unloading finishes without error and forgets package
+		await manager._unloading[(session.session_id, "package")]
+		assert not manager._unloading
+		
+		# package may be used again after failed unloading
+		async with manager.acquire(session, "package"):
+			assert manager.refs(session, "package") == 1
+		await manager.close()
+		
+	run(main())
+	
+def test_sync_client_close_cancels_pending_calls():
+	client = speechapi.SyncClient()
+	errors = []
+	
+	def call():
+		try:
+			client.run(asyncio.sleep(10))
+		except BaseException as ex:
+			errors.append(ex)
+			
+	thread = threading.Thread(target=call, daemon=True)
+	thread.start()
+	time.sleep(0.1)
+	client.close()
+	thread.join(5)
+	assert not thread.is_alive() and isinstance(errors[0], concurrent.futures.CancelledError)
+	
+	# client is usable after closing
+	assert client.run(asyncio.sleep(0, "result")) == "result"
+	client.close()
+	
+def test_client_closes_sessions_of_finished_loops():
+	server = MockSpeechProServer()
+	loop = asyncio.new_event_loop()
+	loop.run_until_complete(server.start())
+	thread = threading.Thread(target=loop.run_forever, daemon=True)
+	thread.start()
+	client = speechapi.HttpClient()
+	
+	async def call():
+		await speechapi.api._get_api_response(server.url + "/vksession/rest/session", "POST", req={}, client=client)
+		return await client.get_session()
+		
+	try:
+		sessions = [asyncio.run(call()) for _ in range(20)]
+		# every asyncio.run closes its session and next call forgets it
+		assert all(session.closed for session in sessions)
+		assert len(client._sessions) == 1 and client.closed
+	finally:
+		asyncio.run_coroutine_threadsafe(server.stop(), loop).result()
+		loop.call_soon_threadsafe(loop.stop)
+		thread.join()
+		loop.close()
+	
+def test_synthesize_many_keeps_memory_flat():
+	async def main():
+		async with MockSpeechProServer(audio_size=100000):
+			ttsapi = speechapi.TTSApi(synthes_cache=False)
+			sesapi = speechapi.SessionApi()
+			session = await _session(sesapi)
+			texts = ["text %d" % i for i in range(120)]
+			
+			tracemalloc.start()
+			try:
+				sizes = []
+				async for result in ttsapi.synthesize_many(texts, session, "Anna", concurrency=4, bin=True, window=4):
+					assert result.error is None
+					sizes.append(tracemalloc.get_traced_memory()[0])
+			finally:
+				tracemalloc.stop()
+			# finished results are not kept for distinct texts
+			assert sizes[-1] - sizes[20] < 2 * 1024 ** 2
+			await sesapi.aclose()
+			
+	run(main())
+	
+def test_session_pool_close_keeps_borrowed_sessions():
+	async def main():
+		async with MockSpeechProServer() as server:
+			ttsapi = speechapi.TTSApi()
+			pool = speechapi.SessionPool(1, "login", "password", size=2, keepalive=3600)
+			await pool.start()
+			
+			async def job(session):
+				await asyncio.sleep(0.2)
+				return await ttsapi.get_languages(session, use_cache=False)
+				
+			task = asyncio.ensure_future(pool.run(job))
+			await asyncio.sleep(0.05)
+			await pool.close()
+			# idle session is deleted at once, borrowed one after it's returned
+			assert list(server.sessions.values()).count(True) == 1
+			assert len(await task) == 2
+			assert not any(server.sessions.values())
+			
+	run(main())
+	
+def test_session_pool_start_deletes_created_sessions_on_error():
+	class SessionApi(object):
+		def __init__(self):
+			self.created, self.deleted = 0, []
+			
+		async def session_create(self, domain_id, login, password):
+			self.created += 1
+			if self.created == 2:
+				raise speechapi.APIRequestError("login failed")
+			return speechapi.session._Session({"session_id": "session %d" % self.created})
+			
+		async def session_delete(self, session):
+			self.deleted.append(session.session_id)
+			
+	async def main():
+		sesapi = SessionApi()
+		pool = speechapi.SessionPool(1, "login", "password", size=3, sesapi=sesapi)
+		try:
+			await pool.start()
+		except speechapi.APIRequestError:
+			pass
+		else:
+			assert False
+		assert sorted(sesapi.deleted) == ["session 1", "session 3"] and pool.closed
+		
+	run(main())
+	
+def test_configured_api_is_not_shared():
+	shared = speechapi.TTSApi()
+	ttsapi = speechapi.TTSApi(catalog_cache=True)
+	assert speechapi.TTSApi() is shared and ttsapi is not shared
+	assert ttsapi.catalog_cache is not None and shared.catalog_cache is None
+	assert speechapi.SessionApi(lazy_status=True) is not speechapi.SessionApi()
+	assert not speechapi.SessionApi().lazy_status
+	
+def test_packages_of_unknown_domain_are_not_cached():
+	class RecognizeApi(object):
+		def __init__(self):
+			self.calls = 0
+			
+		async def get_available_packages(self, session):
+			self.calls += 1
+			return [session.session_id]
+			
+	async def main():
+		recapi = RecognizeApi()
+		manager = speechapi.PackageManager(recapi)
+		first = speechapi.session._Session({"session_id": "first"})
+		second = speechapi.session._Session({"session_id": "second"})
+		assert await manager.get_available_packages(first) == ["first"]
+		assert await manager.get_available_packages(second) == ["second"]
+		
+		session = speechapi.session._Session({"session_id": "third"}, domain_id=1)
+		await manager.get_available_packages(session)
+		await manager.get_available_packages(session)
+		assert recapi.calls == 3
+		
+	run(main())
+	
+class _Response(object):
+	"""
+	Response which body is read by given chunks.
+	"""
+	
+	def __init__(self, chunks):
+		self.content = self
+		self._chunks = chunks
+		
+	async def iter_chunked(self, size):
+		for chunk in self._chunks:
+			yield chunk
+			
+def _read_data(chunks, out=None):
+	return run(speechapi.api._read_base64_data(_Response(chunks), out))
+	
+def test_read_base64_data_split_anywhere():
+	data = bytes(range(256)) * 3
+	encoded = base64.encodebytes(data).replace(b"/", b"\\/").replace(b"\n", b"\\n")
+	body = b'{"status": "ok", "data" \n:  "' + encoded + b'", "more": "x"}'
+	for size in (1, 2, 3, 5, 64):
+		assert _read_data([body[i:i + size] for i in range(0, len(body), size)]) == data
+	for i in range(len(body)):
+		assert _read_data([body[:i], body[i:]]) == data
+		
+def test_read_base64_data_errors():
+	for body in (b'{"status": "ok"}', b'{"data": null}'):
+		try:
+			_read_data([body])
+		except speechapi.APIResponseError as ex:
+			assert ex.key == "data"
+		else:
+			assert False
+	try:
+		_read_data([b'{"data": "abcde"}'])
+	except speechapi.APIResponseError as ex:
+		assert "base64" in str(ex)
+	else:
+		assert False
+	try:
+		_read_data([b'{"data": "', base64.b64encode(bytes(16)), b'"}'], memoryview(bytearray(10)))
+	except ValueError:
+		pass
+	else:
+		assert False
+		
+def test_read_base64_data_to_path_and_bytearray():
+	data = bytes(range(256))
+	chunks = [b'{"data": "', base64.b64encode(data), b'"}']
+	out = bytearray(b"x")
+	assert _read_data(chunks, out) == 256 and out == b"x" + data
+	
+	view = memoryview(bytearray(300))
+	assert _read_data(chunks, view) == 256 and view[:256] == data
+	
+	with tempfile.TemporaryDirectory() as tmp:
+		path = os.path.join(tmp, "audio.wav")
+		assert _read_data(chunks, path) == 256
+		with open(path, "rb") as f:
+			assert f.read() == data
+			
+def test_text_segmenter_boundaries():
+	segmenter = speechapi.TextSegmenter(max_size=40)
+	texts = [
+		"Первое предложение. Второе предложение! Третье? Четвёртое…", 
+		"Поэт А.С. Пушкин жил на ул. Мойке, т.е. в Петербурге. Он писал стихи и прозу.", 
+		"Короткая фраза, затем очень длинное перечисление слов без точек — до самого конца строки", 
+		"а" * 130, 
+		"", 
+	]
+	for text in texts:
+		chunks = list(segmenter(text))
+		assert "".join(chunks) == text
+		assert all(0 < len(chunk) <= 40 for chunk in chunks)
+		
+	assert list(segmenter(texts[0])) == ["Первое предложение. Второе предложение! ", "Третье? Четвёртое…"]
+	# abbreviations and initials don't end sentence
+	assert list(segmenter(texts[1])) == ["Поэт А.С. Пушкин жил на ул. Мойке, ", "т.е. в Петербурге. ", "Он писал стихи и прозу."]
+	assert list(segmenter(texts[3])) == ["а" * 40] * 3 + ["а" * 10]
+	
+def test_synthes_stream_pool_reuses_streams_up_to_max_uses():
+	async def main():
+		async with MockSpeechProServer(audio_size=8000) as server:
+			ttsapi = speechapi.TTSApi(synthes_cache=False)
+			calls = {"open": 0, "close": 0}
+			open_stream, close_stream = ttsapi.open_synthes_stream, ttsapi.close_synthes_stream
+			
+			async def open_synthes_stream(session, voice):
+				calls["open"] += 1
+				return await open_stream(session, voice)
+				
+			async def close_synthes_stream(wsconfig):
+				calls["close"] += 1
+				return await close_stream(wsconfig)
+				
+			ttsapi.open_synthes_stream, ttsapi.close_synthes_stream = open_synthes_stream, close_synthes_stream
+			sesapi = speechapi.SessionApi()
+			session = await _session(sesapi)
+			
+			pool = speechapi.SynthesStreamPool(size=1, max_uses=2, ttsapi=ttsapi)
+			await pool.prefill(session, "Anna")
+			# web socket of idle stream is connected in advance
+			assert calls["open"] == 1 and server.streams == 1
+			for _ in range(5):
+				chunks = [chunk async for chunk in pool.stream_synthes("text", session, "Anna", idle_timeout=0.2)]
+				assert len(b"".join(chunks)) == 8000
+				await asyncio.sleep(0.05)
+			# every stream is used twice, replacement is opened while last use goes
+			assert calls["open"] == 3 and calls["close"] == 2 and pool.idle == 1
+			
+			# error retires stream
+			try:
+				async with pool.acquire(session, "Anna"):
+					raise ValueError("broken synthes")
+			except ValueError:
+				pass
+			await asyncio.sleep(0.05)
+			assert calls["open"] == 4 and calls["close"] == 3 and pool.idle == 1
+			
+			# stream in use is closed when it's returned after closing of pool
+			async with pool.acquire(session, "Anna"):
+				await pool.close()
+				assert calls["close"] == 3
+			await asyncio.sleep(0.05)
+			assert calls["close"] == 4 and pool.idle == 0
+			await sesapi.aclose()
+			
+	run(main())
+	
+def test_wav_writer_patches_header():
+	pcm = bytes(range(256)) * 10
+	
+	def check(data, offset=0):
+		with wave.open(io.BytesIO(bytes(data[offset:]))) as f:
+			assert (f.getframerate(), f.getnchannels(), f.getsampwidth()) == (8000, 1, 2)
+			assert f.readframes(f.getnframes()) == pcm
+			
+	# header is patched in place after data that was in destination already
+	out = bytearray(b"prefix")
+	writer = speechapi.wav._WavWriter(out, 8000)
+	writer.write(pcm[:1000])
+	writer.write(pcm[1000:])
+	assert writer.close() == len(pcm)
+	check(out, len(b"prefix"))
+	
+	with tempfile.TemporaryDirectory() as tmp:
+		path = os.path.join(tmp, "audio.wav")
+		with open(path, "wb") as f:
+			f.write(b"prefix")
+			writer = speechapi.wav._WavWriter(f, 8000)
+			writer.write(pcm)
+			writer.close()
+			# position is kept after patching
+			assert f.tell() == len(b"prefix") + speechapi.wav._HEADER_SIZE + len(pcm)
+		with open(path, "rb") as f:
+			check(f.read(), len(b"prefix"))
+			
+def test_prompt_bundle_round_trip():
+	async def main():
+		async with MockSpeechProServer(audio_size=1000) as server:
+			sesapi = speechapi.SessionApi()
+			session = await _session(sesapi)
+			
+			with tempfile.TemporaryDirectory() as tmp:
+				path = os.path.join(tmp, "prompts.bundle")
+				prompts = [("greeting", "Anna", "Hello"), ("welcome", "Anna", "Hello"), ("Alexander", "Bye")]
+				assert await speechapi.build_bundle(path, prompts, session) == 3
+				
+				with speechapi.PromptBundle(path) as bundle:
+					assert len(bundle) == 3 and sorted(bundle) == ["Alexander:Bye", "greeting", "welcome"]
+					# duplicate texts are synthesized once and share audio
+					assert bytes(bundle["greeting"]) == bytes(bundle["welcome"]) == server.audio
+					assert bytes(bundle.get_prompt("Alexander", "Bye")) == server.audio
+					assert bundle.get("missing") is None and bundle.get_prompt("Anna", "Bye", b"") == b""
+					
+				# failed synthes keeps old bundle and removes temporary file
+				expired = speechapi.session._Session({"session_id": "expired"})
+				try:
+					await speechapi.build_bundle(path, [("Anna", "Text")], expired)
+				except speechapi.SPBaseError:
+					pass
+				else:
+					assert False
+				assert os.listdir(tmp) == ["prompts.bundle"]
+				with speechapi.PromptBundle(path) as bundle:
+					assert len(bundle) == 3
+					
+				other = os.path.join(tmp, "other")
+				with open(other, "wb") as f:
+					f.write(b"NOTBUNDL" + bytes(16))
+				try:
+					speechapi.PromptBundle(other)
+				except speechapi.APIResponseError as ex:
+					assert "bad magic" in str(ex)
+				else:
+					assert False
+			await sesapi.aclose()
+			
+	run(main())
+	
+if __name__ == "__main__":
+	for name, func in list(globals().items()):
+		if name.startswith("test_") and callable(func):
+			func()
+			print("%s ok" % name)
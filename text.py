@@ -0,0 +1,147 @@
+#!/usr/bin/env python
+
+"""
+Do it.
+"""
+
+# define metadata
+__all__ = ["TextSegmenter"]
+
+# import modules and packages
+import re
+
+# sentence end followed by capital letter, digit or opening quote
+_SENTENCE_RE = re.compile(r'[.!?…]+[»"\')\]]*\s+(?=[«"(\[]?[A-ZА-ЯЁ\d])')
+# clause delimiter or dash between words
+_CLAUSE_RE = re.compile(r'[,;:]\s+|\s+[—–-]\s+')
+_SPACE_RE = re.compile(r'\s+')
+
+# abbreviations which dot does not end sentence
+_ABBREVIATIONS = frozenset([
+	"т", "е", "д", "п", "г", "гг", "ул", "им", "др", "пр", "стр", "см", "рис", "табл",
+	"руб", "коп", "тыс", "млн", "млрд", "св", "ср", "доц", "проф", "акад", "напр",
+	"mr", "mrs", "ms", "dr", "prof", "st", "vs", "etc", "e", "i", "g", "no", "fig",
+])
+
+class TextSegmenter(object):
+	"""
+	Splitter of text into chunks for stream synthes.
+
+	Text is cut on sentence boundaries, if sentence is longer than max chunk size,
+	then on clause boundaries, then on spaces, and only then in the middle of word.
+	"""
+
+	def __init__(self, max_size=500, abbreviations=None):
+		"""
+		Initialize text segmenter.
+
+		:keyword int max_size:
+		    Max chunk size in characters.
+
+		:keyword iterable abbreviations:
+		    Lowercase abbreviations which dot does not end sentence.
+		    If it is None, common Russian and English abbreviations used.
+		"""
+		if max_size < 1:
+			raise ValueError("max chunk size must be positive, not %r" % max_size)
+		self._max_size = max_size
+		self._abbreviations = _ABBREVIATIONS if abbreviations is None else frozenset(abbreviations)
+
+	def __repr__(self):
+		"""
+		Return repr(self).
+		"""
+		return "%s(max_size=%r)" % (self.__class__.__name__, self._max_size)
+
+	def __call__(self, text):
+		"""
+		Return generator of text chunks.
+
+		:param str text:
+		    Text.
+
+		:return generator of str:
+		"""
+		for start, end in self.spans(text):
+			yield text[start:end]
+
+	max_size = property()
+
+	@max_size.getter
+	def max_size(self):
+		"""
+		Return max chunk size in characters.
+
+		:return int:
+		"""
+		return self._max_size
+
+	def _is_abbreviation(self, text, end):
+		"""
+		Return True if word that ends at ``end`` is abbreviation.
+
+		:param str text:
+		    Text.
+
+		:param int end:
+		    End offset of word.
+
+		:return bool:
+		"""
+		start = end
+		while start > 0 and text[start - 1].isalpha():
+			start -= 1
+		if end - start == 1 and text[start].isupper():
+			# initials
+			return True
+		return 0 < end - start <= 5 and text[start:end].lower() in self._abbreviations
+
+	def _boundary(self, text, start, end):
+		"""
+		Return offset of best chunk end inside text[start:end] or None if there are no boundaries.
+
+		:param str text:
+		    Text.
+
+		:param int start:
+		    Start offset of window.
+
+		:param int end:
+		    End offset of window.
+
+		:return int or None:
+		"""
+		boundary = None
+		for match in _SENTENCE_RE.finditer(text, start, end):
+			if not self._is_abbreviation(text, match.start()):
+				boundary = match.end()
+		if boundary is not None:
+			return boundary
+		for pattern in (_CLAUSE_RE, _SPACE_RE):
+			for match in pattern.finditer(text, start, end):
+				if match.end() > start:
+					boundary = match.end()
+			if boundary is not None:
+				return boundary
+		return None
+
+	def spans(self, text):
+		"""
+		Return generator of ``(start, end)`` offsets of text chunks.
+
+		:param str text:
+		    Text.
+
+		:return generator of tuple:
+		"""
+		start, length = 0, len(text)
+		while start < length:
+			end = start + self._max_size
+			if end >= length:
+				end = length
+			else:
+				# one more character lets lookahead see what follows window
+				end = self._boundary(text, start, end + 1) or end
+				end = min(end, start + self._max_size)
+			yield start, end
+			start = end
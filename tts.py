@@ -5,16 +5,31 @@ Do it.
 """
 
 # import modules and packages
+import sys
 from collections import OrderedDict
 from speechapi.exceptions import *
 
+def _intern(value):
+	"""
+	Return interned string or value as is if it is not string.
+	
+	:param object value:
+	    Value.
+		
+	:return object:
+	"""
+	return sys.intern(value) if isinstance(value, str) else value
+
 class _TTSEntity(object):
 	"""
 	Base class for TTS entity such as language or voice.
 	
 	All TTS entities must have id and name. 
+	Entities are immutable and hashable, equal entities have equal attributes.
 	"""
 	
+	__slots__ = ("_id", "_name")
+	
 	def __init__(self, api_json):
 		"""
 		Initialize TTS entity.
@@ -29,14 +44,81 @@ class _TTSEntity(object):
 		    If name is missing.
 		"""
 		try:
-			self._id = api_json["id"]
+			object.__setattr__(self, "_id", _intern(api_json["id"]))
 		except KeyError:
 			raise APIResponseError("id is missing", key="id")
 			
 		try:
-			self._name = api_json["name"]
+			object.__setattr__(self, "_name", _intern(api_json["name"]))
 		except KeyError:
 			raise APIResponseError("name is missing", key="name")
+	
+	def __setattr__(self, name, value):
+		"""
+		Forbid attributes changing.
+		"""
+		raise AttributeError("%s is immutable" % self.__class__.__name__)
+		
+	def __delattr__(self, name):
+		"""
+		Forbid attributes deleting.
+		"""
+		raise AttributeError("%s is immutable" % self.__class__.__name__)
+		
+	def __eq__(self, other):
+		"""
+		Return self == other.
+		"""
+		if other.__class__ is not self.__class__:
+			return NotImplemented
+		return self._key() == other._key()
+		
+	def __ne__(self, other):
+		"""
+		Return self != other.
+		"""
+		eq = self.__eq__(other)
+		return eq if eq is NotImplemented else not eq
+		
+	def __hash__(self):
+		"""
+		Return hash(self).
+		"""
+		return hash((self.__class__, self._key()))
+		
+	def __reduce__(self):
+		"""
+		Return data for pickling.
+		"""
+		return (self.__class__, (self._as_json(),))
+		
+	def __copy__(self):
+		"""
+		Return self because entity is immutable.
+		"""
+		return self
+		
+	def __deepcopy__(self, memo):
+		"""
+		Return self because entity is immutable.
+		"""
+		return self
+		
+	def _key(self):
+		"""
+		Return tuple of attributes that identify entity.
+		
+		:return tuple:
+		"""
+		return (self._id, self._name)
+		
+	def _as_json(self):
+		"""
+		Return entity as API JSON.
+		
+		:return dict:
+		"""
+		return {"id": self._id, "name": self._name}
 		
 	id = property()
 	name = property()
@@ -64,6 +146,8 @@ class _Language(_TTSEntity):
 	SpeachPro language.
 	"""
 	
+	__slots__ = ()
+	
 	def __init__(self, api_json):
 		"""
 		Initialize SpeachPro language.
@@ -94,12 +178,17 @@ class _Voice(_TTSEntity):
 	SpeachPro voice.
 	"""
 	
-	def __init__(self, api_json):
+	__slots__ = ("_gender", "_language")
+	
+	def __init__(self, api_json, language=None):
 		"""
 		Initialize SpeachPro voice.
 		
 		:param dict api_json:
 		    API JSON response.
+			
+		:keyword str language:
+		    Name of voice language. It is used if api response has no language.
 		
 		:except APIResponseError:
 		    If gender is missing.
@@ -110,11 +199,34 @@ class _Voice(_TTSEntity):
 			raise APIResponseError("voice %s" % ex, key=ex.key)
 		
 		try:
-			self._gender = api_json["gender"]
+			object.__setattr__(self, "_gender", _intern(api_json["gender"]))
 		except KeyError:
 			raise APIResponseError("voice gender is missing", key="gender")
+		
+		object.__setattr__(self, "_language", _intern(api_json.get("language", language)))
+	
+	def _key(self):
+		"""
+		Return tuple of attributes that identify voice.
+		
+		:return tuple:
+		"""
+		return (self._id, self._name, self._gender, self._language)
+		
+	def _as_json(self):
+		"""
+		Return voice as API JSON.
+		
+		:return dict:
+		"""
+		api_json = super()._as_json()
+		api_json["gender"] = self._gender
+		if self._language is not None:
+			api_json["language"] = self._language
+		return api_json
 	
 	gender = property()
+	language = property()
 	
 	def __str__(self):
 		"""
@@ -126,7 +238,7 @@ class _Voice(_TTSEntity):
 		"""
 		Return repr(self).
 		"""
-		return "%s(%r)" % (self.__class__.__name__, {"id": self.id, "name": self.name, "gender": self.gender})
+		return "%s(%r, language=%r)" % (self.__class__.__name__, {"id": self.id, "name": self.name, "gender": self.gender}, self.language)
 		
 	@gender.getter
 	def gender(self):
@@ -137,6 +249,15 @@ class _Voice(_TTSEntity):
 		"""
 		return self._gender
 		
+	@language.getter
+	def language(self):
+		"""
+		Return name of voice language or None if it is unknown.
+		
+		:return str or None:
+		"""
+		return self._language
+		
 
 class _TTSEntitiesSet(object):
 	"""
@@ -147,6 +268,7 @@ class _TTSEntitiesSet(object):
 		Initialize set of SpeachPro entities.
 		"""
 		self._entities = OrderedDict()
+		self._names = {}
 		
 	def __str__(self):
 		"""
@@ -164,7 +286,7 @@ class _TTSEntitiesSet(object):
 		"""
 		Return true if value in self.
 		"""
-		return isinstance(value, _TTSEntity) and value.id in self._entities.keys()
+		return isinstance(value, _TTSEntity) and value.id in self._entities
 	
 	def __getitem__(self, idx):
 		"""
@@ -174,20 +296,27 @@ class _TTSEntitiesSet(object):
 	
 	def __iter__(self):
 		"""
-		Return self.
+		Return iterator over entities.
 		"""
-		self._index = -1
-		return self
+		return iter(self._entities.values())
 		
-	def __next__(self):
+	@staticmethod
+	def _match(entity, filters):
 		"""
-		Return next item.
+		Return True if entity attributes are equal to filters values.
+		
+		:param _TTSEntity entity:
+		    TTS entity.
+			
+		:param dict filters:
+		    Attributes values by names. None values are ignored.
+			
+		:return bool:
 		"""
-		if self._index < len(self) - 1:
-			self._index += 1
-			return list(self._entities.values())[self._index]
-		else:
-			raise StopIteration
+		for attr, value in filters.items():
+			if value is not None and getattr(entity, attr, None) != value:
+				return False
+		return True
 	
 	def _add(self, entity):
 		"""
@@ -203,6 +332,7 @@ class _TTSEntitiesSet(object):
 		"""
 		if not entity in self:
 			self._entities[entity.id] = entity
+			self._names.setdefault(entity.name, OrderedDict())[entity.id] = entity
 		else:
 			raise KeyError("Entity with id '%s' already exists" % entity.id)
 			
@@ -215,7 +345,26 @@ class _TTSEntitiesSet(object):
 			
 		:return _TTSEntity or None:
 		"""
-		self._entities.pop(entity.id, None)
+		entity = self._entities.pop(entity.id, None)
+		if entity is not None:
+			named = self._names[entity.name]
+			del named[entity.id]
+			if not named:
+				del self._names[entity.name]
+		return entity
+		
+	def copy(self):
+		"""
+		Return shallow copy of set. Entities are immutable, so they are shared.
+		
+		:return _TTSEntitiesSet:
+		"""
+		entities = self.__class__()
+		entities._entities = OrderedDict(self._entities)
+		entities._names = {name: OrderedDict(named) for name, named in self._names.items()}
+		return entities
+		
+	__copy__ = copy
 		
 	def get_by_id(self, id):
 		"""
@@ -229,28 +378,46 @@ class _TTSEntitiesSet(object):
 		:except KeyError:
 		    If entity with specified id dosn't exists in set.
 		"""
-		for idx,entity in enumerate(self):
-			if entity.id == id:
-				return entity
-		raise KeyError("Entity with id '%s' dosn't exists" % id)
+		try:
+			return self._entities[id]
+		except KeyError:
+			raise KeyError("Entity with id '%s' dosn't exists" % id)
 		
-	def get_by_name(self, name):
+	def get_by_name(self, name, **filters):
 		"""
 		Return TTS entity by name.
 		
 		:param str name:
 		    TTS entity name.
 			
+		:keyword filters:
+		    Values of other entity attributes, e.g. ``gender="female"``.
+			
 		:return _TTSEntity:
 		
 		:except KeyError:
 		    If entity with specified name dosn't exists in set.
 		"""
-		for idx,entity in enumerate(self):
-			if entity.name == name:
+		for entity in self._names.get(name, {}).values():
+			if self._match(entity, filters):
 				return entity
 		raise KeyError("Entity with name '%s' dosn't exists" % name)
 		
+	def filter(self, **filters):
+		"""
+		Return new set of TTS entities which attributes are equal to filters values.
+		
+		:keyword filters:
+		    Values of entity attributes, e.g. ``gender="female"``.
+			
+		:return _TTSEntitiesSet:
+		"""
+		entities = self.__class__()
+		for entity in self:
+			if self._match(entity, filters):
+				entities._add(entity)
+		return entities
+		
 class _LanguagesSet(_TTSEntitiesSet):
 	"""
 	Set of SpeachPro languages.
@@ -311,3 +478,127 @@ class _VoicesSet(_TTSEntitiesSet):
 			raise TypeError("expected SpeechPro voice, not %s" % voice.__class__.__name__)
 		super()._add(voice)
 		
+	def get_by_name(self, name, gender=None, language=None):
+		"""
+		Return SpeachPro voice by name.
+		
+		:param str name:
+		    Voice name.
+			
+		:keyword str gender:
+		    Voice gender. If it is None, gender is not checked.
+			
+		:keyword str language:
+		    Name of voice language. If it is None, language is not checked.
+			
+		:return _Voice:
+		
+		:except KeyError:
+		    If voice with specified name dosn't exists in set.
+		"""
+		return super().get_by_name(name, gender=gender, language=language)
+		
+	def filter(self, gender=None, language=None):
+		"""
+		Return new set of SpeachPro voices with specified gender and language.
+		
+		:keyword str gender:
+		    Voice gender. If it is None, gender is not checked.
+			
+		:keyword str language:
+		    Name of voice language. If it is None, language is not checked.
+			
+		:return _VoicesSet:
+		"""
+		return super().filter(gender=gender, language=language)
+		
+class _SynthesResult(object):
+	"""
+	Result of synthes of one text from batch.
+	"""
+	
+	__slots__ = ("_index", "_text", "_data", "_error")
+	
+	def __init__(self, index, text, data=None, error=None):
+		"""
+		Initialize result of synthes.
+		
+		:param int index:
+		    Index of text in batch.
+			
+		:param str text:
+		    Synthesized text.
+			
+		:keyword str or bytes data:
+		    Result of synthes. None if synthes failed.
+			
+		:keyword Exception error:
+		    Error of synthes. None if synthes succeeded.
+		"""
+		self._index = index
+		self._text  = text
+		self._data  = data
+		self._error = error
+		
+	def __str__(self):
+		"""
+		Return str(self).
+		"""
+		return '<%s index=%d ok=%r>' % (self.__class__.__name__, self.index, self.ok)
+		
+	def __repr__(self):
+		"""
+		Return repr(self).
+		"""
+		return "%s(%r, %r, error=%r)" % (self.__class__.__name__, self.index, self.text, self.error)
+		
+	index = property()
+	text = property()
+	data = property()
+	error = property()
+	ok = property()
+	
+	@index.getter
+	def index(self):
+		"""
+		Return index of text in batch.
+		
+		:return int:
+		"""
+		return self._index
+		
+	@text.getter
+	def text(self):
+		"""
+		Return synthesized text.
+		
+		:return str:
+		"""
+		return self._text
+		
+	@data.getter
+	def data(self):
+		"""
+		Return result of synthes or None if synthes failed.
+		
+		:return str or bytes or None:
+		"""
+		return self._data
+		
+	@error.getter
+	def error(self):
+		"""
+		Return error of synthes or None if synthes succeeded.
+		
+		:return Exception or None:
+		"""
+		return self._error
+		
+	@ok.getter
+	def ok(self):
+		"""
+		Return True if synthes succeeded.
+		
+		:return bool:
+		"""
+		return self._error is None
@@ -0,0 +1,143 @@
+#!/usr/bin/env python
+
+"""
+Do it.
+"""
+
+# import modules and packages
+import os
+import re
+import struct
+
+_HEADER = struct.Struct("<4sI4s4sIHHIIHH4sI")
+_HEADER_SIZE = _HEADER.size
+# size used when header can't be patched after writing
+_UNKNOWN_SIZE = 0xFFFFFFFF
+_DEFAULT_RATE = 22050
+
+def _voice_format(voice=None, voice_format=None):
+	"""
+	Return ``(rate, channels, sampwidth)`` of voice PCM.
+
+	:keyword str or _Voice voice:
+	    SpeechPro voice. Voices like ``Alexander8000`` have sample rate in name,
+	    other voices use 22050 Hz.
+
+	:keyword int or tuple voice_format:
+	    Sample rate or tuple ``(rate, channels, sampwidth)``.
+	    If it is specified, voice is not used.
+
+	:return tuple:
+	"""
+	if isinstance(voice_format, (tuple, list)):
+		return tuple(voice_format)
+	if voice_format is not None:
+		return (int(voice_format), 1, 2)
+	name = getattr(voice, "name", voice)
+	match = re.search(r"(\d{4,5})$", str(name or ""))
+	rate = int(match.group(1)) if match and int(match.group(1)) >= 8000 else _DEFAULT_RATE
+	return (rate, 1, 2)
+
+def _header(rate, channels, sampwidth, data_size):
+	"""
+	Return RIFF WAVE header of PCM data.
+
+	:param int rate:
+	    Sample rate.
+
+	:param int channels:
+	    Number of channels.
+
+	:param int sampwidth:
+	    Sample width in bytes.
+
+	:param int data_size:
+	    Size of PCM data in bytes.
+
+	:return bytes:
+	"""
+	riff_size = _UNKNOWN_SIZE if data_size == _UNKNOWN_SIZE else min(36 + data_size, _UNKNOWN_SIZE)
+	return _HEADER.pack(
+		b"RIFF", riff_size, b"WAVE",
+		b"fmt ", 16, 1, channels, rate, rate * channels * sampwidth, channels * sampwidth, sampwidth * 8,
+		b"data", min(data_size, _UNKNOWN_SIZE)
+	)
+
+class _WavWriter(object):
+	"""
+	Writer of PCM data to WAV file, file object or bytearray.
+
+	Header is written first with unknown sizes and patched on closing
+	if destination is seekable.
+	"""
+
+	def __init__(self, out, rate, channels=1, sampwidth=2):
+		"""
+		Initialize WAV writer.
+
+		:param object out:
+		    Path of file, binary file object or bytearray.
+
+		:param int rate:
+		    Sample rate.
+
+		:keyword int channels:
+		    Number of channels.
+
+		:keyword int sampwidth:
+		    Sample width in bytes.
+		"""
+		self._format = (rate, channels, sampwidth)
+		self._size   = 0
+		self._opened = isinstance(out, (str, os.PathLike))
+		self._out    = open(out, "wb") if self._opened else out
+		if isinstance(self._out, bytearray):
+			self._start = len(self._out)
+			self._out += _header(rate, channels, sampwidth, _UNKNOWN_SIZE)
+		else:
+			seekable = getattr(self._out, "seekable", None)
+			self._start = self._out.tell() if seekable is not None and seekable() else None
+			self._out.write(_header(rate, channels, sampwidth, _UNKNOWN_SIZE))
+
+	def write(self, data):
+		"""
+		Write PCM data.
+
+		:param bytes data:
+		    PCM data.
+
+		:return None:
+		"""
+		if isinstance(self._out, bytearray):
+			self._out += data
+		else:
+			self._out.write(data)
+		self._size += len(data)
+
+	def close(self):
+		"""
+		Patch header and close file if it was opened by writer.
+
+		:return int:
+		    Size of PCM data in bytes.
+		"""
+		header = _header(*self._format, self._size)
+		if isinstance(self._out, bytearray):
+			self._out[self._start:self._start + _HEADER_SIZE] = header
+		elif self._start is not None:
+			position = self._out.tell()
+			self._out.seek(self._start)
+			self._out.write(header)
+			self._out.seek(position)
+		if self._opened:
+			self._out.close()
+		return self._size
+
+	def abort(self):
+		"""
+		Close file if it was opened by writer.
+
+		:return None:
+		"""
+		if self._opened:
+			self._out.close()